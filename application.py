@@ -1,39 +1,367 @@
-import joblib
+import os
+import threading
+import time
+
+# Startup phases (imports, model load, warm up) in seconds, see benchmarks/startup_benchmark.py. Only
+# what inference needs is imported here: joblib/sklearn, LightGBM and pyarrow are imported on first use.
+startup_timings = {}
+_phase_start = time.perf_counter()
+
 import numpy as np
-from config.paths_config import MODEL_OUTPUT_PATH
-from flask import Flask, render_template, request
+from config.paths_config import MODEL_OUTPUT_PATH , COMPILED_MODEL_OUTPUT_PATH , FEATURE_TRANSFORMER_PATH , CONFIG_PATH
+from config.paths_config import MODEL_REGISTRY_DIR , BOOSTER_OUTPUT_PATH
+from flask import Flask, render_template, request, jsonify, g, Response
+from src.prediction import get_feature_columns , get_feature_dtype , json_to_matrix , csv_to_matrix , predict_batch
+from src.prediction import raw_json_to_columns , raw_csv_to_columns
+from src.feature_transformer import FeatureTransformer , RAW_COLUMNS , REQUIRED_RAW_COLUMNS
+from src.tree_inference import CompiledTreeModel
+from src.micro_batching import MicroBatcher
+from src.prediction_cache import PredictionCache
+from src.model_registry import ModelRegistry , ModelManager , ServedModel , version_file
+from src.serving_metrics import MetricsRegistry , ROW_BUCKETS
+from src.explanations import TreeExplainer
+from src.wire_format import ARROW_STREAM_MIMETYPE , MATRIX_MIMETYPE , decode_payload , encode_predictions
+from utils.common_functions import read_yaml
+
+
+def end_phase(name):
+    global _phase_start
+    now = time.perf_counter()
+    startup_timings[name] = round(now - _phase_start , 6)
+    _phase_start = now
+
+
+end_phase("imports")
 
 app = Flask(__name__)
 
-# Load Titanic model
-loaded_model = joblib.load(MODEL_OUTPUT_PATH)
+config = read_yaml(CONFIG_PATH)
+
+# Feature order and dtype the model was trained with
+feature_columns = get_feature_columns(config)
+feature_dtype = get_feature_dtype(config)
+
+model_backend = config["serving"]["model_backend"]
+model_path = COMPILED_MODEL_OUTPUT_PATH if model_backend == "compiled" else MODEL_OUTPUT_PATH
+micro_batching_config = config["serving"]["micro_batching"]
+registry_config = config["serving"]["model_registry"]
+
+
+def load_model(directory):
+    # "compiled" (numpy tree arrays) or "sklearn" (joblib pickle) files of one model version, with the
+    # feature transformer fitted in the same training run so raw records are engineered like its training data
+    transformer = FeatureTransformer.load(version_file(directory , FEATURE_TRANSFORMER_PATH))
+    if model_backend == "compiled":
+        return CompiledTreeModel.load(os.path.join(directory , os.path.basename(COMPILED_MODEL_OUTPUT_PATH))) , transformer
+    import joblib
+    return joblib.load(os.path.join(directory , os.path.basename(MODEL_OUTPUT_PATH))) , transformer
+
+
+def make_served(version , loaded):
+    model , transformer = loaded
+    score = lambda features: predict_batch(model , features)
+    if not micro_batching_config["enabled"]:
+        return ServedModel(version , model , score , transformer=transformer)
+    # Optional coalescing of concurrent requests into one model call, one batcher per model version
+    batcher = MicroBatcher(score , max_batch_size=micro_batching_config["max_batch_size"] ,
+                           max_wait_ms=micro_batching_config["max_wait_ms"])
+    return ServedModel(version , model , batcher.predict , batcher=batcher , transformer=transformer)
+
+
+def warm_up(served):
+    # Scores a few rows before the version takes traffic, a broken model is never swapped in
+    if not served.transformer.is_fitted:
+        raise ValueError(f"Feature transformer of model version {served.version} is not fitted")
+    features = np.zeros((registry_config["warmup_rows"] , len(feature_columns)) , dtype=feature_dtype)
+    predictions , probabilities = predict_batch(served.model , features)
+    if len(predictions) != len(features) or not np.isfinite(probabilities).all():
+        raise ValueError(f"Model version {served.version} failed warm up")
+
+
+# Optional cache of predictions keyed on the model version and the exact feature vector
+cache_config = config["serving"]["prediction_cache"]
+prediction_cache = None
+if cache_config["enabled"]:
+    prediction_cache = PredictionCache(max_size=cache_config["max_size"] , ttl_seconds=cache_config["ttl_seconds"])
+
+# Explanations come from the LightGBM booster of a version (the compiled model has no TreeSHAP), loaded
+# once per version on its first /explain request; explained rows are cached per version
+explanations_config = config["serving"]["explanations"]
+explanation_cache = PredictionCache(max_size=explanations_config["cache_size"]) if explanations_config["cache_size"] else None
+
+
+def retain_served_versions(versions):
+    # Cached rows of versions that stopped serving are dropped, the rest stay valid for their version
+    for cache in (prediction_cache , explanation_cache):
+        if cache is not None:
+            cache.retain(versions)
+
+
+# Active model version(s) from the registry, reloaded in the background when a new version is published
+model_manager = ModelManager(ModelRegistry(MODEL_REGISTRY_DIR) if registry_config["enabled"] else None ,
+                             load_fn=load_model , make_served=make_served , warmup_fn=warm_up ,
+                             fallback_dir=os.path.dirname(model_path) ,
+                             poll_interval_seconds=registry_config["poll_interval_seconds"] ,
+                             on_swap=retain_served_versions)
+end_phase("model_load")
+
+explainer_lock = threading.Lock()
+
+
+def load_booster(directory):
+    # The booster text dump when the version has one, otherwise the booster of the pickled estimator
+    booster_path = os.path.join(directory , os.path.basename(BOOSTER_OUTPUT_PATH))
+    if os.path.exists(booster_path):
+        import lightgbm as lgb
+        return lgb.Booster(model_file=booster_path)
+    import joblib
+    return joblib.load(os.path.join(directory , os.path.basename(MODEL_OUTPUT_PATH))).booster_
+
+
+def get_explainer(served):
+    if served.explainer is None:
+        with explainer_lock:
+            if served.explainer is None:
+                if hasattr(served.model , "booster_"):
+                    booster = served.model.booster_
+                else:
+                    booster = load_booster(model_manager.model_dir(served.version))
+                served.explainer = TreeExplainer(booster , feature_columns , version=served.version ,
+                                                 cache=explanation_cache)
+    return served.explainer
+
+
+# Request, stage and model metrics served at /metrics in the Prometheus text format
+metrics = MetricsRegistry()
+request_duration = metrics.histogram("titanic_request_duration_seconds" , "Request latency" , ["route" , "method"])
+requests_total = metrics.counter("titanic_requests_total" , "Requests by response status" , ["route" , "method" , "status"])
+stage_duration = metrics.histogram("titanic_stage_duration_seconds" , "Latency of each request stage" , ["route" , "stage"])
+batch_rows = metrics.histogram("titanic_batch_rows" , "Rows scored per request" , ["route"] , buckets=ROW_BUCKETS)
+predictions_total = metrics.counter("titanic_predictions_total" , "Rows scored by model version" , ["model_version"])
+
+
+def model_info():
+    status = model_manager.status()
+    return {(version , str(version == status["active"]).lower()) : weight for version , weight in status["traffic"].items()}
+
+
+metrics.gauge_callback("titanic_model_info" , "Loaded model versions and their traffic share" , ["version" , "active"] ,
+                       model_info)
+metrics.gauge_callback("titanic_prediction_cache" , "Prediction cache counters" , ["counter"] ,
+                       lambda: {(name ,) : value for name , value in prediction_cache.stats().items()}
+                       if prediction_cache is not None else {})
+
+
+def route_name():
+    # The URL rule, not the path, keeps the label set small
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+
+# Set on the startup warm-up requests, which are kept out of the metrics; not settable by clients
+WARMUP_ENVIRON_KEY = "titanic.warmup"
+
+
+@app.after_request
+def record_request(response):
+    if request.environ.get(WARMUP_ENVIRON_KEY):
+        return response
+    route = route_name()
+    request_duration.labels(route , request.method).observe(time.perf_counter() - g.get("request_start" , time.perf_counter()))
+    requests_total.labels(route , request.method , str(response.status_code)).inc()
+    return response
+
+
+def predict_features(features , served=None):
+    # Returns predictions, probabilities and the model version that scored them; served is the version
+    # the features were engineered for, otherwise one is chosen here
+    route = route_name()
+    with stage_duration.labels(route , "predict").time():
+        features = features.astype(feature_dtype , copy=False)
+        served = served or model_manager.choose()
+        if prediction_cache is not None:
+            predictions , probabilities = prediction_cache.predict(features , served.score , namespace=served.version)
+        else:
+            predictions , probabilities = served.score(features)
+    if request.environ.get(WARMUP_ENVIRON_KEY):
+        return predictions , probabilities , served.version
+    batch_rows.labels(route).observe(len(features))
+    predictions_total.labels(served.version).inc(len(features))
+    return predictions , probabilities , served.version
+
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
     prediction = None
 
     if request.method == 'POST':
-        # Retrieve all numeric features
-        pclass = float(request.form["num__Pclass"])
-        sex = float(request.form["num__Sex"])
-        age = float(request.form["num__Age"])
-        fare = float(request.form["num__Fare"])
-        embarked = float(request.form["num__Embarked"])
-        familysize = float(request.form["num__Familysize"])
-        isalone = float(request.form["num__Isalone"])
-        hascabin = float(request.form["num__HasCabin"])
-        title = float(request.form["num__Title"])
-        pclass_fare = float(request.form["num__Pclass_Fare"])
-        age_fare = float(request.form["num__Age_Fare"])
-
-        # Combine into array in the correct order
-        features = np.array([[pclass, sex, age, fare, embarked, familysize, isalone,
-                              hascabin, title, pclass_fare, age_fare]])
+        with stage_duration.labels("/" , "parse").time():
+            # Retrieve all numeric features
+            pclass = float(request.form["num__Pclass"])
+            sex = float(request.form["num__Sex"])
+            age = float(request.form["num__Age"])
+            fare = float(request.form["num__Fare"])
+            embarked = float(request.form["num__Embarked"])
+            familysize = float(request.form["num__Familysize"])
+            isalone = float(request.form["num__Isalone"])
+            hascabin = float(request.form["num__HasCabin"])
+            title = float(request.form["num__Title"])
+            pclass_fare = float(request.form["num__Pclass_Fare"])
+            age_fare = float(request.form["num__Age_Fare"])
+
+        with stage_duration.labels("/" , "features").time():
+            # Combine into array in the correct order
+            features = np.array([[pclass, sex, age, fare, embarked, familysize, isalone,
+                                  hascabin, title, pclass_fare, age_fare]])
 
         # Predict using the model
-        prediction = loaded_model.predict(features)[0]
+        predictions , _ , _ = predict_features(features)
+        prediction = predictions[0]
+
+    with stage_duration.labels("/" , "render").time():
+        return render_template("index.html", prediction=prediction)
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch_route():
+    # Accepts JSON records / columns, a CSV upload in the "file" field, or an Arrow IPC stream / TMX1
+    # matrix body which is answered in the same binary format
+    binary = request.mimetype in (ARROW_STREAM_MIMETYPE , MATRIX_MIMETYPE)
+    try:
+        with stage_duration.labels("/predict/batch" , "parse").time():
+            if binary:
+                features = decode_payload(request.mimetype , request.get_data() , feature_columns)
+            elif "file" in request.files:
+                features = csv_to_matrix(request.files["file"].stream , feature_columns)
+            else:
+                payload = request.get_json(silent=True)
+                if payload is None:
+                    return jsonify({"error": "Expected a JSON body or a CSV file upload"}), 400
+                features = json_to_matrix(payload , feature_columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    predictions , probabilities , version = predict_features(features)
+
+    with stage_duration.labels("/predict/batch" , "serialize").time():
+        if binary:
+            body = encode_predictions(request.mimetype , predictions , probabilities , version)
+            return Response(body , mimetype=request.mimetype , headers={"X-Model-Version": version})
+        return jsonify({
+            "predictions": predictions.tolist(),
+            "probabilities": probabilities.tolist(),
+            "model_version": version
+        })
+
+@app.route('/predict/raw', methods=['POST'])
+def predict_raw_route():
+    # Same payload shapes as /predict/batch but with raw passenger columns (Name, Sex, SibSp, Cabin, ...)
+    try:
+        with stage_duration.labels("/predict/raw" , "parse").time():
+            if "file" in request.files:
+                columns = raw_csv_to_columns(request.files["file"].stream , RAW_COLUMNS , REQUIRED_RAW_COLUMNS)
+            else:
+                payload = request.get_json(silent=True)
+                if payload is None:
+                    return jsonify({"error": "Expected a JSON body or a CSV file upload"}), 400
+                columns = raw_json_to_columns(payload , RAW_COLUMNS , REQUIRED_RAW_COLUMNS)
+        with stage_duration.labels("/predict/raw" , "transform").time():
+            # Engineered with the transformer of the version that scores them
+            served = model_manager.choose()
+            features = served.transformer.transform_matrix(columns , feature_columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    predictions , probabilities , version = predict_features(features , served)
+
+    with stage_duration.labels("/predict/raw" , "serialize").time():
+        return jsonify({
+            "predictions": predictions.tolist(),
+            "probabilities": probabilities.tolist(),
+            "model_version": version
+        })
+
+@app.route('/explain', methods=['POST'])
+def explain_route():
+    # Per-feature contributions for one record or the /predict/batch payload shapes
+    try:
+        with stage_duration.labels("/explain" , "parse").time():
+            if "file" in request.files:
+                features = csv_to_matrix(request.files["file"].stream , feature_columns)
+            else:
+                payload = request.get_json(silent=True)
+                if payload is None:
+                    return jsonify({"error": "Expected a JSON body or a CSV file upload"}), 400
+                if isinstance(payload , dict) and "records" not in payload and "columns" not in payload:
+                    payload = [payload]
+                features = json_to_matrix(payload , feature_columns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    with stage_duration.labels("/explain" , "explain").time():
+        features = features.astype(feature_dtype , copy=False)
+        served = model_manager.choose()
+        explanation = get_explainer(served).explain(features)
+    batch_rows.labels("/explain").observe(len(features))
+
+    with stage_duration.labels("/explain" , "serialize").time():
+        return jsonify(dict(explanation , model_version=served.version))
+
+@app.route('/model/version', methods=['GET'])
+def model_version():
+    return jsonify(model_manager.status())
+
+@app.route('/serving/stats', methods=['GET'])
+def serving_stats():
+    batchers = {version : served.batcher for version , served in model_manager.served_models().items()
+                if served.batcher is not None}
+    return jsonify({
+        "micro_batching": {version : batcher.stats() for version , batcher in batchers.items()} or None,
+        "prediction_cache": prediction_cache.stats() if prediction_cache is not None else None,
+        "explanation_cache": explanation_cache.stats() if explanation_cache is not None else None
+    })
+
+@app.route('/metrics', methods=['GET'])
+def metrics_route():
+    return Response(metrics.render() , mimetype="text/plain; version=0.0.4")
+
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    # Liveness: the process is up and answering
+    return jsonify({"status": "ok"})
+
+@app.route('/readyz', methods=['GET'])
+def readyz():
+    # Readiness: a warmed up model version is routed to and the feature transformers are fitted
+    status = model_manager.status()
+    ready = bool(status["loaded"]) and warmed_up and \
+        all(served.transformer.is_fitted for served in model_manager.served_models().values())
+    body = {"ready": ready , "model_version": status["active"] , "startup_seconds": startup_timings}
+    return jsonify(body) , (200 if ready else 503)
+
+
+def warm_up_routes():
+    # One request per scoring route through the whole Flask stack (routing, parsing, the model,
+    # serialisation), so the first client request does not pay for anything lazily set up. With
+    # gunicorn's preload_app this runs once in the master and the workers are forked warm.
+    client = app.test_client()
+    record = {name : 0.0 for name in feature_columns}
+    passenger = {"Pclass": 3 , "Name": "Doe, Mr. John" , "Sex": "male" , "Age": 30 , "SibSp": 0 , "Parch": 0 ,
+                 "Ticket": "0" , "Fare": 7.25 , "Cabin": None , "Embarked": "S"}
+    for path , payload in (("/predict/batch" , [record]) , ("/predict/raw" , [passenger])):
+        response = client.post(path , json=payload , environ_base={WARMUP_ENVIRON_KEY: True})
+        if response.status_code != 200:
+            raise ValueError(f"Warm up request to {path} failed with status {response.status_code}")
+
 
-    return render_template("index.html", prediction=prediction)
+warmed_up = False
+if config["serving"]["startup"]["warmup_requests"]:
+    warm_up_routes()
+warmed_up = True
+end_phase("warmup")
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000)
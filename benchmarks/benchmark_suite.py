@@ -0,0 +1,265 @@
+"""
+Scaling benchmarks of the training and serving code on synthetic passengers.
+
+For every size in --rows a synthetic raw frame is generated (benchmarks/synthetic_data.py) and the
+following are timed: save_data / read_data per format, DataProcessor.preprocess_data,
+DataProcessor.handle_imbalance_data, ModelTraining.train_lgbm, single row and batch prediction with
+the compiled and the LightGBM model from artifacts/models, and end-to-end /predict/raw throughput
+against a gunicorn server running application.py. Expensive benchmarks stop at a row limit
+(LIMITS, --limit name=rows). Each result is reported as seconds and rows per second, plus a scaling
+exponent per benchmark (the slope of log time over log rows, 1.0 is linear).
+
+The report is written as JSON. With --baseline, the rows per second of every benchmark and size
+present in both reports are compared and the run exits with status 1 when one is slower than the
+baseline by more than --tolerance (or its --tolerance-for override).
+
+    PYTHONPATH=. python benchmarks/benchmark_suite.py --rows 1000 10000 100000 1000000 --output benchmarks/results/report.json
+    PYTHONPATH=. python benchmarks/benchmark_suite.py --rows 1000 10000 --baseline benchmarks/results/baseline.json --tolerance 0.25
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+from config.paths_config import *
+from src.data_processing import DataProcessor
+from src.feature_transformer import FeatureTransformer
+from src.model_training import ModelTraining
+from src.prediction import get_feature_columns , get_feature_dtype , predict_batch
+from src.tree_inference import CompiledTreeModel
+from utils.common_functions import read_data , save_data
+from benchmarks.synthetic_data import generate_passengers
+from benchmarks.serving_load_test import wait_until_ready
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Largest size each benchmark runs at; single row prediction always scores at most SINGLE_ROWS rows
+LIMITS = {
+    "handle_imbalance_data": 1000000,
+    "train_lgbm": 100000,
+    "http_predict_raw": 100000
+}
+SINGLE_ROWS = 2000
+
+
+def measure(fn , min_seconds=0.2 , max_repeats=5):
+    # Best of a few runs for fast benchmarks, a single run once one takes longer than min_seconds
+    best = None
+    elapsed = 0.0
+    for _ in range(max_repeats):
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best , seconds)
+        elapsed += seconds
+        if elapsed >= min_seconds:
+            break
+    return best
+
+
+class SuiteContext:
+    """Synthetic raw frame of one size and everything derived from it that the benchmarks reuse."""
+
+    def __init__(self , rows , work_dir , seed=0):
+        self.rows = rows
+        self.work_dir = work_dir
+        self.raw = generate_passengers(rows , seed=seed)
+        self.processor = DataProcessor(TRAIN_FILE_PATH , TEST_FILE_PATH , work_dir , CONFIG_PATH)
+        self.processor.transformer = FeatureTransformer().fit(self.raw)
+        selected_features = self.processor.config["data_processing"]["selected_features"]
+        self.processed = self.processor.preprocess_data(self.raw)[selected_features]
+
+        config = self.processor.config
+        self.feature_columns = get_feature_columns(config)
+        self.features = np.ascontiguousarray(self.processed[self.feature_columns].to_numpy(dtype=get_feature_dtype(config)))
+
+
+def load_models():
+    return {
+        "compiled": CompiledTreeModel.load(COMPILED_MODEL_OUTPUT_PATH),
+        "lgbm": joblib.load(MODEL_OUTPUT_PATH)
+    }
+
+
+def io_benchmarks(ctx , formats):
+    results = {}
+    for extension in formats:
+        path = os.path.join(ctx.work_dir , f"raw.{extension}")
+        results[f"save_data[{extension}]"] = measure(lambda: save_data(ctx.raw , path))
+        results[f"read_data[{extension}]"] = measure(lambda: read_data(path))
+    return results
+
+
+def processing_benchmarks(ctx):
+    results = {"preprocess_data": measure(lambda: ctx.processor.preprocess_data(ctx.raw))}
+    if ctx.rows <= LIMITS["handle_imbalance_data"]:
+        results["handle_imbalance_data"] = measure(lambda: ctx.processor.handle_imbalance_data(ctx.processed) , max_repeats=1)
+    if ctx.rows <= LIMITS["train_lgbm"]:
+        training = ModelTraining(PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , MODEL_OUTPUT_PATH)
+        X , y = ctx.processed.drop(columns=["Survived"]) , ctx.processed["Survived"]
+        results["train_lgbm"] = measure(lambda: training.train_lgbm(X , y) , max_repeats=1)
+    return results
+
+
+def prediction_benchmarks(ctx , models):
+    results = {}
+    single = ctx.features[:SINGLE_ROWS]
+    for name , model in models.items():
+        def score_rows():
+            for i in range(len(single)):
+                predict_batch(model , single[i:i + 1])
+        # Normalised to the full size so every benchmark reports the same rows per second unit
+        results[f"predict_single[{name}]"] = measure(score_rows) * ctx.rows / len(single)
+        results[f"predict_batch[{name}]"] = measure(lambda: predict_batch(model , ctx.features))
+    return results
+
+
+class HttpTarget:
+    """A gunicorn server running application.py for the end-to-end benchmark."""
+
+    def __init__(self , port , workers):
+        env = dict(os.environ , GUNICORN_WORKERS=str(workers) , GUNICORN_BIND=f"127.0.0.1:{port}" , PYTHONPATH=ROOT)
+        self.port = port
+        self.server = subprocess.Popen([sys.executable , "-m" , "gunicorn" , "--config" , "gunicorn.conf.py" ,
+                                        "--access-logfile" , "/dev/null" , "application:app"] ,
+                                       cwd=ROOT , env=env , stdout=subprocess.DEVNULL , stderr=subprocess.DEVNULL)
+        wait_until_ready(port)
+
+    def close(self):
+        self.server.send_signal(signal.SIGTERM)
+        self.server.wait(timeout=60)
+
+    def predict_raw(self , raw , batch_rows):
+        # Sequential keep-alive requests of batch_rows passengers each, bodies serialised up front
+        records = raw.drop(columns=["Survived"]).astype(object).where(raw.notna() , None)
+        bodies = [json.dumps(records.iloc[start:start + batch_rows].to_dict(orient="records"))
+                  for start in range(0 , len(records) , batch_rows)]
+        connection = http.client.HTTPConnection("127.0.0.1" , self.port , timeout=60)
+        headers = {"Content-Type": "application/json" , "Connection": "keep-alive"}
+        start = time.perf_counter()
+        for body in bodies:
+            connection.request("POST" , "/predict/raw" , body=body , headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"/predict/raw answered {response.status}")
+        return time.perf_counter() - start
+
+
+def scaling_exponents(results):
+    exponents = {}
+    for name , group in pd.DataFrame(results).groupby("benchmark"):
+        if group["rows"].nunique() > 1:
+            slope = np.polyfit(np.log(group["rows"]) , np.log(group["seconds"]) , 1)[0]
+            exponents[name] = round(float(slope) , 3)
+    return exponents
+
+
+def find_regressions(report , baseline , tolerance , overrides):
+    # A result regresses when its rows per second dropped by more than its tolerance
+    previous = {(entry["benchmark"] , entry["rows"]) : entry["rows_per_s"] for entry in baseline["results"]}
+    regressions = []
+    for entry in report["results"]:
+        key = (entry["benchmark"] , entry["rows"])
+        if key not in previous:
+            continue
+        allowed = overrides.get(entry["benchmark"] , tolerance)
+        slowdown = previous[key] / entry["rows_per_s"] - 1.0
+        if slowdown > allowed:
+            regressions.append({"benchmark": entry["benchmark"] , "rows": entry["rows"] ,
+                                "baseline_rows_per_s": previous[key] , "rows_per_s": entry["rows_per_s"] ,
+                                "slowdown": round(slowdown , 3) , "tolerance": allowed})
+    return regressions
+
+
+def parse_pairs(pairs , cast):
+    parsed = {}
+    for pair in pairs:
+        name , value = pair.split("=" , 1)
+        parsed[name] = cast(value)
+    return parsed
+
+
+def run_suite(sizes , formats , http , http_workers , http_batch_rows , port , seed=0):
+    models = load_models()
+    target = HttpTarget(port , http_workers) if http else None
+    results = []
+    try:
+        for rows in sizes:
+            work_dir = tempfile.mkdtemp(prefix="titanic-bench-")
+            try:
+                ctx = SuiteContext(rows , work_dir , seed=seed)
+                timings = {}
+                timings.update(io_benchmarks(ctx , formats))
+                timings.update(processing_benchmarks(ctx))
+                timings.update(prediction_benchmarks(ctx , models))
+                if target is not None and rows <= LIMITS["http_predict_raw"]:
+                    timings[f"http_predict_raw[batch={http_batch_rows}]"] = target.predict_raw(ctx.raw , http_batch_rows)
+            finally:
+                shutil.rmtree(work_dir , ignore_errors=True)
+
+            for name , seconds in timings.items():
+                results.append({"benchmark": name , "rows": rows , "seconds": round(seconds , 6) ,
+                                "rows_per_s": round(rows / seconds , 1)})
+                print(f"{name:<36} {rows:>10} rows {seconds:>10.4f}s {rows / seconds:>14.0f} rows/s" , flush=True)
+    finally:
+        if target is not None:
+            target.close()
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "environment": {"python": platform.python_version() , "machine": platform.machine() ,
+                        "cpu_count": os.cpu_count() , "numpy": np.__version__ , "pandas": pd.__version__},
+        "results": results,
+        "scaling": scaling_exponents(results)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scaling benchmarks on synthetic passengers")
+    parser.add_argument("--rows" , type=int , nargs="+" , default=[1000 , 10000 , 100000 , 1000000])
+    parser.add_argument("--formats" , nargs="+" , default=["csv"] , help="File formats for save_data / read_data")
+    parser.add_argument("--limit" , nargs="*" , default=[] , metavar="NAME=ROWS" ,
+                        help=f"Override the largest size of a benchmark, defaults {LIMITS}")
+    parser.add_argument("--no-http" , action="store_true" , help="Skip the end-to-end gunicorn benchmark")
+    parser.add_argument("--http-workers" , type=int , default=1)
+    parser.add_argument("--http-batch-rows" , type=int , default=256)
+    parser.add_argument("--port" , type=int , default=5056)
+    parser.add_argument("--seed" , type=int , default=0)
+    parser.add_argument("--output" , default="benchmarks/results/report.json")
+    parser.add_argument("--baseline" , help="Earlier report to compare against")
+    parser.add_argument("--tolerance" , type=float , default=0.25 , help="Allowed slowdown, 0.25 is 25%% fewer rows/s")
+    parser.add_argument("--tolerance-for" , nargs="*" , default=[] , metavar="BENCHMARK=TOLERANCE")
+    args = parser.parse_args()
+
+    LIMITS.update(parse_pairs(args.limit , int))
+    report = run_suite(args.rows , args.formats , not args.no_http , args.http_workers , args.http_batch_rows ,
+                       args.port , seed=args.seed)
+
+    os.makedirs(os.path.dirname(args.output) or "." , exist_ok=True)
+    with open(args.output , "w") as f:
+        json.dump(report , f , indent=2)
+    print(f"\nScaling exponents (1.0 is linear): {json.dumps(report['scaling'] , indent=2)}")
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report , baseline , args.tolerance , parse_pairs(args.tolerance_for , float))
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']} at {regression['rows']} rows: "
+                  f"{regression['rows_per_s']} rows/s vs {regression['baseline_rows_per_s']} "
+                  f"({regression['slowdown']:.0%} slower, {regression['tolerance']:.0%} allowed)")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
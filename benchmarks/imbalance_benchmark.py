@@ -0,0 +1,94 @@
+"""
+Compares the imbalance strategies of DataProcessor on the training split.
+
+For each strategy the balanced training file is written with DataProcessor.balanced_chunks (peak
+traced memory and wall time), then a LightGBM model with fixed parameters is trained on it (wall
+time) and scored on the held-out test split.
+
+    PYTHONPATH=. python benchmarks/imbalance_benchmark.py --scale 200
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.metrics import accuracy_score , precision_score , recall_score , f1_score , roc_auc_score
+from config.paths_config import *
+from src.data_processing import DataProcessor
+from src.feature_transformer import FeatureTransformer
+from src.imbalance import IMBALANCE_STRATEGIES
+from utils.common_functions import read_data , DataChunkWriter
+
+
+def scale_frame(df , scale , seed=0):
+    # Tiles the rows with small noise on the continuous columns to mimic a larger production volume
+    if scale <= 1:
+        return df
+    rng = np.random.default_rng(seed)
+    df = pd.concat([df] * scale , ignore_index=True)
+    for column in ("Age" , "Fare"):
+        df[column] = df[column] * rng.normal(1.0 , 0.02 , size=len(df))
+    return df
+
+
+def run_strategy(strategy , df_train , X_test , y_test , output_dir):
+    processor = DataProcessor(TRAIN_FILE_PATH , TEST_FILE_PATH , output_dir , CONFIG_PATH)
+    processor.imbalance_strategy = strategy
+    output_path = os.path.join(output_dir , f"train_{strategy}.csv")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    with DataChunkWriter(output_path) as writer:
+        for part in processor.balanced_chunks(df_train):
+            writer.write(part)
+    resample_seconds = time.perf_counter() - start
+    _ , resample_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    train = read_data(output_path)
+    start = time.perf_counter()
+    model = lgb.LGBMClassifier(n_estimators=200 , learning_rate=0.05 , num_leaves=31 , random_state=42 , verbosity=-1 ,
+                               class_weight="balanced" if strategy == "class_weight" else None)
+    model.fit(train.drop(columns=["Survived"]) , train["Survived"])
+    train_seconds = time.perf_counter() - start
+
+    proba = model.predict_proba(X_test)[: , 1]
+    predictions = (proba > 0.5).astype(int)
+    return {
+        "strategy": strategy ,
+        "train_rows": len(train) ,
+        "resample_s": round(resample_seconds , 3) ,
+        "resample_peak_mb": round(resample_peak / 2 ** 20 , 1) ,
+        "train_s": round(train_seconds , 3) ,
+        "accuracy": round(accuracy_score(y_test , predictions) , 4) ,
+        "precision": round(precision_score(y_test , predictions , zero_division=0) , 4) ,
+        "recall": round(recall_score(y_test , predictions) , 4) ,
+        "f1": round(f1_score(y_test , predictions) , 4) ,
+        "roc_auc": round(roc_auc_score(y_test , proba) , 4)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the imbalance strategies")
+    parser.add_argument("--scale" , type=int , default=1 , help="Replicate the training split this many times")
+    parser.add_argument("--strategies" , nargs="+" , default=IMBALANCE_STRATEGIES , choices=IMBALANCE_STRATEGIES)
+    args = parser.parse_args()
+
+    df_train = read_data(TRAIN_FILE_PATH)
+    df_test = read_data(TEST_FILE_PATH)
+    transformer = FeatureTransformer().fit(df_train)
+    processor = DataProcessor(TRAIN_FILE_PATH , TEST_FILE_PATH , tempfile.gettempdir() , CONFIG_PATH)
+    selected_features = processor.config["data_processing"]["selected_features"]
+
+    df_train = scale_frame(transformer.transform(df_train)[selected_features] , args.scale)
+    df_test = transformer.transform(df_test)[selected_features]
+    X_test , y_test = df_test.drop(columns=["Survived"]) , df_test["Survived"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for strategy in args.strategies:
+            results.append(run_strategy(strategy , df_train , X_test , y_test , output_dir))
+    print(pd.DataFrame(results).to_string(index=False))
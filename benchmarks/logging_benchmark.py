@@ -0,0 +1,67 @@
+"""
+Per call cost of logger.info on the calling thread for each logging setup.
+
+Every setup runs in a fresh interpreter since src/logger.py configures logging at import. "baseline"
+is the previous configuration: logging.basicConfig with a synchronous FileHandler and a text format.
+Every setup logs from one line in a loop. The "rate limited" setups set LOG_RATE_LIMIT=50 like
+gunicorn.conf.py does for the serving workers (src/logger.py defaults to 0, no limit), so the limiter
+drops most records; the "no rate limit" setups write every record.
+
+    PYTHONPATH=. python benchmarks/logging_benchmark.py --calls 100000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import json , logging , sys , time
+calls = int(sys.argv[1])
+if sys.argv[2] == "baseline":
+    logging.basicConfig(filename=sys.argv[3] , format='%(asctime)s - %(levelname)s - %(message)s' , level=logging.INFO)
+    logger = logging.getLogger("bench")
+    flush = lambda timeout: None
+else:
+    from src.logger import get_logger , flush_logs
+    logger = get_logger("bench")
+    flush = flush_logs
+start = time.perf_counter()
+for i in range(calls):
+    logger.info(f"Scored a batch of {i} rows")
+caller = time.perf_counter() - start
+flush(60)
+total = time.perf_counter() - start
+print(json.dumps({"caller_us": caller / calls * 1e6 , "drained_us": total / calls * 1e6}))
+"""
+
+SETUPS = {
+    "baseline (sync FileHandler, text)": ("baseline" , {}),
+    "sync, json, rate limited": ("logger" , {"LOG_MODE": "sync" , "LOG_RATE_LIMIT": "50"}),
+    "async, json, rate limited": ("logger" , {"LOG_MODE": "async" , "LOG_RATE_LIMIT": "50"}),
+    "async, json, no rate limit": ("logger" , {"LOG_MODE": "async" , "LOG_RATE_LIMIT": "0"}),
+    "async, text, no rate limit": ("logger" , {"LOG_MODE": "async" , "LOG_FORMAT": "text" , "LOG_RATE_LIMIT": "0"}),
+}
+
+
+def run(calls , kind , overrides , log_dir):
+    env = dict(os.environ , PYTHONPATH=ROOT , LOG_DIR=log_dir , LOG_FILE=os.path.join(log_dir , "bench.log") ,
+               LOG_ROTATION="none" , **overrides)
+    output = subprocess.run([sys.executable , "-c" , SNIPPET , str(calls) , kind , os.path.join(log_dir , "bench.log")] ,
+                            env=env , cwd=ROOT , capture_output=True , text=True , check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark logging overhead per call")
+    parser.add_argument("--calls" , type=int , default=100000)
+    args = parser.parse_args()
+
+    print(f"{'setup':<38} {'caller µs/call':>15} {'until written µs/call':>22}")
+    for name , (kind , overrides) in SETUPS.items():
+        with tempfile.TemporaryDirectory() as log_dir:
+            result = run(args.calls , kind , overrides , log_dir)
+        print(f"{name:<38} {result['caller_us']:>15.2f} {result['drained_us']:>22.2f}")
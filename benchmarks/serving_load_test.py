@@ -0,0 +1,113 @@
+"""
+Throughput of the gunicorn deployment for an increasing number of workers.
+
+For every worker count a gunicorn server is started with gunicorn.conf.py, then client processes
+send single passenger requests to /predict/batch over keep-alive connections for a fixed duration.
+Rows are drawn from the processed test split with jittered Age/Fare so the prediction cache does not
+answer them. The clients run on the same machine, keep workers + clients within the core count for
+a fair scaling figure.
+
+    PYTHONPATH=. python benchmarks/serving_load_test.py --workers 1 2 4 --clients 8 --duration 10
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(port , timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1" , port , timeout=1)
+            connection.request("GET" , "/serving/stats")
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become ready in {timeout}s")
+
+
+def client(port , duration , seed , results):
+    rows = pd.read_csv(os.path.join(ROOT , "artifacts/processed/processed_test.csv")).drop(columns=["Survived"])
+    rng = np.random.default_rng(seed)
+    connection = http.client.HTTPConnection("127.0.0.1" , port , timeout=30)
+    headers = {"Content-Type": "application/json" , "Connection": "keep-alive"}
+    latencies = []
+    errors = 0
+
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        record = rows.iloc[int(rng.integers(len(rows)))].to_dict()
+        record["Age"] = float(record["Age"]) + float(rng.random())
+        record["Fare"] = float(record["Fare"]) + float(rng.random())
+        body = json.dumps([record])
+        start = time.perf_counter()
+        try:
+            connection.request("POST" , "/predict/batch" , body=body , headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except (OSError , http.client.HTTPException):
+            errors += 1
+            connection = http.client.HTTPConnection("127.0.0.1" , port , timeout=30)
+        latencies.append(time.perf_counter() - start)
+    results.put((latencies , errors))
+
+
+def run_load(workers , clients , duration , port , threads):
+    env = dict(os.environ , GUNICORN_WORKERS=str(workers) , GUNICORN_THREADS=str(threads) ,
+               GUNICORN_BIND=f"127.0.0.1:{port}" , PYTHONPATH=ROOT)
+    server = subprocess.Popen([sys.executable , "-m" , "gunicorn" , "--config" , "gunicorn.conf.py" ,
+                               "--access-logfile" , "/dev/null" , "application:app"] ,
+                              cwd=ROOT , env=env , stdout=subprocess.DEVNULL , stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        results = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=client , args=(port , duration , seed , results))
+                     for seed in range(clients)]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = np.concatenate([np.asarray(latency) for latency , _ in collected])
+    return {
+        "workers": workers ,
+        "requests": len(latencies) ,
+        "errors": sum(errors for _ , errors in collected) ,
+        "req_per_s": round(len(latencies) / duration , 1) ,
+        "p50_ms": round(float(np.percentile(latencies , 50)) * 1000 , 2) ,
+        "p99_ms": round(float(np.percentile(latencies , 99)) * 1000 , 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the gunicorn deployment")
+    parser.add_argument("--workers" , type=int , nargs="+" , default=[1 , 2 , 4])
+    parser.add_argument("--threads" , type=int , default=1)
+    parser.add_argument("--clients" , type=int , default=8 , help="Concurrent client processes")
+    parser.add_argument("--duration" , type=float , default=10.0 , help="Seconds of load per worker count")
+    parser.add_argument("--port" , type=int , default=5055)
+    args = parser.parse_args()
+
+    results = [run_load(workers , args.clients , args.duration , args.port , args.threads) for workers in args.workers]
+    report = pd.DataFrame(results)
+    baseline = report["req_per_s"].iloc[0] / report["workers"].iloc[0]
+    report["speedup"] = (report["req_per_s"] / baseline).round(2)
+    report["efficiency"] = (report["speedup"] / report["workers"]).round(2)
+    print(report.to_string(index=False))
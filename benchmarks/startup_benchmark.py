@@ -0,0 +1,196 @@
+"""
+Cold start of the serving app, the numbers that decide how fast a new container takes traffic.
+
+Every run starts fresh processes and records:
+  - in a new interpreter running `import application`: the app's own startup phases (imports,
+    model_load, warmup from application.startup_timings), the wall time until the import returned,
+    the latency of the first /predict/batch request through the Flask test client and which heavy
+    modules (pandas, sklearn, mlflow, ...) got imported along the way
+  - unless --no-http: a one worker gunicorn server with gunicorn.conf.py, the time from spawning it
+    until /readyz answers 200 and the latency of the first /predict/batch request over HTTP
+The median of --runs runs is reported per metric and written as JSON for the release (--release,
+`git describe` by default). With --baseline, the run exits with status 1 when a metric is slower
+than the baseline's by more than --tolerance (and by more than ABSOLUTE_SLACK seconds).
+
+    PYTHONPATH=. python benchmarks/startup_benchmark.py --runs 5
+    PYTHONPATH=. python benchmarks/startup_benchmark.py --baseline benchmarks/results/startup-v1.4.0.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the serving app must not import at startup
+HEAVY_MODULES = ["pandas" , "sklearn" , "joblib" , "lightgbm" , "mlflow" , "matplotlib" , "seaborn" , "boto3" ,
+                 "imblearn" , "pyarrow" , "scipy"]
+# Differences below this many seconds are noise, never a regression
+ABSOLUTE_SLACK = 0.005
+
+
+def probe():
+    # Runs in the fresh interpreter, prints one JSON line with its measurements
+    start = time.perf_counter()
+    import application
+    import_seconds = time.perf_counter() - start
+
+    client = application.app.test_client()
+    record = {name : 0.5 for name in application.feature_columns}
+    start = time.perf_counter()
+    response = client.post("/predict/batch" , json=[record])
+    first_request_seconds = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"First request failed with status {response.status_code}")
+
+    print(json.dumps({
+        "import_seconds": import_seconds ,
+        "first_request_seconds": first_request_seconds ,
+        "phases": application.startup_timings ,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules]
+    }))
+
+
+def run_probe():
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable , os.path.abspath(__file__) , "--probe"] , cwd=ROOT , check=True ,
+                            capture_output=True , text=True , env=dict(os.environ , PYTHONPATH=ROOT)).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_seconds"] = time.perf_counter() - start
+    return result
+
+
+def request(port , method , path , body=None):
+    connection = http.client.HTTPConnection("127.0.0.1" , port , timeout=5)
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    connection.request(method , path , body=body , headers=headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+def run_gunicorn(port , feature_columns , timeout=120):
+    env = dict(os.environ , PYTHONPATH=ROOT , GUNICORN_WORKERS="1" , GUNICORN_BIND=f"127.0.0.1:{port}")
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable , "-m" , "gunicorn" , "--config" , "gunicorn.conf.py" , "application:app"] ,
+                              cwd=ROOT , env=env , stdout=subprocess.DEVNULL , stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"gunicorn was not ready after {timeout}s")
+            try:
+                if request(port , "GET" , "/readyz") == 200:
+                    break
+            except OSError:
+                pass
+            time.sleep(0.01)
+        ready_seconds = time.perf_counter() - start
+
+        body = json.dumps([{name : 0.5 for name in feature_columns}])
+        start = time.perf_counter()
+        status = request(port , "POST" , "/predict/batch" , body)
+        first_request_seconds = time.perf_counter() - start
+        if status != 200:
+            raise RuntimeError(f"First HTTP request failed with status {status}")
+        return {"http_ready_seconds": ready_seconds , "http_first_request_seconds": first_request_seconds}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+
+
+def release_name():
+    try:
+        return subprocess.run(["git" , "describe" , "--always" , "--dirty"] , cwd=ROOT , check=True ,
+                              capture_output=True , text=True).stdout.strip()
+    except (OSError , subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(runs , http , port):
+    samples = {}
+    heavy_modules = set()
+    for run in range(runs):
+        result = run_probe()
+        heavy_modules.update(result.pop("heavy_modules"))
+        metrics = {name : value for name , value in result.items() if name != "phases"}
+        metrics.update({f"phase_{name}_seconds" : value for name , value in result["phases"].items()})
+        if http:
+            metrics.update(run_gunicorn(port , feature_columns()))
+        for name , value in metrics.items():
+            samples.setdefault(name , []).append(round(value , 6))
+        print(f"run {run + 1}/{runs}: " + "  ".join(f"{name}={value * 1000:.1f}ms" for name , value in metrics.items()))
+    return {
+        "median": {name : round(statistics.median(values) , 6) for name , values in samples.items()} ,
+        "samples": samples ,
+        "heavy_modules": sorted(heavy_modules)
+    }
+
+
+def feature_columns():
+    # Imported here, not at the top, so the probe's import of application starts from nothing
+    from config.paths_config import CONFIG_PATH
+    from src.prediction import get_feature_columns
+    from utils.common_functions import read_yaml
+    return get_feature_columns(read_yaml(os.path.join(ROOT , CONFIG_PATH)))
+
+
+def find_regressions(report , baseline , tolerance):
+    regressions = []
+    for name , value in report["median"].items():
+        previous = baseline["median"].get(name)
+        if previous is not None and value > previous * (1 + tolerance) and value - previous > ABSOLUTE_SLACK:
+            regressions.append(f"{name}: {previous * 1000:.1f}ms -> {value * 1000:.1f}ms")
+    regressions.extend(f"{name} is imported at startup" for name in report["heavy_modules"]
+                       if name not in baseline.get("heavy_modules" , []))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the serving app")
+    parser.add_argument("--probe" , action="store_true" , help=argparse.SUPPRESS)
+    parser.add_argument("--runs" , type=int , default=5)
+    parser.add_argument("--no-http" , action="store_true" , help="Skip the gunicorn time to ready")
+    parser.add_argument("--port" , type=int , default=5057)
+    parser.add_argument("--release" , help="Release the report is recorded for, defaults to git describe")
+    parser.add_argument("--output" , help="Defaults to benchmarks/results/startup-<release>.json")
+    parser.add_argument("--baseline" , help="Earlier startup report to compare against")
+    parser.add_argument("--tolerance" , type=float , default=0.25 , help="Allowed slowdown, 0.25 is 25%% slower")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.probe:
+        probe()
+        sys.exit(0)
+
+    release = args.release or release_name()
+    report = dict(run_benchmark(args.runs , not args.no_http , args.port) , release=release ,
+                  created=datetime.now().isoformat(timespec="seconds") , python=platform.python_version() ,
+                  platform=platform.platform() , runs=args.runs)
+    output = args.output or os.path.join(ROOT , "benchmarks" , "results" , f"startup-{release}.json")
+    os.makedirs(os.path.dirname(output) , exist_ok=True)
+    with open(output , "w") as f:
+        json.dump(report , f , indent=2)
+    print(f"Median startup of {release}: {json.dumps(report['median'] , indent=2)}")
+    if report["heavy_modules"]:
+        print(f"Heavy modules imported at startup: {report['heavy_modules']}")
+    print(f"Report written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(report , json.load(f) , args.tolerance)
+        if regressions:
+            print("Startup regressions against the baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No startup regressions against the baseline")
@@ -0,0 +1,162 @@
+"""
+Synthetic passengers with the raw.csv schema, at any number of rows.
+
+Column distributions follow the original 891 passengers: class shares, sex by class, log-normal
+fares by class (1.7% free tickets), ages by class and title with 20% missing (more in 3rd class),
+cabins mostly in 1st class with deck letters by class, embarkation port by class, SibSp/Parch
+frequencies, "Surname, Title. Given names" with the rare titles, and survival drawn from the
+class x sex (and child) rates. Generation is vectorised and written in chunks, so 10M+ rows
+need about a chunk's worth of memory.
+
+    PYTHONPATH=. python benchmarks/synthetic_data.py --rows 10000000 --output artifacts/synthetic/raw_10m.csv
+"""
+import argparse
+import os
+import numpy as np
+import pandas as pd
+
+RAW_COLUMNS = ["PassengerId" , "Survived" , "Pclass" , "Name" , "Sex" , "Age" , "SibSp" , "Parch" ,
+               "Ticket" , "Fare" , "Cabin" , "Embarked"]
+
+CLASS_SHARES = {1: 0.242 , 2: 0.207 , 3: 0.551}
+MALE_SHARE = {1: 0.56 , 2: 0.59 , 3: 0.71}
+SURVIVAL = {(1 , "female"): 0.97 , (1 , "male"): 0.37 , (2 , "female"): 0.92 , (2 , "male"): 0.16 ,
+            (3 , "female"): 0.50 , (3 , "male"): 0.14}
+CHILD_SURVIVAL_BOOST = 0.25
+LOG_FARE = {1: (4.18 , 0.72) , 2: (2.93 , 0.49) , 3: (2.42 , 0.57)}
+FREE_FARE_SHARE = 0.017
+AGE = {1: (38.2 , 14.8) , 2: (29.9 , 14.0) , 3: (25.1 , 12.5)}
+AGE_MISSING = {1: 0.14 , 2: 0.06 , 3: 0.28}
+CABIN_SHARE = {1: 0.81 , 2: 0.09 , 3: 0.02}
+CABIN_DECKS = {1: ("ABCDE" , [0.1 , 0.3 , 0.3 , 0.17 , 0.13]) , 2: ("DEF" , [0.25 , 0.25 , 0.5]) ,
+               3: ("EFG" , [0.25 , 0.4 , 0.35])}
+EMBARKED = {1: (["S" , "C" , "Q"] , [0.59 , 0.40 , 0.01]) , 2: (["S" , "C" , "Q"] , [0.89 , 0.09 , 0.02]) ,
+            3: (["S" , "C" , "Q"] , [0.72 , 0.13 , 0.15])}
+EMBARKED_MISSING = 0.002
+SIBSP = ([0 , 1 , 2 , 3 , 4 , 5 , 8] , [0.682 , 0.235 , 0.031 , 0.018 , 0.020 , 0.006 , 0.008])
+PARCH = ([0 , 1 , 2 , 3 , 4 , 5 , 6] , [0.761 , 0.132 , 0.090 , 0.006 , 0.004 , 0.006 , 0.001])
+RARE_MALE_TITLES = (["Dr" , "Rev" , "Col" , "Major" , "Capt" , "Sir" , "Don" , "Jonkheer"] , 0.022)
+RARE_FEMALE_TITLES = (["Ms" , "Mlle" , "Mme" , "Lady" , "Countess" , "Dr"] , 0.02)
+TICKET_PREFIXES = ["" , "" , "" , "" , "PC " , "A/5 " , "C.A. " , "STON/O2. " , "SC/PARIS " , "W./C. " , "SOTON/O.Q. "]
+
+SURNAMES = ["Andersson" , "Sage" , "Johnson" , "Goodwin" , "Carter" , "Panula" , "Skoog" , "Rice" , "Brown" ,
+            "Smith" , "Baclini" , "Fortune" , "Asplund" , "Kelly" , "Williams" , "Harper" , "Hart" , "Allison" ,
+            "Davies" , "Ford" , "Jussila" , "Lefebre" , "Palsson" , "Richards" , "Boulos" , "Moran" , "Taussig" ,
+            "Olsen" , "Navratil" , "Graham" , "Hocking" , "Becker" , "Collyer" , "Dean" , "Elias" , "Hickman" ,
+            "Laroche" , "Newell" , "Quick" , "West" , "Wick" , "Thayer" , "Strom" , "Frolicher" , "Barbara"]
+MALE_NAMES = ["William" , "John" , "Charles" , "George" , "James" , "Thomas" , "Henry" , "Edward" , "Frederick" ,
+              "Arthur" , "Joseph" , "Albert" , "Karl" , "Johan" , "Patrick" , "Owen Harris" , "Leo" , "Nils"]
+FEMALE_NAMES = ["Mary" , "Anna" , "Elizabeth" , "Margaret" , "Alice" , "Helen" , "Ellen" , "Bertha" , "Maria" ,
+                "Edith" , "Laina" , "Florence" , "Emily" , "Kate" , "Hilda" , "Augusta" , "Agnes" , "Sofia"]
+
+
+def _choice(rng , values , probabilities , size):
+    probabilities = np.asarray(probabilities , dtype=float)
+    return np.asarray(values , dtype=object)[rng.choice(len(values) , size=size , p=probabilities / probabilities.sum())]
+
+
+def _by_class(pclass , fn):
+    # fn(class, mask) fills the rows of one class at a time
+    for value in (1 , 2 , 3):
+        mask = pclass == value
+        if mask.any():
+            fn(value , mask)
+
+
+def generate_passengers(n_rows , seed=0 , start_id=1):
+    rng = np.random.default_rng(seed)
+    pclass = np.asarray(list(CLASS_SHARES))[rng.choice(3 , size=n_rows , p=list(CLASS_SHARES.values()))]
+
+    male = np.zeros(n_rows , dtype=bool)
+    age = np.empty(n_rows)
+    fare = np.empty(n_rows)
+    has_cabin = np.zeros(n_rows , dtype=bool)
+    embarked = np.empty(n_rows , dtype=object)
+    deck = np.empty(n_rows , dtype=object)
+
+    def fill(value , mask):
+        size = int(mask.sum())
+        male[mask] = rng.random(size) < MALE_SHARE[value]
+        mean , std = AGE[value]
+        age[mask] = np.clip(rng.normal(mean , std , size) , 0.42 , 80)
+        log_mean , log_std = LOG_FARE[value]
+        fare[mask] = np.exp(rng.normal(log_mean , log_std , size))
+        has_cabin[mask] = rng.random(size) < CABIN_SHARE[value]
+        embarked[mask] = _choice(rng , *EMBARKED[value] , size)
+        letters , weights = CABIN_DECKS[value]
+        deck[mask] = _choice(rng , list(letters) , weights , size)
+    _by_class(pclass , fill)
+
+    # Titles follow sex and age, children are Master / Miss
+    child = age < 13
+    title = np.where(male , np.where(child , "Master" , "Mr") ,
+                     np.where(child | (rng.random(n_rows) < 0.45) , "Miss" , "Mrs")).astype(object)
+    rare_male = male & ~child & (rng.random(n_rows) < RARE_MALE_TITLES[1])
+    title[rare_male] = _choice(rng , RARE_MALE_TITLES[0] , np.ones(len(RARE_MALE_TITLES[0])) , int(rare_male.sum()))
+    rare_female = ~male & ~child & (rng.random(n_rows) < RARE_FEMALE_TITLES[1])
+    title[rare_female] = _choice(rng , RARE_FEMALE_TITLES[0] , np.ones(len(RARE_FEMALE_TITLES[0])) , int(rare_female.sum()))
+    age[title == "Mrs"] = np.maximum(age[title == "Mrs"] , 18)
+
+    surname = _choice(rng , SURNAMES , np.ones(len(SURNAMES)) , n_rows)
+    given = np.where(male , _choice(rng , MALE_NAMES , np.ones(len(MALE_NAMES)) , n_rows) ,
+                     _choice(rng , FEMALE_NAMES , np.ones(len(FEMALE_NAMES)) , n_rows))
+    name = pd.Series(surname) + ", " + pd.Series(title) + ". " + pd.Series(given)
+    married = title == "Mrs"
+    name[married] = name[married] + " (" + pd.Series(_choice(rng , FEMALE_NAMES , np.ones(len(FEMALE_NAMES)) , n_rows))[married] + ")"
+
+    sex = np.where(male , "male" , "female")
+    rate = np.empty(n_rows)
+    for (value , sex_value) , survival in SURVIVAL.items():
+        rate[(pclass == value) & (sex == sex_value)] = survival
+    rate = np.where(child , np.minimum(rate + CHILD_SURVIVAL_BOOST , 1.0) , rate)
+    survived = (rng.random(n_rows) < rate).astype(np.int64)
+
+    fare[rng.random(n_rows) < FREE_FARE_SHARE] = 0.0
+    age_missing = np.zeros(n_rows , dtype=bool)
+    _by_class(pclass , lambda value , mask: age_missing.__setitem__(mask , rng.random(int(mask.sum())) < AGE_MISSING[value]))
+    embarked[rng.random(n_rows) < EMBARKED_MISSING] = None
+
+    cabin = pd.Series(deck) + pd.Series(rng.integers(1 , 149 , n_rows).astype(str))
+    second_cabin = has_cabin & (rng.random(n_rows) < 0.05)
+    cabin[second_cabin] = cabin[second_cabin] + " " + pd.Series(deck)[second_cabin] + pd.Series(rng.integers(1 , 149 , n_rows).astype(str))[second_cabin]
+    ticket = pd.Series(_choice(rng , TICKET_PREFIXES , np.ones(len(TICKET_PREFIXES)) , n_rows)) + pd.Series(rng.integers(1000 , 3999999 , n_rows).astype(str))
+
+    return pd.DataFrame({
+        "PassengerId": np.arange(start_id , start_id + n_rows),
+        "Survived": survived,
+        "Pclass": pclass,
+        "Name": name,
+        "Sex": sex,
+        "Age": np.where(age_missing , np.nan , np.round(age , 0)),
+        "SibSp": _choice(rng , *SIBSP , n_rows).astype(np.int64),
+        "Parch": _choice(rng , *PARCH , n_rows).astype(np.int64),
+        "Ticket": ticket,
+        "Fare": np.round(fare , 4),
+        "Cabin": cabin.where(has_cabin),
+        "Embarked": embarked
+    } , columns=RAW_COLUMNS)
+
+
+def write_passengers(path , n_rows , seed=0 , chunk_rows=500000):
+    # Chunk by chunk, each with its own seed and consecutive PassengerIds
+    os.makedirs(os.path.dirname(path) or "." , exist_ok=True)
+    written = 0
+    with open(path , "w" , newline="") as f:
+        while written < n_rows:
+            size = min(chunk_rows , n_rows - written)
+            chunk = generate_passengers(size , seed=seed + written , start_id=written + 1)
+            chunk.to_csv(f , index=False , header=written == 0)
+            written += size
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic passengers with the raw.csv schema")
+    parser.add_argument("--rows" , type=int , default=100000)
+    parser.add_argument("--output" , default="artifacts/synthetic/raw.csv")
+    parser.add_argument("--seed" , type=int , default=0)
+    parser.add_argument("--chunk-rows" , type=int , default=500000)
+    args = parser.parse_args()
+
+    write_passengers(args.output , args.rows , seed=args.seed , chunk_rows=args.chunk_rows)
+    print(f"Wrote {args.rows} passengers to {args.output}")
@@ -16,4 +16,26 @@ RANDOM_SEARCH_PARAMS = {
     "verbose":2,
     "random_state":42,
     "scoring":'accuracy'
-    }
\ No newline at end of file
+    }
+
+
+# "random" runs RandomizedSearchCV above, "halving" runs the budget aware successive halving search
+SEARCH_STRATEGY = "random"
+
+HALVING_SEARCH_PARAMS = {
+    "n_candidates" : 300 ,          # configurations sampled from LIGHTGM_PARAMS
+    "min_rounds" : 25 ,             # boosting rounds of the first rung
+    "max_rounds" : 500 ,
+    "eta" : 3 ,                     # keep the best 1/eta of the candidates per rung
+    "early_stopping_rounds" : 20 ,
+    "time_budget_seconds" : 120 ,   # None for no wall clock limit
+    "cpu_budget_seconds" : None     # None for no CPU time limit
+    }
+
+
+# ModelTraining.run_incremental: continue boosting the deployed model on new rows only
+INCREMENTAL_TRAINING_PARAMS = {
+    "boost_rounds" : 50 ,           # trees added on top of the deployed model
+    "metric" : "accuracy" ,         # held-out metric compared with the deployed model's
+    "max_degradation" : 0.01        # fall back to a full search when the metric drops by more than this
+    }
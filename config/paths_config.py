@@ -1,24 +1,43 @@
 import os
 
 ########################################## DATA INGESTION ##########################################
+# Format of the files written between pipeline stages : "csv", "parquet" or "feather"
+RAW_DATA_FORMAT = "csv"
+
 RAW_DIR = "artifacts/raw"
 RAW_FILE_PATH = os.path.join(RAW_DIR , "raw.csv")
-TRAIN_FILE_PATH = os.path.join(RAW_DIR , "train.csv")
-TEST_FILE_PATH = os.path.join(RAW_DIR , "test.csv")
+TRAIN_FILE_PATH = os.path.join(RAW_DIR , f"train.{RAW_DATA_FORMAT}")
+TEST_FILE_PATH = os.path.join(RAW_DIR , f"test.{RAW_DATA_FORMAT}")
 
 
 CONFIG_PATH = "config/config.yaml"
 
+# Per stage manifests used to skip stages whose inputs did not change
+MANIFEST_DIR = "artifacts/manifests"
+
+# Per run stage timings, memory and cProfile output of `training_pipeline.py --profile`
+PROFILE_DIR = "artifacts/profiles"
+
 
 ########################################## DATA PROCESSING ##########################################
 
+# "npy" stores the numeric feature matrix as a raw array that model training memory maps
+PROCESSED_DATA_FORMAT = "csv"
+
 PROCESSED_DIR = "artifacts/processed"
-PROCESSED_TRAIN_DATA_PATH = os.path.join(PROCESSED_DIR , "processed_train.csv")
-PROCESSED_TEST_DATA_PATH = os.path.join(PROCESSED_DIR , "processed_test.csv")
+PROCESSED_TRAIN_DATA_PATH = os.path.join(PROCESSED_DIR , f"processed_train.{PROCESSED_DATA_FORMAT}")
+PROCESSED_TEST_DATA_PATH = os.path.join(PROCESSED_DIR , f"processed_test.{PROCESSED_DATA_FORMAT}")
  
 
 
 ########################################## MODEL TRAINING ##########################################
 MODEL_OUTPUT_PATH = "artifacts/models/lgbm_model.pkl"
+COMPILED_MODEL_OUTPUT_PATH = "artifacts/models/lgbm_model.npz"
+# LightGBM's own text dump of the booster, /explain loads it without unpickling the sklearn estimator
+BOOSTER_OUTPUT_PATH = "artifacts/models/lgbm_model.txt"
+FEATURE_TRANSFORMER_PATH = "artifacts/models/feature_transformer.json"
+
+# Versioned copies of the model files, <dir>/<version>/ plus manifest.json with the active version
+MODEL_REGISTRY_DIR = "artifacts/models/registry"
 
 
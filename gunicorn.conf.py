@@ -0,0 +1,57 @@
+"""
+Gunicorn settings for serving application.py with several worker processes.
+
+The app (model, feature transformer, config) is imported once in the master with preload_app and
+the workers are forked from it, so they share the model pages copy-on-write instead of each loading
+their own copy. Settings come from serving.gunicorn in config/config.yaml, GUNICORN_* environment
+variables override them.
+
+    gunicorn --config gunicorn.conf.py application:app
+
+Graceful restarts: SIGHUP replaces the workers after they finish their in-flight requests, SIGUSR2
+followed by SIGWINCH/SIGQUIT to the old master re-executes the master too, which picks up new code
+and a new model.
+"""
+import gc
+import os
+import yaml
+
+# Every worker is a full core already, one OpenMP thread each avoids oversubscription when the
+# sklearn backend is used. Must be set before the app (and LightGBM) is imported.
+os.environ.setdefault("OMP_NUM_THREADS" , "1")
+# Per call site limit on INFO records, so a hot request path cannot flood the log; off in the pipeline
+os.environ.setdefault("LOG_RATE_LIMIT" , "50")
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)) , "config" , "config.yaml")) as config_file:
+    serving_config = yaml.safe_load(config_file)["serving"].get("gunicorn" , {})
+
+
+def _setting(name , default , cast=int):
+    value = os.environ.get(f"GUNICORN_{name.upper()}")
+    if value is None:
+        value = serving_config.get(name)
+    return default if value is None else cast(value)
+
+
+bind = _setting("bind" , "0.0.0.0:5000" , cast=str)
+workers = _setting("workers" , os.cpu_count() or 1)
+threads = _setting("threads" , 1)
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = _setting("timeout" , 30)
+graceful_timeout = _setting("graceful_timeout" , 30)
+keepalive = _setting("keepalive" , 5)
+max_requests = _setting("max_requests" , 0)
+max_requests_jitter = _setting("max_requests_jitter" , 0)
+
+preload_app = True
+accesslog = "-"
+
+
+def pre_fork(server , worker):
+    # Moves everything the master allocated (model arrays, modules) out of the collector's reach, so
+    # garbage collection in the workers does not touch and un-share those pages
+    gc.freeze()
+
+
+def post_fork(server , worker):
+    server.log.info(f"Worker {worker.pid} forked with {threads} thread(s), shared objects frozen: {gc.get_freeze_count()}")
@@ -0,0 +1,48 @@
+"""
+Scores a CSV/Parquet file of raw passengers (the raw.csv columns, Survived optional) in parallel chunks
+and writes PassengerId, prediction and probability in input order.
+
+    python pipeline/batch_scoring.py --input archive/passengers.parquet --output scores/passengers.parquet --workers 8
+"""
+import argparse
+import os
+import sys
+
+# Every worker is a full core already, one OpenMP thread each avoids oversubscription when the
+# sklearn backend is used. Must be set before LightGBM is imported.
+os.environ.setdefault("OMP_NUM_THREADS" , "1")
+
+from src.batch_scoring import BatchScorer
+from src.logger import get_logger
+from config.paths_config import *
+from utils.common_functions import read_yaml
+
+logger = get_logger(__name__)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Titanic batch scoring")
+    parser.add_argument("--input" , required=True , help="CSV or Parquet file of raw passengers")
+    parser.add_argument("--output" , required=True , help="CSV or Parquet file for the predictions")
+    parser.add_argument("--workers" , type=int , help="Scoring processes (batch_scoring.workers)")
+    parser.add_argument("--chunk-size" , type=int , help="Rows per chunk (batch_scoring.chunk_size)")
+    parser.add_argument("--backend" , choices=["compiled" , "sklearn"] , help="Model files to score with")
+    parser.add_argument("--model-dir" , help="Directory with the model files, defaults to the active registry version")
+    return parser.parse_args()
+
+
+def report_progress(stats):
+    print(f"\r{stats['rows']:>12} rows  {stats['chunks']:>6} chunks  {stats['rows_per_s']:>12.0f} rows/s" ,
+          end="" , file=sys.stderr , flush=True)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = read_yaml(CONFIG_PATH)
+
+    scorer = BatchScorer(config , model_dir=args.model_dir , backend=args.backend , workers=args.workers ,
+                         chunk_size=args.chunk_size)
+    stats = scorer.run(args.input , args.output , progress=report_progress)
+    print(file=sys.stderr)
+    print(f"Scored {stats['rows']} rows with model version {stats['model_version']} in {stats['seconds']}s "
+          f"({stats['rows_per_s']:.0f} rows/s) -> {stats['output']}")
@@ -1,21 +1,118 @@
+import argparse
 from src.data_ingestion import DataIngestion
 from src.data_processing import DataProcessor
 from src.model_training import ModelTraining
+from src.stage_cache import StageCache , hash_file , hash_sources , imported_sources
+from src.profiling import StageProfiler , profile_stage
+from src.logger import get_logger
 from config.paths_config import *
+from config.model_params import *
 from utils.common_functions import read_yaml
 
+logger = get_logger(__name__)
+
+STAGES = ["ingestion" , "processing" , "training"]
+
+# Entry modules of each stage; they and every src/utils/config module they import, directly or not,
+# are the source files whose changes invalidate the stage
+STAGE_MODULES = {
+    "ingestion": ["src/data_ingestion.py"],
+    "processing": ["src/data_processing.py"],
+    "training": ["src/model_training.py"]
+}
+# Logging, errors and profiling do not change what a stage produces
+UNTRACKED_SOURCES = ["src/logger.py" , "src/custom_exception.py" , "src/profiling.py"]
+STAGE_SOURCES = {stage : imported_sources(paths , ignored=UNTRACKED_SOURCES) for stage , paths in STAGE_MODULES.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Titanic training pipeline")
+    parser.add_argument("--force" , action="append" , default=[] , choices=STAGES + ["all"] ,
+                        help="Re-run a stage even if its outputs are up to date (repeatable)")
+    parser.add_argument("--profile" , action="store_true" ,
+                        help=f"Record time and memory per stage into {PROFILE_DIR}/<run>/report.json and MLflow")
+    parser.add_argument("--cprofile" , action="store_true" ,
+                        help="With --profile, also capture a cProfile of every top level stage")
+    parser.add_argument("--incremental" , metavar="NEW_PASSENGERS" ,
+                        help="Continue training the deployed model on this file of new raw passengers")
+    return parser.parse_args()
+
+
+def run_stages(config , cache , forced):
+    summary = {}
 
-if __name__ == "__main__":
-    
     ### 1. Data ingestion
-    data_ingestion = DataIngestion(read_yaml(CONFIG_PATH))
-    data_ingestion.run()
+    data_ingestion = DataIngestion(config)
+    with profile_stage("ingestion"):
+        summary["ingestion"] = cache.run(
+            "ingestion" ,
+            inputs={
+                "source": data_ingestion.get_source_fingerprint(),
+                "config": config["data_ingestion"],
+                "code": hash_sources(STAGE_SOURCES["ingestion"])
+            } ,
+            outputs=[TRAIN_FILE_PATH , TEST_FILE_PATH] ,
+            fn=data_ingestion.run ,
+            force="ingestion" in forced
+        )
 
     ### 2. Data preprocessing
     data_processor = DataProcessor(TRAIN_FILE_PATH ,TEST_FILE_PATH , PROCESSED_DIR , CONFIG_PATH )
-    data_processor.process()
-
+    with profile_stage("processing"):
+        summary["processing"] = cache.run(
+            "processing" ,
+            inputs={
+                "data": {path : hash_file(path) for path in [TRAIN_FILE_PATH , TEST_FILE_PATH]},
+                "config": config["data_processing"],
+                "code": hash_sources(STAGE_SOURCES["processing"])
+            } ,
+            outputs=[PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , FEATURE_TRANSFORMER_PATH] ,
+            fn=data_processor.process ,
+            force="processing" in forced
+        )
 
     ### 3. Model Training
     model_training = ModelTraining(PROCESSED_TRAIN_DATA_PATH ,PROCESSED_TEST_DATA_PATH ,MODEL_OUTPUT_PATH)
-    model_training.run()
\ No newline at end of file
+    with profile_stage("training"):
+        summary["training"] = cache.run(
+            "training" ,
+            inputs={
+                "data": {path : hash_file(path) for path in [PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH]},
+                "params": {"distributions": LIGHTGM_PARAMS , "search": RANDOM_SEARCH_PARAMS ,
+                           "imbalance_strategy": config["data_processing"].get("imbalance_strategy" , "smote")},
+                "code": hash_sources(STAGE_SOURCES["training"])
+            } ,
+            outputs=[MODEL_OUTPUT_PATH , COMPILED_MODEL_OUTPUT_PATH , BOOSTER_OUTPUT_PATH] ,
+            fn=model_training.run ,
+            force="training" in forced
+        )
+
+    return summary , model_training
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    forced = set(STAGES) if "all" in args.force else set(args.force)
+
+    config = read_yaml(CONFIG_PATH)
+    cache = StageCache(MANIFEST_DIR)
+    profiler = StageProfiler(PROFILE_DIR , cprofile=args.cprofile).activate() if args.profile else None
+
+    if args.incremental:
+        # Warm start from the deployed model on the new passengers only, ingestion and processing are skipped
+        model_training = ModelTraining(PROCESSED_TRAIN_DATA_PATH ,PROCESSED_TEST_DATA_PATH ,MODEL_OUTPUT_PATH)
+        with profile_stage("training"):
+            summary = {"training": model_training.run_incremental(args.incremental)}
+    else:
+        summary , model_training = run_stages(config , cache , forced)
+
+    for stage in summary:
+        logger.info(f"Stage {stage} : {summary[stage]}")
+
+    if profiler is not None:
+        profiler.deactivate()
+        # Into the training run, or a run of its own when training was skipped as up to date
+        profiler.log_to_mlflow(run_id=model_training.run_id)
+        for entry in profiler.stages:
+            logger.info(f"Profile {entry['stage']:<32} {entry['wall_s']:>9.3f}s wall {entry['cpu_s']:>9.3f}s CPU "
+                        f"{entry['tracemalloc_peak_mb']:>9.1f} MB traced {entry['max_rss_mb']:>9.1f} MB max RSS")
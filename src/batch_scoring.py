@@ -0,0 +1,161 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import *
+from src.feature_transformer import FeatureTransformer
+from src.model_registry import ModelRegistry , UNVERSIONED , version_file
+from src.prediction import get_feature_columns , get_feature_dtype , predict_batch
+from src.tree_inference import CompiledTreeModel
+from utils.common_functions import read_data_chunks , DataChunkWriter
+
+logger = get_logger(__name__)
+
+# The ChunkScorer of a pool worker, created once by the pool initializer
+_worker_scorer = None
+
+
+class ChunkScorer:
+    """
+    Scores raw passenger chunks with the training feature engineering and one loaded model.
+
+    Features are built with the FeatureTransformer published with the model version and the dtype plan
+    of data_processing, then cast to the matrix dtype the model was trained on, exactly as
+    DataProcessor and ModelTraining do.
+    """
+
+    def __init__(self , model_dir , backend , feature_columns , feature_dtypes , feature_dtype , id_column):
+        if backend == "compiled":
+            self.model = CompiledTreeModel.load(os.path.join(model_dir , os.path.basename(COMPILED_MODEL_OUTPUT_PATH)))
+        else:
+            self.model = joblib.load(os.path.join(model_dir , os.path.basename(MODEL_OUTPUT_PATH)))
+        self.transformer = FeatureTransformer.load(version_file(model_dir , FEATURE_TRANSFORMER_PATH))
+        self.feature_columns = feature_columns
+        self.feature_dtypes = {name : feature_dtypes[name] for name in feature_columns} if feature_dtypes else None
+        self.feature_dtype = feature_dtype
+        self.id_column = id_column
+
+    def features(self , chunk):
+        if self.feature_dtypes:
+            frame = self.transformer.transform_features(chunk , self.feature_dtypes)
+        else:
+            frame = self.transformer.transform(chunk)[self.feature_columns]
+        return np.ascontiguousarray(frame[self.feature_columns].to_numpy(dtype=self.feature_dtype))
+
+    def score(self , offset , chunk):
+        predictions , probabilities = predict_batch(self.model , self.features(chunk))
+        # Rows are identified by id_column, or by their position in the input when it has none
+        if self.id_column in chunk.columns:
+            ids = chunk[self.id_column].to_numpy()
+        else:
+            ids = np.arange(offset , offset + len(chunk))
+        return pd.DataFrame({self.id_column if self.id_column in chunk.columns else "row": ids ,
+                             "prediction": predictions , "probability": probabilities})
+
+
+def _init_worker(settings):
+    global _worker_scorer
+    _worker_scorer = ChunkScorer(**settings)
+
+
+def _score_chunk(offset , chunk):
+    return _worker_scorer.score(offset , chunk)
+
+
+class BatchScorer:
+    """
+    Offline scoring of a CSV/Parquet file of raw passengers, chunk by chunk.
+
+    Chunks are read in the parent and scored by a pool of processes that each load the model once;
+    at most max_pending_chunks per worker are in flight, so memory stays bounded by the chunk size.
+    Results are written in input order to a temporary file renamed over output_path at the end, so
+    readers never see a partial output. With one worker chunks are scored in process.
+    """
+
+    def __init__(self , config , model_dir=None , backend=None , workers=None , chunk_size=None):
+        scoring_config = config.get("batch_scoring" , {})
+        self.chunk_size = chunk_size or scoring_config.get("chunk_size" , 50000)
+        self.workers = workers or scoring_config.get("workers") or os.cpu_count()
+        self.max_pending = self.workers * scoring_config.get("max_pending_chunks" , 2)
+        self.backend = backend or scoring_config.get("model_backend" , "sklearn")
+        self.id_column = scoring_config.get("id_column" , "PassengerId")
+        self.version , self.model_dir = self.resolve_model(model_dir)
+
+        self.settings = {
+            "model_dir": self.model_dir,
+            "backend": self.backend,
+            "feature_columns": get_feature_columns(config),
+            "feature_dtypes": config["data_processing"].get("feature_dtypes"),
+            "feature_dtype": get_feature_dtype(config),
+            "id_column": self.id_column
+        }
+
+    def resolve_model(self , model_dir):
+        # An explicit directory, else the registry's active version, else the plain model files
+        if model_dir is not None:
+            return UNVERSIONED , model_dir
+        active = ModelRegistry(MODEL_REGISTRY_DIR).manifest()["active"]
+        if active is not None:
+            return active , ModelRegistry(MODEL_REGISTRY_DIR).version_dir(active)
+        return UNVERSIONED , os.path.dirname(MODEL_OUTPUT_PATH)
+
+    def _chunks(self , input_path):
+        offset = 0
+        for chunk in read_data_chunks(input_path , self.chunk_size):
+            yield offset , chunk
+            offset += len(chunk)
+
+    def _scored_chunks(self , input_path):
+        if self.workers == 1:
+            scorer = ChunkScorer(**self.settings)
+            for offset , chunk in self._chunks(input_path):
+                yield scorer.score(offset , chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers , initializer=_init_worker , initargs=(self.settings ,)) as pool:
+            pending = deque()
+            for offset , chunk in self._chunks(input_path):
+                pending.append(pool.submit(_score_chunk , offset , chunk))
+                if len(pending) >= self.max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def run(self , input_path , output_path , progress=None):
+        # progress(stats) is called after every written chunk with rows, seconds and rows_per_s so far
+        root , extension = os.path.splitext(output_path)
+        partial_path = f"{root}.partial{extension}"
+        try:
+            logger.info(f"Scoring {input_path} with model version {self.version} ({self.backend}) , "
+                        f"{self.workers} workers , chunks of {self.chunk_size} rows")
+            start = time.perf_counter()
+            stats = {"rows": 0 , "chunks": 0}
+            with DataChunkWriter(partial_path) as writer:
+                for scored in self._scored_chunks(input_path):
+                    writer.write(scored)
+                    seconds = time.perf_counter() - start
+                    stats.update(rows=writer.rows , chunks=stats["chunks"] + 1 , seconds=round(seconds , 3) ,
+                                 rows_per_s=round(writer.rows / seconds , 1))
+                    logger.info(f"Scored {stats['rows']} rows in {stats['chunks']} chunks , {stats['rows_per_s']} rows/s")
+                    if progress is not None:
+                        progress(dict(stats))
+            if stats["rows"] == 0:
+                raise ValueError(f"No rows to score in {input_path}")
+            os.replace(partial_path , output_path)
+
+            stats.update(model_version=self.version , output=output_path)
+            logger.info(f"Batch scoring completed : {stats}")
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error while batch scoring {input_path} {e}")
+            raise CustomException("Failed to batch score file" , e)
+
+        finally:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
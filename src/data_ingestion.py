@@ -1,15 +1,28 @@
+import csv
+import hashlib
+import io
 import os
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from config.paths_config import *
-from utils.common_functions import read_yaml
-import boto3
+from utils.common_functions import read_yaml , read_data , save_data
+from src.object_store import create_object_store , ParallelDownloader , ChunkStream , concat_csv , iter_file
+from src.profiling import profile_stage
 
 
 logger = get_logger(__name__)
 
+HASH_SPACE = float(1 << 64)
+
+
+def hash_fraction(value , salt=""):
+    # Stable position of a key in [0, 1), the same on every machine and every run
+    digest = hashlib.blake2b(f"{salt}:{value}".encode() , digest_size=8).digest()
+    return int.from_bytes(digest , "big") / HASH_SPACE
+
+
 class DataIngestion:
     def __init__(self , config):
         self.config = config["data_ingestion"]
@@ -17,50 +30,161 @@ class DataIngestion:
         self.file_name = self.config["file_name"]
         self.train_ratio = self.config["train_ratio"]
 
+        # Every object under prefix is ingested when it is set, otherwise only file_name
+        self.prefix = self.config.get("prefix")
+        self.stream_split = self.config.get("stream_split" , False)
+
+        # "random" uses train_test_split, "hash" assigns rows by a hash of split_key in one streaming pass
+        self.split_mode = self.config.get("split_mode" , "random")
+        self.split_key = self.config.get("split_key" , "PassengerId")
+        self.random_state = self.config.get("random_state" , 42)
+
+        self.raw_file_path = RAW_FILE_PATH
+        self.train_file_path = TRAIN_FILE_PATH
+        self.test_file_path = TEST_FILE_PATH
 
         os.makedirs(RAW_DIR , exist_ok=True)
         logger.info(f"Data ingestions started with {self.bucket_name} with {self.file_name}")
 
 
 
-    def download_csv_from_aws(self):
+    def get_object_store(self):
+        return create_object_store(self.config)
+
+
+    def get_downloader(self):
+        return ParallelDownloader(
+            self.get_object_store() ,
+            part_size=int(self.config.get("part_size_mb" , 8) * 1024 * 1024) ,
+            max_workers=self.config.get("max_workers" , 8) ,
+            verify_checksum=self.config.get("verify_checksum" , True)
+        )
+
+
+    def get_source_keys(self , store):
+        return store.list(self.prefix) if self.prefix else [self.file_name]
+
+
+    def get_source_fingerprint(self):
+        # ETag and size identify the object versions without downloading them
         try:
+            store = self.get_object_store()
+            return {key : store.head(key) for key in self.get_source_keys(store)}
+
+        except Exception as e :
+            logger.error("Error while reading source object metadata")
+            raise CustomException("Failed to read source object metadata" , e)
+
 
-            client = boto3.client('s3')
-            client.download_file(self.bucket_name , self.file_name , RAW_FILE_PATH)
-            logger.info(f"Raw file is successfully downloaded to {RAW_FILE_PATH}")
+    def download_csv_from_aws(self):
+        try:
+            downloader = self.get_downloader()
+            if not self.prefix:
+                downloader.download(self.file_name , self.raw_file_path)
+            else:
+                parts = downloader.download_prefix(self.prefix , os.path.join(RAW_DIR , "parts"))
+                # Objects are concatenated into one raw file, keeping only the first header
+                with open(self.raw_file_path , "wb") as raw_file:
+                    for block in concat_csv(iter_file(part) for part in parts):
+                        raw_file.write(block)
+                for part in parts:
+                    os.remove(part)
+            logger.info(f"Raw file is successfully downloaded to {self.raw_file_path}")
 
 
         except Exception as e :
 
             logger.error("Error while Downloading csv file")
             raise CustomException("Failed to Download csv" , e)
+
+
+    def open_source_stream(self):
+        # Byte stream over the source objects, fetched with concurrent ranged GETs and never written to disk
+        downloader = self.get_downloader()
+        keys = self.get_source_keys(downloader.store)
+
+        chunks = concat_csv(downloader.iter_bytes(key) for key in keys)
+        return io.BufferedReader(ChunkStream(chunks) , buffer_size=1 << 20)
         
 
-    def split_data(self):
+    def split_data(self , source=None):
+        if self.split_mode == "hash":
+            return self.split_data_hashed(source)
         try : 
             logger.info("Start the splitting process")
-            data = pd.read_csv(RAW_FILE_PATH)
+            data = pd.read_csv(source) if source is not None else read_data(self.raw_file_path)
             X = data.drop(columns='Survived')
             y = data["Survived"]
-            train_data, test_data = train_test_split(data , train_size= self.train_ratio , stratify=y)  
+            train_data, test_data = train_test_split(data , train_size= self.train_ratio , stratify=y ,
+                                                     random_state=self.random_state)  
 
-            train_data.to_csv(TRAIN_FILE_PATH)
-            test_data.to_csv(TEST_FILE_PATH)
+            save_data(train_data , self.train_file_path)
+            save_data(test_data , self.test_file_path)
 
-            logger.info(f"Traind data saved to {TRAIN_FILE_PATH}") 
-            logger.info(f"Test data saved to {TEST_FILE_PATH}")    
+            logger.info(f"Traind data saved to {self.train_file_path}") 
+            logger.info(f"Test data saved to {self.test_file_path}")    
 
         except Exception as e :
             logger.error("Error while Splitting data")
             raise CustomException("Failed to split data into training and test sets" , e)
 
 
+    def split_data_hashed(self , source=None):
+        """
+        Streams rows to the train/test files by a hash of split_key, one row in memory at a time.
+
+        A row goes to train when the hash of its key falls below train_ratio, so the assignment does
+        not depend on row order, file boundaries or machine, and a key keeps its split as data is
+        appended. The hash is uniform and independent of the label, so every label's train share is
+        train_ratio up to sampling noise.
+        """
+        try:
+            logger.info(f"Start the hash splitting process on {self.split_key}")
+            for path in (self.train_file_path , self.test_file_path):
+                if os.path.splitext(path)[1] != ".csv":
+                    raise ValueError(f"Hash split streams CSV rows, {path} is not a CSV path")
+                os.makedirs(os.path.dirname(path) or "." , exist_ok=True)
+
+            if source is None:
+                source = open(self.raw_file_path , "rb")
+
+            rows = {"train": 0 , "test": 0}
+            with io.TextIOWrapper(source , encoding="utf-8" , newline="") as text , \
+                    open(self.train_file_path , "w" , newline="") as train_file , \
+                    open(self.test_file_path , "w" , newline="") as test_file:
+                reader = csv.reader(text)
+                header = next(reader)
+                key_index = header.index(self.split_key)
+                writers = {"train": csv.writer(train_file) , "test": csv.writer(test_file)}
+                for writer in writers.values():
+                    writer.writerow(header)
+
+                for row in reader:
+                    if not row:
+                        continue
+                    split = "train" if hash_fraction(row[key_index] , self.random_state) < self.train_ratio else "test"
+                    writers[split].writerow(row)
+                    rows[split] += 1
+
+            logger.info(f"Hash split wrote {rows['train']} train rows to {self.train_file_path} "
+                        f"and {rows['test']} test rows to {self.test_file_path}")
+
+        except Exception as e :
+            logger.error("Error while hash splitting data")
+            raise CustomException("Failed to split data into training and test sets" , e)
+
+
     def run(self):
         try :
             logger.info("Starting data ingestion process")
-            self.download_csv_from_aws()
-            self.split_data()
+            if self.stream_split:
+                with profile_stage("ingestion.download_and_split") , self.open_source_stream() as source:
+                    self.split_data(source)
+            else:
+                with profile_stage("ingestion.download"):
+                    self.download_csv_from_aws()
+                with profile_stage("ingestion.split"):
+                    self.split_data()
             logger.info("Data ingestion completed successfully")
         except CustomException as e :
             logger.error("Error while ingesting data")
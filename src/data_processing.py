@@ -1,10 +1,14 @@
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from imblearn.over_sampling import SMOTE
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from config.paths_config import *
-from utils.common_functions import read_data , read_yaml
+from utils.common_functions import read_data , read_yaml , save_data , read_data_chunks , DataChunkWriter
+from src.feature_transformer import FeatureTransformer
+from src.imbalance import ChunkedSMOTE , IMBALANCE_STRATEGIES
+from src.profiling import profile_stage
 
 
 
@@ -16,33 +20,38 @@ class DataProcessor:
         self.test_path = test_path
         self.processed_dir = processed_dir
         self.config = read_yaml(CONFIG_PATH)
+        self.transformer = None
+
+        self.processed_train_path = os.path.join(processed_dir , os.path.basename(PROCESSED_TRAIN_DATA_PATH))
+        self.processed_test_path = os.path.join(processed_dir , os.path.basename(PROCESSED_TEST_DATA_PATH))
+        self.transformer_path = FEATURE_TRANSFORMER_PATH
+
+        # "class_weight" and "none" leave the training rows as they are, class_weight is applied by ModelTraining
+        self.imbalance_strategy = self.config['data_processing'].get('imbalance_strategy' , 'smote')
+        if self.imbalance_strategy not in IMBALANCE_STRATEGIES:
+            raise ValueError(f"Unknown imbalance_strategy {self.imbalance_strategy}, expected one of {IMBALANCE_STRATEGIES}")
+        self.chunked_smote_params = self.config['data_processing'].get('chunked_smote' , {})
+
+        # Narrow dtype per selected feature; without it the engineered frame keeps pandas' int64/float64
+        self.feature_dtypes = self.config['data_processing'].get('feature_dtypes')
+        if self.feature_dtypes:
+            missing = [name for name in self.config['data_processing']['selected_features'] if name not in self.feature_dtypes]
+            if missing:
+                raise ValueError(f"feature_dtypes has no dtype for {missing}")
+            self.feature_dtypes = {name : self.feature_dtypes[name] for name in self.config['data_processing']['selected_features']}
 
         os.makedirs(self.processed_dir , exist_ok=True)
 
 
     def preprocess_data(self , df):
         try:
-            df['Age'] = df['Age'].fillna(df['Age'].median())
-            df['Embarked'] = df['Embarked'].fillna(df['Embarked'].mode()[0])
-            df['Fare'] = df['Fare'].fillna(df['Fare'].median())
-            df['Sex'] = df['Sex'].map({'male': 0, 'female': 1})
-            df['Embarked'] = df['Embarked'].astype('category').cat.codes
-
-
-            df['Familysize'] = df['SibSp'] + df['Parch'] + 1
-
-            df['Isalone'] = (df['Familysize'] == 1).astype(int)
-
-            df['HasCabin'] = df['Cabin'].notnull().astype(int)
-
-            df['Title'] = df['Name'].str.extract(r' ([A-Za-z]+)\.', expand=False).map(
-                {'Mr': 0, 'Miss': 1, 'Mrs': 2, 'Master': 3, 'Rare': 4}
-            ).fillna(4)
-
-            df['Pclass_Fare'] = df['Pclass'] * df['Fare']
-            df['Age_Fare'] = df['Age'] * df['Fare']
-
-            
+            # Statistics come from the fitted transformer, a standalone call fits on the frame itself
+            transformer = self.transformer if self.transformer is not None else FeatureTransformer().fit(df)
+            if self.feature_dtypes:
+                # Selected features only, built straight into their narrow dtypes
+                df = transformer.transform_features(df , self.feature_dtypes)
+            else:
+                df = transformer.transform(df)
 
             logger.info("Data Preprocessing done...")
 
@@ -74,10 +83,50 @@ class DataProcessor:
             raise CustomException("Error while balancing data", e)
         
 
+    def balanced_chunks(self , df):
+        # Yields the training frame balanced by imbalance_strategy; chunked_smote yields the original rows
+        # followed by batches of synthetic rows so the oversampled frame is never built in memory
+        if self.imbalance_strategy == "smote":
+            yield self.handle_imbalance_data(df)
+            return
+        yield df
+        if self.imbalance_strategy != "chunked_smote":
+            return
+
+        try:
+            features = [column for column in df.columns if column != "Survived"]
+            integer_columns = [column for column in features if pd.api.types.is_integer_dtype(df[column])]
+            sampler = ChunkedSMOTE(**self.chunked_smote_params)
+            for X_batch , y_batch in sampler.iter_synthetic(df[features] , df["Survived"]):
+                batch = pd.DataFrame(X_batch , columns=features)
+                # Integer coded features stay integers, like imblearn's SMOTE output
+                batch[integer_columns] = np.rint(batch[integer_columns]).astype(df[integer_columns].dtypes.to_dict())
+                batch["Survived"] = y_batch.astype(df["Survived"].dtype)
+                yield batch
+
+        except Exception as e:
+            logger.error(f"Error during chunked SMOTE {e}")
+            raise CustomException("Error while oversampling data", e)
+
+
+    def can_balance(self , df):
+        # SMOTE needs more minority rows than neighbours, smaller frames are kept as they are
+        return df["Survived"].nunique() == 2 and df["Survived"].value_counts().min() > 5
+
+    def balance(self , df):
+        # The frame balanced like the training split, for rows added outside process (incremental training)
+        if self.imbalance_strategy not in ("smote" , "chunked_smote"):
+            return df
+        if not self.can_balance(df):
+            logger.info(f"Frame of {len(df)} rows too small to balance, kept unchanged")
+            return df
+        return pd.concat(list(self.balanced_chunks(df)) , ignore_index=True)
+
+
     def save_data(self , df , file_path):
         try:
             logger.info("saving our data in processed folder")
-            df.to_csv(file_path , index= False)
+            save_data(df , file_path)
             logger.info(f"Data saved successfully to {file_path}")
 
         except Exception as e :
@@ -85,25 +134,81 @@ class DataProcessor:
             raise CustomException("Error during saving data " , e)
         
 
+    def process_file_in_chunks(self , input_path , output_path , balance):
+        selected_features = self.config['data_processing']['selected_features']
+        chunk_size = self.config['data_processing']['chunk_size']
+
+        with DataChunkWriter(output_path) as writer:
+            for chunk in read_data_chunks(input_path , chunk_size):
+                chunk = self.preprocess_data(chunk)[selected_features]
+                if balance and self.imbalance_strategy in ("smote" , "chunked_smote"):
+                    # Tiny trailing chunks are kept as is
+                    if self.can_balance(chunk):
+                        for part in self.balanced_chunks(chunk):
+                            writer.write(part)
+                        continue
+                    logger.info(f"Chunk of {len(chunk)} rows too small to balance, written unchanged")
+                writer.write(chunk)
+
+        logger.info(f"Data saved successfully to {output_path} ({writer.rows} rows)")
+
+
+    def process_chunked(self):
+        # Two passes with memory bounded by chunk_size: fit the fill statistics, then transform and write
+        try:
+            processing_config = self.config['data_processing']
+
+            logger.info("Fitting feature transformer on the training split in chunks")
+            with profile_stage("processing.fit_transformer"):
+                self.transformer = FeatureTransformer.fit_chunks(
+                    read_data_chunks(self.train_path , processing_config['chunk_size']) ,
+                    sketch_capacity=processing_config['sketch_capacity']
+                )
+                self.transformer.save(self.transformer_path)
+
+            with profile_stage("processing.train_chunks"):
+                self.process_file_in_chunks(self.train_path , self.processed_train_path , balance=True)
+            with profile_stage("processing.test_chunks"):
+                self.process_file_in_chunks(self.test_path , self.processed_test_path , balance=False)
+
+            logger.info("Chunked data processing completed successfully")
+
+        except Exception as e :
+            logger.error(f"Error during chunked preprocessing pipeline {e}")
+            raise CustomException("Error during chunked preprocessing pipeline" , e)
+
+
     def process(self):
+        if self.config['data_processing'].get('mode' , 'in_memory') == 'chunked':
+            return self.process_chunked()
+
         try:
             logger.info("Loading data from RAW directory")
-            df_train = read_data(self.train_path)
-            df_test = read_data(self.test_path)
+            with profile_stage("processing.load"):
+                df_train = read_data(self.train_path)
+                df_test = read_data(self.test_path)
 
-            df_train = self.preprocess_data(df_train )
-            df_test = self.preprocess_data(df_test)
+            logger.info("Fitting feature transformer on the training split")
+            with profile_stage("processing.fit_transformer"):
+                self.transformer = FeatureTransformer().fit(df_train)
+                self.transformer.save(self.transformer_path)
 
-            df_train = df_train[self.config['data_processing']['selected_features']]
-            df_test = df_test[self.config['data_processing']['selected_features']]
+            with profile_stage("processing.preprocess"):
+                df_train = self.preprocess_data(df_train )
+                df_test = self.preprocess_data(df_test)
 
+                df_train = df_train[self.config['data_processing']['selected_features']]
+                df_test = df_test[self.config['data_processing']['selected_features']]
 
-            df_train = self.handle_imbalance_data(df_train )
-            
 
+            logger.info(f"Balancing training data with strategy {self.imbalance_strategy}")
+            with profile_stage("processing.balance") , DataChunkWriter(self.processed_train_path) as writer:
+                for part in self.balanced_chunks(df_train):
+                    writer.write(part)
+            logger.info(f"Data saved successfully to {self.processed_train_path} ({writer.rows} rows)")
 
-            df_train = self.save_data(df_train , PROCESSED_TRAIN_DATA_PATH)
-            df_test = self.save_data(df_test , PROCESSED_TEST_DATA_PATH)
+            with profile_stage("processing.save_test"):
+                df_test = self.save_data(df_test , self.processed_test_path)
 
             logger.info("Data processing completed successfully")
 
@@ -0,0 +1,258 @@
+import json
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from src.streaming_stats import QuantileSketch
+
+logger = get_logger(__name__)
+
+RAW_COLUMNS = ["Pclass" , "Name" , "Sex" , "Age" , "SibSp" , "Parch" , "Fare" , "Cabin" , "Embarked"]
+# Raw fields a passenger cannot be scored without, the others are filled like in training when missing
+REQUIRED_RAW_COLUMNS = ["Pclass" , "Sex" , "SibSp" , "Parch"]
+NUMERIC_RAW_COLUMNS = ["Pclass" , "Age" , "SibSp" , "Parch" , "Fare"]
+ENGINEERED_COLUMNS = ["Pclass" , "Sex" , "Age" , "Fare" , "Embarked" , "Familysize" , "Isalone" ,
+                      "HasCabin" , "Title" , "Pclass_Fare" , "Age_Fare"]
+
+SEX_MAPPING = {"male": 0 , "female": 1}
+TITLE_MAPPING = {"Mr": 0 , "Miss": 1 , "Mrs": 2 , "Master": 3 , "Rare": 4}
+TITLE_PATTERN = re.compile(r" ([A-Za-z]+)\.")
+
+# Written back as integers when they have no missing values, like the original pandas pipeline
+INTEGER_COLUMNS = ["Pclass" , "Sex" , "Embarked" , "Familysize" , "Isalone" , "HasCabin"]
+
+
+def _is_missing(value):
+    return value is None or value == "" or (isinstance(value , float) and value != value)
+
+
+def _to_float(values):
+    try:
+        return np.asarray(values , dtype=np.float64)
+    except (TypeError , ValueError):
+        return np.array([np.nan if _is_missing(value) else float(value) for value in values] , dtype=np.float64)
+
+
+def _to_object(values):
+    values = np.asarray(values , dtype=object)
+    return np.array([None if _is_missing(value) else value for value in values] , dtype=object)
+
+
+class FeatureTransformer:
+    """
+    Feature engineering fitted once on the training split.
+
+    Learns the Age/Fare fill medians, the Embarked fill mode and category codes, and keeps the Title
+    mapping, so training, evaluation and serving all apply exactly the same transformation.
+    """
+
+    def __init__(self , age_median=None , fare_median=None , embarked_mode=None , embarked_categories=None ,
+                 title_mapping=None , rare_title=None):
+        self.age_median = age_median
+        self.fare_median = fare_median
+        self.embarked_mode = embarked_mode
+        self.embarked_categories = embarked_categories
+        self.title_mapping = title_mapping if title_mapping is not None else dict(TITLE_MAPPING)
+        self.rare_title = rare_title if rare_title is not None else TITLE_MAPPING["Rare"]
+
+    @property
+    def is_fitted(self):
+        return self.embarked_categories is not None
+
+    def fit(self , df):
+        try:
+            self.age_median = float(df["Age"].median())
+            self.fare_median = float(df["Fare"].median())
+            self.embarked_mode = str(df["Embarked"].mode()[0])
+            self.embarked_categories = sorted(str(value) for value in df["Embarked"].fillna(self.embarked_mode).unique())
+
+            logger.info(f"Feature transformer fitted on {len(df)} rows")
+            return self
+
+        except Exception as e:
+            logger.error(f"Error while fitting feature transformer {e}")
+            raise CustomException("Failed to fit feature transformer" , e)
+
+    @classmethod
+    def fit_chunks(cls , chunks , sketch_capacity=100000):
+        # Streaming fit: medians from quantile sketches, Embarked mode and categories from value counts
+        try:
+            age = QuantileSketch(sketch_capacity)
+            fare = QuantileSketch(sketch_capacity)
+            embarked = Counter()
+            n_rows = 0
+
+            for chunk in chunks:
+                age.update(_to_float(chunk["Age"]))
+                fare.update(_to_float(chunk["Fare"]))
+                embarked.update(str(value) for value in _to_object(chunk["Embarked"]) if value is not None)
+                n_rows += len(chunk)
+
+            # Ties are broken on the smallest value, like pandas' mode()
+            top_count = max(embarked.values())
+            embarked_mode = min(value for value , count in embarked.items() if count == top_count)
+
+            transformer = cls(age_median=age.median() , fare_median=fare.median() , embarked_mode=embarked_mode ,
+                              embarked_categories=sorted(embarked))
+            logger.info(f"Feature transformer fitted on {n_rows} rows in chunks")
+            return transformer
+
+        except Exception as e:
+            logger.error(f"Error while fitting feature transformer on chunks {e}")
+            raise CustomException("Failed to fit feature transformer on chunks" , e)
+
+    def transform_columns(self , columns):
+        # columns maps raw column names to equally long sequences (lists, numpy arrays or pandas Series)
+        pclass = _to_float(columns["Pclass"])
+        age = _to_float(columns["Age"])
+        fare = _to_float(columns["Fare"])
+        age = np.where(np.isnan(age) , self.age_median , age)
+        fare = np.where(np.isnan(fare) , self.fare_median , fare)
+
+        sex = _to_object(columns["Sex"])
+        sex = np.array([SEX_MAPPING.get(value , np.nan) for value in sex] , dtype=np.float64)
+
+        embarked = _to_object(columns["Embarked"])
+        embarked = np.array([self.embarked_mode if value is None else str(value) for value in embarked])
+        categories = np.asarray(self.embarked_categories)
+        codes = np.searchsorted(categories , embarked)
+        known = (codes < len(categories)) & (categories[np.minimum(codes , len(categories) - 1)] == embarked)
+        embarked = np.where(known , codes , -1)
+
+        familysize = _to_float(columns["SibSp"]) + _to_float(columns["Parch"]) + 1
+        isalone = (familysize == 1).astype(np.int64)
+        hascabin = np.array([value is not None for value in _to_object(columns["Cabin"])] , dtype=np.int64)
+
+        titles = []
+        for name in _to_object(columns["Name"]):
+            match = TITLE_PATTERN.search(name) if isinstance(name , str) else None
+            titles.append(self.title_mapping.get(match.group(1) , self.rare_title) if match else self.rare_title)
+        title = np.asarray(titles , dtype=np.float64)
+
+        return {
+            "Pclass": pclass,
+            "Sex": sex,
+            "Age": age,
+            "Fare": fare,
+            "Embarked": embarked,
+            "Familysize": familysize,
+            "Isalone": isalone,
+            "HasCabin": hascabin,
+            "Title": title,
+            "Pclass_Fare": pclass * fare,
+            "Age_Fare": age * fare
+        }
+
+    def transform(self , df):
+        try:
+            features = self.transform_columns(df)
+            df = df.copy()
+            for name , values in features.items():
+                if name in INTEGER_COLUMNS and not np.isnan(values).any():
+                    values = values.astype(np.int64)
+                df[name] = values
+            return df
+
+        except Exception as e:
+            logger.error(f"Error while transforming data {e}")
+            raise CustomException("Failed to transform data" , e)
+
+    def transform_features(self , df , dtypes):
+        # Builds only the columns of the dtype plan, each cast once to its narrow dtype; the raw frame is
+        # never copied. Columns not produced by the transformer (the label) are taken from df.
+        import pandas as pd
+        try:
+            features = self.transform_columns(df)
+            columns = {}
+            for name , dtype in dtypes.items():
+                values = features[name] if name in features else np.asarray(df[name])
+                dtype = np.dtype(dtype)
+                if dtype.kind in "iu" and np.isnan(values.astype(np.float64 , copy=False)).any():
+                    logger.warning(f"{name} has missing values, kept as float32 instead of {dtype}")
+                    dtype = np.dtype(np.float32)
+                columns[name] = values.astype(dtype , copy=False)
+            return pd.DataFrame(columns , index=getattr(df , "index" , None))
+
+        except Exception as e:
+            logger.error(f"Error while transforming data {e}")
+            raise CustomException("Failed to transform data" , e)
+
+    def validate_columns(self , columns):
+        # Serving input is checked field by field, training data is trusted and transformed as it is
+        missing = [name for name in RAW_COLUMNS if name not in columns]
+        if missing:
+            raise ValueError(f"Missing raw columns : {missing}")
+        n_rows = len(columns["Pclass"])
+        for name in RAW_COLUMNS:
+            if len(columns[name]) != n_rows:
+                raise ValueError(f"Column '{name}' has {len(columns[name])} values, expected {n_rows}")
+        for name in REQUIRED_RAW_COLUMNS:
+            rows = [index for index , value in enumerate(columns[name]) if _is_missing(value)]
+            if rows:
+                raise ValueError(f"Field '{name}' is required but missing in rows {rows[:10]}")
+        for name in NUMERIC_RAW_COLUMNS:
+            for value in columns[name]:
+                if _is_missing(value):
+                    continue
+                # JSON booleans are ints to Python and "inf"/"nan" parse as floats, /predict/batch rejects both
+                try:
+                    number = float(value) if not isinstance(value , bool) else math.nan
+                except (TypeError , ValueError):
+                    number = math.nan
+                if not math.isfinite(number):
+                    raise ValueError(f"Field '{name}' must be a finite number , got {value!r}")
+        known = {"Sex": list(SEX_MAPPING) , "Embarked": list(self.embarked_categories)}
+        for name , categories in known.items():
+            unknown = sorted({str(value) for value in columns[name] if not _is_missing(value) and value not in categories})
+            if unknown:
+                raise ValueError(f"Field '{name}' must be one of {categories} , got {unknown}")
+        if any(not _is_missing(value) and not isinstance(value , str) for value in columns["Name"]):
+            raise ValueError("Field 'Name' must be a string")
+
+    def transform_matrix(self , columns , feature_columns):
+        self.validate_columns(columns)
+        try:
+            features = self.transform_columns(columns)
+        except (TypeError , ValueError) as e:
+            raise ValueError(f"Invalid raw passenger values : {e}")
+
+        matrix = np.empty((len(features["Pclass"]) , len(feature_columns)) , dtype=np.float64)
+        for index , name in enumerate(feature_columns):
+            matrix[:, index] = features[name]
+        return matrix
+
+    def to_dict(self):
+        return {
+            "age_median": self.age_median,
+            "fare_median": self.fare_median,
+            "embarked_mode": self.embarked_mode,
+            "embarked_categories": self.embarked_categories,
+            "title_mapping": self.title_mapping,
+            "rare_title": self.rare_title
+        }
+
+    def save(self , path):
+        try:
+            os.makedirs(os.path.dirname(path) , exist_ok=True)
+            with open(path , "w") as f:
+                json.dump(self.to_dict() , f , indent=2)
+            logger.info(f"Feature transformer saved to {path}")
+
+        except Exception as e:
+            logger.error(f"Error while saving feature transformer {e}")
+            raise CustomException("Failed to save feature transformer" , e)
+
+    @classmethod
+    def load(cls , path):
+        try:
+            with open(path) as f:
+                transformer = cls(**json.load(f))
+            logger.info(f"Feature transformer loaded from {path}")
+            return transformer
+
+        except Exception as e:
+            logger.error(f"Error while loading feature transformer {e}")
+            raise CustomException("Failed to load feature transformer" , e)
@@ -0,0 +1,152 @@
+import math
+import time
+import numpy as np
+import lightgbm as lgb
+from sklearn.model_selection import ParameterSampler , StratifiedKFold
+from sklearn.metrics import accuracy_score , recall_score , precision_score , f1_score , roc_auc_score
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+SCORERS = {
+    "accuracy": lambda y , proba: accuracy_score(y , proba > 0.5),
+    "precision": lambda y , proba: precision_score(y , proba > 0.5 , zero_division=0),
+    "recall": lambda y , proba: recall_score(y , proba > 0.5),
+    "f1": lambda y , proba: f1_score(y , proba > 0.5),
+    "roc_auc": lambda y , proba: roc_auc_score(y , proba)
+}
+
+
+class SuccessiveHalvingSearch:
+    """
+    Budget aware hyperparameter search on native LightGBM datasets.
+
+    The binned Dataset of every CV fold is built once and shared by all candidates. Candidates start
+    with min_rounds boosting rounds; after each rung only the best 1/eta survive and get eta times
+    more rounds, with early stopping on the fold's validation set. The search stops early once the
+    wall clock or CPU budget is spent and keeps the best candidate of the highest rung reached.
+    """
+
+    def __init__(self , param_distributions , n_candidates=100 , min_rounds=25 , max_rounds=500 , eta=3 ,
+                 cv=2 , early_stopping_rounds=20 , time_budget_seconds=None , cpu_budget_seconds=None ,
+                 scoring="accuracy" , random_state=42):
+        self.param_distributions = param_distributions
+        self.n_candidates = n_candidates
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.cv = cv
+        self.early_stopping_rounds = early_stopping_rounds
+        self.time_budget_seconds = time_budget_seconds
+        self.cpu_budget_seconds = cpu_budget_seconds
+        self.scorer = SCORERS[scoring]
+        self.random_state = random_state
+
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_rounds_ = None
+        self.history_ = []
+
+    def _build_folds(self , X , y , sample_weight=None):
+        folds = []
+        splitter = StratifiedKFold(n_splits=self.cv , shuffle=True , random_state=self.random_state)
+        for train_index , valid_index in splitter.split(X , y):
+            train_weight = sample_weight[train_index] if sample_weight is not None else None
+            valid_weight = sample_weight[valid_index] if sample_weight is not None else None
+            train_set = lgb.Dataset(X[train_index] , y[train_index] , weight=train_weight , free_raw_data=False ,
+                                    params={"verbosity": -1})
+            valid_set = lgb.Dataset(X[valid_index] , y[valid_index] , weight=valid_weight , reference=train_set)
+            train_set.construct()
+            valid_set.construct()
+            folds.append((train_set , valid_set , X[valid_index] , y[valid_index]))
+        logger.info(f"Built {len(folds)} binned fold datasets")
+        return folds
+
+    def _booster_params(self , candidate):
+        params = {key : value for key , value in candidate.items() if key != "n_estimators"}
+        params.update({"objective": "binary" , "verbosity": -1 , "seed": self.random_state})
+        return params
+
+    def _evaluate(self , candidate , rounds , folds):
+        params = self._booster_params(candidate)
+        callbacks = []
+        if params.get("boosting_type" , params.get("boosting")) != "dart":
+            callbacks.append(lgb.early_stopping(self.early_stopping_rounds , verbose=False))
+
+        scores = []
+        best_rounds = []
+        for train_set , valid_set , X_valid , y_valid in folds:
+            booster = lgb.train(params , train_set , num_boost_round=rounds , valid_sets=[valid_set] , callbacks=callbacks)
+            used_rounds = booster.best_iteration or booster.current_iteration()
+            scores.append(self.scorer(y_valid , booster.predict(X_valid , num_iteration=used_rounds)))
+            best_rounds.append(used_rounds)
+        return float(np.mean(scores)) , int(np.mean(best_rounds))
+
+    def _budget_left(self , wall_start , cpu_start):
+        if self.time_budget_seconds is not None and time.perf_counter() - wall_start >= self.time_budget_seconds:
+            return False
+        if self.cpu_budget_seconds is not None and time.process_time() - cpu_start >= self.cpu_budget_seconds:
+            return False
+        return True
+
+    def fit(self , X , y , sample_weight=None):
+        try:
+            wall_start , cpu_start = time.perf_counter() , time.process_time()
+            # float32 feature matrices are binned as they are, anything else is converted to float64
+            X = np.asarray(X)
+            if X.dtype != np.float32:
+                X = X.astype(np.float64)
+            y = np.asarray(y)
+            if sample_weight is not None:
+                sample_weight = np.asarray(sample_weight , dtype=np.float64)
+
+            candidates = list(ParameterSampler(self.param_distributions , n_iter=self.n_candidates ,
+                                               random_state=self.random_state))
+            folds = self._build_folds(X , y , sample_weight)
+
+            alive = list(range(len(candidates)))
+            rounds = self.min_rounds
+            rung = 0
+            best = None
+            out_of_budget = False
+
+            while alive and not out_of_budget:
+                results = []
+                for index in alive:
+                    if not self._budget_left(wall_start , cpu_start):
+                        out_of_budget = True
+                        logger.info(f"Search budget exhausted at rung {rung}")
+                        break
+                    candidate_rounds = min(rounds , candidates[index].get("n_estimators" , self.max_rounds) , self.max_rounds)
+                    score , best_rounds = self._evaluate(candidates[index] , candidate_rounds , folds)
+                    results.append((score , index , best_rounds))
+                    self.history_.append({"rung": rung , "rounds": candidate_rounds , "score": score ,
+                                          "params": candidates[index]})
+
+                if not results:
+                    break
+                results.sort(key=lambda result: result[0] , reverse=True)
+                best = results[0]
+                logger.info(f"Rung {rung} : {len(results)} candidates at {rounds} rounds, best score {best[0]:.4f}")
+
+                if len(results) == 1 or rounds >= self.max_rounds:
+                    break
+                alive = [index for _ , index , _ in results[:max(1 , math.ceil(len(results) / self.eta))]]
+                rounds *= self.eta
+                rung += 1
+
+            if best is None:
+                raise RuntimeError("Search budget exhausted before any candidate was evaluated")
+
+            self.best_score_ , best_index , self.best_rounds_ = best
+            self.best_params_ = {key : value for key , value in candidates[best_index].items() if key != "n_estimators"}
+            self.best_params_["n_estimators"] = max(1 , self.best_rounds_)
+
+            logger.info(f"Successive halving evaluated {len(self.history_)} candidate rungs in "
+                        f"{time.perf_counter() - wall_start:.1f}s, best score {self.best_score_:.4f}")
+            return self
+
+        except Exception as e:
+            logger.error(f"Error during successive halving search {e}")
+            raise CustomException("Failed to run successive halving search" , e)
@@ -0,0 +1,103 @@
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+IMBALANCE_STRATEGIES = ["smote" , "chunked_smote" , "class_weight" , "none"]
+
+
+class ChunkedSMOTE:
+    """
+    SMOTE oversampling that never materializes the resampled frame or an exact k-NN graph.
+
+    Neighbours come from an approximate index of n_trees random projection trees: each tree halves
+    the minority rows at the median along a random direction until leaves hold about leaf_size rows.
+    The candidates of a row are the members of its leaf in every tree, of which the k nearest by true
+    distance are kept. Synthetic rows are interpolated between a random minority row and one of its
+    neighbours, like SMOTE, and handed out batch_size rows at a time so peak memory is bounded by the
+    batch and not by the output.
+    """
+
+    def __init__(self , k_neighbors=5 , n_trees=4 , leaf_size=32 , batch_size=1024 , random_state=42):
+        self.k_neighbors = k_neighbors
+        self.n_trees = n_trees
+        self.leaf_size = leaf_size
+        self.batch_size = batch_size
+        self.random_state = random_state
+
+    def _build_tree(self , X , rng):
+        # Every level splits all nodes at once: rows are ranked inside their node along the node's direction
+        n = X.shape[0]
+        leaf = np.zeros(n , dtype=np.int64)
+        depth = 0
+        # Leaves never get smaller than k_neighbors + 1, so every row has k real candidates
+        while n / 2 ** depth > max(self.leaf_size , 2 * (self.k_neighbors + 1)):
+            directions = rng.standard_normal((2 ** depth , X.shape[1]))
+            projection = np.einsum("ij,ij->i" , X , directions[leaf])
+            order = np.lexsort((projection , leaf))
+            counts = np.bincount(leaf , minlength=2 ** depth)
+            starts = np.cumsum(counts) - counts
+            rank = np.empty(n , dtype=np.int64)
+            rank[order] = np.arange(n) - starts[leaf[order]]
+            leaf = leaf * 2 + (rank >= counts[leaf] // 2)
+            depth += 1
+
+        # Leaf members padded to the largest leaf, -1 marks padding
+        order = np.argsort(leaf , kind="stable")
+        counts = np.bincount(leaf , minlength=2 ** depth)
+        starts = np.cumsum(counts) - counts
+        members = np.full((2 ** depth , counts.max()) , -1 , dtype=np.int64)
+        members[leaf[order] , np.arange(n) - starts[leaf[order]]] = order
+        return leaf , members
+
+    def _build_index(self , X):
+        rng = np.random.default_rng(self.random_state)
+        return [self._build_tree(X , rng) for _ in range(self.n_trees)]
+
+    def _neighbors(self , X , index , queries):
+        candidates = np.concatenate([members[leaf[queries]] for leaf , members in index] , axis=1)
+        candidates.sort(axis=1)
+        # Padding, the query itself and rows found by several trees are not neighbours
+        invalid = (candidates < 0) | (candidates == queries[: , None])
+        invalid[: , 1:] |= candidates[: , 1:] == candidates[: , :-1]
+
+        distances = ((X[np.maximum(candidates , 0)] - X[queries][: , None , :]) ** 2).sum(axis=2)
+        distances[invalid] = np.inf
+        k = min(self.k_neighbors , candidates.shape[1])
+        nearest = np.argpartition(distances , k - 1 , axis=1)[: , :k]
+        return np.take_along_axis(candidates , nearest , axis=1)
+
+    def iter_synthetic(self , X , y):
+        """Yields (X_batch, y_batch) of synthetic minority rows until both classes are the same size."""
+        X = np.asarray(X , dtype=np.float64)
+        y = np.asarray(y)
+        labels , counts = np.unique(y , return_counts=True)
+        if len(labels) != 2 or counts.min() == counts.max():
+            return
+        minority_label = labels[np.argmin(counts)]
+        minority = X[y == minority_label]
+        if len(minority) <= self.k_neighbors:
+            raise ValueError(f"Need more than {self.k_neighbors} minority rows, got {len(minority)}")
+
+        n_synthetic = int(counts.max() - counts.min())
+        index = self._build_index(minority)
+        rng = np.random.default_rng(self.random_state)
+        logger.info(f"Generating {n_synthetic} synthetic rows from {len(minority)} minority rows "
+                    f"in batches of {self.batch_size}")
+
+        for start in range(0 , n_synthetic , self.batch_size):
+            size = min(self.batch_size , n_synthetic - start)
+            base = rng.integers(len(minority) , size=size)
+            neighbors = self._neighbors(minority , index , base)
+            chosen = neighbors[np.arange(size) , rng.integers(neighbors.shape[1] , size=size)]
+            gap = rng.random((size , 1))
+            X_batch = minority[base] + gap * (minority[chosen] - minority[base])
+            yield X_batch , np.full(size , minority_label)
+
+    def fit_resample(self , X , y):
+        # Convenience for small inputs, the batches are concatenated after the original rows
+        X = np.asarray(X , dtype=np.float64)
+        y = np.asarray(y)
+        batches = list(self.iter_synthetic(X , y))
+        return (np.concatenate([X] + [batch for batch , _ in batches]) ,
+                np.concatenate([y] + [labels for _ , labels in batches]))
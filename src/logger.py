@@ -1,19 +1,198 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from datetime import datetime
 
-LOGS_DIR = "logs"
+# Everything is configured from the environment so the pipeline, the Flask app and gunicorn workers
+# share one setup:
+#   LOG_DIR / LOG_FILE          where records go (logs/titanic.log)
+#   LOG_LEVEL                   INFO
+#   LOG_MODE                    "async" hands records to a background writer thread, "sync" writes inline
+#   LOG_FORMAT                  "json" (one object per line) or "text"
+#   LOG_ROTATION                "external" (logrotate or similar renames the file, it is reopened),
+#                               "time" (LOG_ROTATE_WHEN, midnight), "size" (LOG_MAX_BYTES) or "none"
+#   LOG_BACKUP_COUNT            rotated files kept
+#   LOG_RATE_LIMIT / LOG_BURST  INFO/DEBUG records per second and burst allowed per call site, 0 (the
+#                               default) disables; gunicorn.conf.py turns it on for the serving workers
+# "time" and "size" rotate from the process that configured logging only: a forked child (gunicorn
+# worker, batch scoring process) writes through a handler that reopens the file once it was rotated,
+# several processes renaming the same file would lose or overwrite the rotated files.
+LOGS_DIR = os.environ.get("LOG_DIR" , "logs")
 os.makedirs(LOGS_DIR,exist_ok=True)
 
-LOG_FILE = os.path.join(LOGS_DIR, f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
+LOG_FILE = os.environ.get("LOG_FILE" , os.path.join(LOGS_DIR , "titanic.log"))
+LOG_LEVEL = os.environ.get("LOG_LEVEL" , "INFO").upper()
+LOG_MODE = os.environ.get("LOG_MODE" , "async")
+LOG_FORMAT = os.environ.get("LOG_FORMAT" , "json")
+LOG_ROTATION = os.environ.get("LOG_ROTATION" , "external")
+LOG_ROTATE_WHEN = os.environ.get("LOG_ROTATE_WHEN" , "midnight")
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES" , 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT" , 14))
+LOG_RATE_LIMIT = float(os.environ.get("LOG_RATE_LIMIT" , 0))
+LOG_BURST = float(os.environ.get("LOG_BURST" , 100))
+
+# LogRecord attributes, anything else on a record came from extra={...} and is emitted as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("" , 0 , "" , 0 , "" , () , None))) | {"message" , "asctime" , "suppressed"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, process id and any extra fields."""
+
+    def format(self , record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": _PID
+        }
+        for key , value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if getattr(record , "suppressed" , 0):
+            entry["suppressed"] = record.suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry , default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per call site (logger, file, line) for records below WARNING.
+
+    A call site may log `burst` records at once and `rate` per second after that; the number of
+    dropped records is attached to the next one that passes as `suppressed`. Warnings and errors are
+    never dropped.
+    """
+
+    def __init__(self , rate , burst):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self , record):
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name , record.pathname , record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            tokens , last , dropped = self._buckets.get(key , (self.burst , now , 0))
+            tokens = min(self.burst , tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens , now , dropped + 1)
+                return False
+            self._buckets[key] = (tokens - 1 , now , 0)
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Only merges the arguments on the calling thread; formatting and I/O happen on the writer thread.
+    # This is the root logger's only handler, so the record is updated in place instead of copied.
+    def prepare(self , record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler(rotation):
+    if rotation == "size":
+        handler = logging.handlers.RotatingFileHandler(LOG_FILE , maxBytes=LOG_MAX_BYTES , backupCount=LOG_BACKUP_COUNT)
+    elif rotation == "time":
+        handler = logging.handlers.TimedRotatingFileHandler(LOG_FILE , when=LOG_ROTATE_WHEN , backupCount=LOG_BACKUP_COUNT)
+    elif rotation == "external":
+        handler = logging.handlers.WatchedFileHandler(LOG_FILE)
+    else:
+        handler = logging.FileHandler(LOG_FILE)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    return handler
+
+
+_writer = _file_handler(LOG_ROTATION)
+_queue_handler = None
+_listener = None
+
+
+def _start_listener():
+    global _listener
+    _queue_handler.queue = queue.Queue()
+    _listener = logging.handlers.QueueListener(_queue_handler.queue , _writer , respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_listener_after_fork():
+    # The writer thread does not survive fork (gunicorn workers), the child gets its own queue and
+    # thread; records still queued in the parent are written by the parent. A rotating writer is
+    # swapped for one that follows the parent's rotations instead of rotating the file itself.
+    global _PID , _writer
+    _PID = os.getpid()
+    if isinstance(_writer , logging.handlers.BaseRotatingHandler):
+        writer = _file_handler("external")
+        for log_filter in _writer.filters:
+            writer.addFilter(log_filter)
+        if _root.handlers and _root.handlers[0] is _writer:
+            _root.removeHandler(_writer)
+            _root.addHandler(writer)
+        _writer = writer
+    if _queue_handler is not None:
+        _start_listener()
+
+
+def flush_logs(timeout=5.0):
+    # Blocks until the background writer has written everything logged so far (or timeout passes)
+    if _queue_handler is None:
+        _writer.flush()
+        return
+    deadline = time.monotonic() + timeout
+    while _queue_handler.queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.001)
+    _writer.flush()
+
+
+def _stop_listener():
+    if _listener is not None:
+        _listener.stop()
+
+
+# Thread, process and multiprocessing lookups on every record are not used by the formats above
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+_PID = os.getpid()
+
+_root = logging.getLogger()
+_root.setLevel(LOG_LEVEL)
+if LOG_MODE == "async":
+    _queue_handler = _QueueHandler(queue.Queue())
+    _queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT , LOG_BURST))
+    _root.addHandler(_queue_handler)
+    _start_listener()
+    atexit.register(_stop_listener)
+else:
+    _writer.addFilter(RateLimitFilter(LOG_RATE_LIMIT , LOG_BURST))
+    _root.addHandler(_writer)
+
+
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
 
-logging.basicConfig(
-    filename=LOG_FILE,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
 
 def get_logger(name):
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    logger.setLevel(LOG_LEVEL)
+    return logger
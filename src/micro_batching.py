@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds of the batch size histogram, the last bucket catches everything above
+BATCH_SIZE_BUCKETS = (1 , 2 , 4 , 8 , 16 , 32 , 64 , 128 , 256 , 512 , 1024)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent scoring requests into one model call.
+
+    Requests are queued and flushed either when max_batch_size rows are waiting or max_wait_ms after
+    the first queued request, whichever comes first. predict_fn takes a 2D feature array and returns
+    a tuple of per-row arrays, which are sliced back to each caller.
+    """
+
+    def __init__(self , predict_fn , max_batch_size=64 , max_wait_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._worker = None
+        self._closed = False
+
+        self.batches = 0
+        self.rows = 0
+        self.max_observed_batch = 0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    def _ensure_worker(self):
+        # The worker thread is started lazily and restarted after a fork, threads do not survive fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run , name="micro-batcher" , daemon=True)
+            self._worker.start()
+            self._pid = os.getpid()
+            logger.info(f"Micro batcher started with max_batch_size={self.max_batch_size} max_wait={self.max_wait}s")
+
+    def submit(self , features):
+        self._ensure_worker()
+        future = Future()
+        with self._lock:
+            if not self._closed:
+                self._queue.put((features , future))
+                return future
+        # Closed batchers (model swapped out) score stragglers inline
+        try:
+            future.set_result(self.predict_fn(features))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        # The worker scores what is already queued, then exits
+        with self._lock:
+            self._closed = True
+            if self._queue is not None and self._pid == os.getpid():
+                self._queue.put(None)
+
+    def predict(self , features , timeout=None):
+        return self.submit(features).result(timeout=timeout)
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is None:
+            return None , 0
+        batch = [item]
+        n_rows = batch[0][0].shape[0]
+        deadline = time.monotonic() + self.max_wait
+
+        while n_rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            batch.append(item)
+            n_rows += item[0].shape[0]
+        return batch , n_rows
+
+    def _run(self):
+        while True:
+            batch , n_rows = self._collect()
+            if batch is None:
+                logger.info("Micro batcher closed")
+                return
+            futures = {future for _ , future in batch if future.set_running_or_notify_cancel()}
+            if not futures:
+                continue
+            try:
+                features = np.concatenate([features for features , _ in batch])
+                outputs = self.predict_fn(features)
+
+                start = 0
+                for (item_features , future) in batch:
+                    stop = start + item_features.shape[0]
+                    if future in futures:
+                        future.set_result(tuple(output[start:stop] for output in outputs))
+                    start = stop
+
+            except Exception as e:
+                logger.error(f"Error while scoring micro batch {e}")
+                for future in futures:
+                    future.set_exception(e)
+
+            self._record(n_rows)
+
+    def _record(self , n_rows):
+        bucket = next((i for i , bound in enumerate(BATCH_SIZE_BUCKETS) if n_rows <= bound) , len(BATCH_SIZE_BUCKETS))
+        with self._lock:
+            self.batches += 1
+            self.rows += n_rows
+            self.max_observed_batch = max(self.max_observed_batch , n_rows)
+            self.batch_size_counts[bucket] += 1
+
+    def stats(self):
+        with self._lock:
+            labels = [str(bound) for bound in BATCH_SIZE_BUCKETS] + [f">{BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                "batches": self.batches,
+                "rows": self.rows,
+                "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_observed_batch,
+                "batch_size_histogram": dict(zip(labels , self.batch_size_counts)),
+                "queued": self._queue.qsize() if self._queue is not None else 0
+            }
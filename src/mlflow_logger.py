@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+from src.logger import get_logger
+from src.stage_cache import hash_file
+
+logger = get_logger(__name__)
+
+# Tags recording a logged dataset: its content hash and the URI of the one uploaded copy
+DATASET_HASH_TAG = "dataset.{name}.sha256"
+DATASET_URI_TAG = "dataset.{name}.uri"
+
+
+class AsyncMlflowLogger:
+    """
+    Logs params, metrics, tags and artifacts of one MLflow run from a background thread.
+
+    Calls only enqueue the work (the queue is bounded, a full queue blocks the caller instead of
+    growing without limit) and return; flush(timeout) waits for the queue to drain before the run is
+    ended. Datasets are uploaded once per content hash: when a run of the experiment already logged
+    the same file, only tags pointing at that copy are written. A failing upload is logged and
+    counted, it never fails the training. With asynchronous=False every call runs inline.
+    """
+
+    def __init__(self , run_id , experiment_id , client=None , max_queue_size=64 , asynchronous=True , dedup_datasets=True):
+        from mlflow.tracking import MlflowClient
+        self.run_id = run_id
+        self.experiment_id = experiment_id
+        self.client = client or MlflowClient()
+        self.asynchronous = asynchronous
+        self.dedup_datasets = dedup_datasets
+        self.errors = 0
+        self.uploaded = 0
+        self.deduplicated = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        if asynchronous:
+            self._thread = threading.Thread(target=self._work , name="mlflow-logger" , daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                self._run(*task)
+            finally:
+                self._queue.task_done()
+
+    def _run(self , description , fn , args):
+        start = time.perf_counter()
+        try:
+            fn(*args)
+            logger.info(f"MLflow {description} logged in {time.perf_counter() - start:.3f}s")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error while logging MLflow {description} {e}")
+
+    def _submit(self , description , fn , *args):
+        if self.asynchronous:
+            self._queue.put((description , fn , args))
+        else:
+            self._run(description , fn , args)
+
+    def log_params(self , params):
+        from mlflow.entities import Param
+        params = [Param(key , str(value)) for key , value in params.items()]
+        self._submit("params" , lambda: self.client.log_batch(self.run_id , params=params))
+
+    def log_metrics(self , metrics):
+        from mlflow.entities import Metric
+        timestamp = int(time.time() * 1000)
+        metrics = [Metric(key , float(value) , timestamp , 0) for key , value in metrics.items()]
+        self._submit("metrics" , lambda: self.client.log_batch(self.run_id , metrics=metrics))
+
+    def set_tags(self , tags):
+        from mlflow.entities import RunTag
+        tags = [RunTag(key , str(value)) for key , value in tags.items()]
+        self._submit("tags" , lambda: self.client.log_batch(self.run_id , tags=tags))
+
+    def log_artifact(self , path , artifact_path=None):
+        self._submit(f"artifact {path}" , self.client.log_artifact , self.run_id , path , artifact_path)
+
+    def log_dataset(self , path , artifact_path="datasets"):
+        self._submit(f"dataset {path}" , self._log_dataset , path , artifact_path)
+
+    def _find_dataset(self , name , digest):
+        runs = self.client.search_runs([self.experiment_id] ,
+                                       filter_string=f"tags.`{DATASET_HASH_TAG.format(name=name)}` = '{digest}'" ,
+                                       max_results=1)
+        return runs[0].data.tags.get(DATASET_URI_TAG.format(name=name)) if runs else None
+
+    def _log_dataset(self , path , artifact_path):
+        name = os.path.basename(path)
+        digest = hash_file(path)
+        uri = self._find_dataset(name , digest) if self.dedup_datasets else None
+        if uri is None:
+            self.client.log_artifact(self.run_id , path , artifact_path)
+            uri = f"runs:/{self.run_id}/{artifact_path}/{name}"
+            self.uploaded += 1
+        else:
+            logger.info(f"Dataset {name} ({digest[:12]}) already logged as {uri} , recording a reference")
+            self.deduplicated += 1
+        self.client.set_tag(self.run_id , DATASET_HASH_TAG.format(name=name) , digest)
+        self.client.set_tag(self.run_id , DATASET_URI_TAG.format(name=name) , uri)
+
+    def flush(self , timeout=None):
+        # Waits until everything queued so far is logged; returns False if timeout passed first
+        if not self.asynchronous:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"MLflow logging flush timed out with {self._queue.unfinished_tasks} tasks pending")
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self , timeout=None):
+        drained = self.flush(timeout)
+        if self._thread is not None:
+            if drained:
+                self._queue.put(None)
+                self._thread.join(timeout)
+            else:
+                # The daemon thread keeps uploading to a run that is about to end, whatever is left is lost
+                logger.warning(f"Abandoning the MLflow logger thread with {self._queue.unfinished_tasks} tasks pending")
+        logger.info(f"MLflow logging closed : {self.uploaded} datasets uploaded , {self.deduplicated} deduplicated , "
+                    f"{self.errors} errors")
+        return drained
@@ -0,0 +1,285 @@
+import json
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from src.stage_cache import hash_file
+
+logger = get_logger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+UNVERSIONED = "unversioned"
+
+
+def atomic_write(path , write_fn , mode="wb"):
+    # write_fn fills a temporary file next to path, which is then renamed over it in one step
+    os.makedirs(os.path.dirname(path) or "." , exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp_path , mode) as f:
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path , path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def version_file(directory , path):
+    # The copy of path inside a version directory; versions published before the file was versioned
+    # fall back to the shared copy at path
+    candidate = os.path.join(directory , os.path.basename(path))
+    if os.path.exists(candidate):
+        return candidate
+    logger.warning(f"{os.path.basename(path)} is missing from {directory} , using {path}")
+    return path
+
+
+class ModelRegistry:
+    """
+    Versioned model files on disk.
+
+    Every version lives in its own <root>/<version>/ directory, moved into place with a single rename
+    once all its files are written. manifest.json lists the versions with file hashes and metrics,
+    the active version and an optional weighted traffic split; it is replaced atomically too, so a
+    reader never sees a half written version or manifest.
+    """
+
+    def __init__(self , root):
+        self.root = root
+        self.manifest_path = os.path.join(root , MANIFEST_NAME)
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"active": None , "traffic": None , "versions": []}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self , manifest):
+        atomic_write(self.manifest_path , lambda f: json.dump(manifest , f , indent=2 , sort_keys=True) , mode="w")
+
+    def version_dir(self , version):
+        return os.path.join(self.root , version)
+
+    def versions(self):
+        return [entry["version"] for entry in self.manifest()["versions"]]
+
+    def _next_version(self , manifest):
+        numbers = [int(entry["version"].lstrip("v")) for entry in manifest["versions"]]
+        return f"v{max(numbers , default=0) + 1}"
+
+    def publish(self , files , metrics=None , activate=True):
+        # files maps the file name inside the version directory to the path of the file to copy in
+        try:
+            os.makedirs(self.root , exist_ok=True)
+            staging_dir = os.path.join(self.root , f".staging-{uuid.uuid4().hex}")
+            os.makedirs(staging_dir)
+            for name , source in files.items():
+                shutil.copyfile(source , os.path.join(staging_dir , name))
+
+            manifest = self.manifest()
+            version = self._next_version(manifest)
+            os.replace(staging_dir , self.version_dir(version))
+
+            manifest["versions"].append({
+                "version": version,
+                "created_at": datetime.now().isoformat(),
+                "files": {name : hash_file(os.path.join(self.version_dir(version) , name)) for name in files},
+                "metrics": metrics or {}
+            })
+            if activate:
+                manifest["active"] = version
+                manifest["traffic"] = None
+            self._write_manifest(manifest)
+            logger.info(f"Model version {version} published to {self.version_dir(version)}")
+            return version
+
+        except Exception as e:
+            logger.error(f"Error while publishing model version {e}")
+            raise CustomException("Failed to publish model version" , e)
+
+    def set_active(self , version):
+        manifest = self.manifest()
+        if version not in [entry["version"] for entry in manifest["versions"]]:
+            raise ValueError(f"Unknown model version {version}")
+        manifest["active"] = version
+        manifest["traffic"] = None
+        self._write_manifest(manifest)
+
+    def set_traffic(self , weights):
+        # weights maps versions to relative shares, e.g. {"v3": 0.9, "v4": 0.1}; None sends everything to active
+        manifest = self.manifest()
+        known = [entry["version"] for entry in manifest["versions"]]
+        if weights is not None:
+            unknown = [version for version in weights if version not in known]
+            if unknown:
+                raise ValueError(f"Unknown model versions {unknown}")
+            if sum(weights.values()) <= 0 or min(weights.values()) < 0:
+                raise ValueError("Traffic weights must be non negative with a positive sum")
+        manifest["traffic"] = weights
+        self._write_manifest(manifest)
+
+
+class ServedModel:
+    """A loaded model version, the feature transformer fitted with it, its scoring function and its own batcher."""
+
+    def __init__(self , version , model , score , batcher=None , transformer=None):
+        self.version = version
+        self.model = model
+        self.score = score
+        self.batcher = batcher
+        self.transformer = transformer
+        # LightGBM booster based explainer, attached on the first /explain request for this version
+        self.explainer = None
+        self.loaded_at = datetime.now().isoformat()
+
+    def close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+
+
+class ModelManager:
+    """
+    Serves the registry's active version (or a weighted split of versions) and hot-swaps new ones.
+
+    A background thread polls the manifest; new versions are loaded and warmed up before the routing
+    table is replaced with a single reference assignment, so requests always see either the old or
+    the new table and never wait for a load. Without a registry (or before its first version) the
+    model files in fallback_dir are served as version "unversioned".
+
+    load_fn(directory) loads the files of a version, make_served(version, loaded) returns its ServedModel,
+    warmup_fn(served) raises if the model is unfit to serve and on_swap(versions) is called with the
+    served versions after every swap.
+    """
+
+    def __init__(self , registry , load_fn , make_served , warmup_fn=None , fallback_dir=None , poll_interval_seconds=2.0 ,
+                 on_swap=None):
+        self.registry = registry
+        self.load_fn = load_fn
+        self.make_served = make_served
+        self.warmup_fn = warmup_fn
+        self.on_swap = on_swap
+        self.fallback_dir = fallback_dir
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._lock = threading.Lock()
+        self._watcher_lock = threading.Lock()
+        self._pid = None
+        self._manifest_signature = None
+        self._routing = None
+        self.swaps = 0
+        self.failed_loads = 0
+        self.refresh()
+
+    def _read_signature(self):
+        if self.registry is None:
+            return None
+        try:
+            stat = os.stat(self.registry.manifest_path)
+            return (stat.st_mtime_ns , stat.st_size)
+        except OSError:
+            return None
+
+    def model_dir(self , version):
+        return self.fallback_dir if version == UNVERSIONED else self.registry.version_dir(version)
+
+    def _load(self , version , loaded):
+        if version in loaded:
+            return loaded[version]
+        directory = self.model_dir(version)
+        served = self.make_served(version , self.load_fn(directory))
+        if self.warmup_fn is not None:
+            self.warmup_fn(served)
+        logger.info(f"Model version {version} loaded and warmed up from {directory}")
+        return served
+
+    def refresh(self):
+        # Loads whatever the manifest asks for and swaps the routing table; returns True on a swap
+        with self._lock:
+            signature = self._read_signature()
+            if self._routing is not None and (self.registry is None or signature == self._manifest_signature):
+                return False
+            try:
+                manifest = self.registry.manifest() if self.registry is not None else {"active": None , "traffic": None}
+                if manifest["active"] is None:
+                    if self.fallback_dir is None:
+                        raise ValueError(f"No active model version in {self.registry.manifest_path}")
+                    weights = {UNVERSIONED: 1.0}
+                else:
+                    weights = manifest["traffic"] or {manifest["active"]: 1.0}
+
+                current = dict(self._routing["models"]) if self._routing is not None else {}
+                models = {version : self._load(version , current) for version in weights}
+                routing = {"models": models , "weights": weights , "active": manifest["active"] or UNVERSIONED}
+
+            except Exception as e:
+                # A broken version is never swapped in, the current one keeps serving
+                self.failed_loads += 1
+                self._manifest_signature = signature
+                if self._routing is None:
+                    raise
+                logger.error(f"Error while loading new model version, keeping the current one {e}")
+                return False
+
+            retired = [served for version , served in (self._routing or {"models": {}})["models"].items()
+                       if version not in models]
+            self._routing = routing
+            self._manifest_signature = signature
+            self.swaps += 1
+            logger.info(f"Serving model versions {weights}")
+
+        for served in retired:
+            served.close()
+        if self.on_swap is not None:
+            self.on_swap(list(models))
+        return True
+
+    def _ensure_watcher(self):
+        # Started lazily and again after a fork, like the micro batcher
+        if self.registry is None or self.poll_interval_seconds is None or self._pid == os.getpid():
+            return
+        with self._watcher_lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._watch , name="model-watcher" , daemon=True).start()
+            self._pid = os.getpid()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval_seconds)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error while checking for new model versions {e}")
+
+    def choose(self):
+        self._ensure_watcher()
+        routing = self._routing
+        if len(routing["weights"]) == 1:
+            return routing["models"][next(iter(routing["weights"]))]
+        versions = list(routing["weights"])
+        version = random.choices(versions , weights=[routing["weights"][v] for v in versions])[0]
+        return routing["models"][version]
+
+    def served_models(self):
+        return dict(self._routing["models"])
+
+    def active(self):
+        routing = self._routing
+        return routing["models"].get(routing["active"]) or next(iter(routing["models"].values()))
+
+    def status(self):
+        routing = self._routing
+        return {
+            "active": routing["active"],
+            "traffic": routing["weights"],
+            "loaded": {version : served.loaded_at for version , served in routing["models"].items()},
+            "swaps": self.swaps,
+            "failed_loads": self.failed_loads
+        }
@@ -1,14 +1,23 @@
 import os
+import time
 import pandas as pd
 import joblib
 from sklearn.model_selection import RandomizedSearchCV
 import lightgbm as lgb
 from sklearn.metrics import accuracy_score , recall_score , precision_score , f1_score
+from sklearn.utils.class_weight import compute_sample_weight
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from config.paths_config import *
 from config.model_params import *
-from utils.common_functions import read_data , read_yaml
+from utils.common_functions import read_data , read_yaml , read_feature_matrix
+from src.tree_inference import CompiledTreeModel
+from src.feature_transformer import FeatureTransformer
+from src.hyperparameter_search import SuccessiveHalvingSearch
+from src.model_registry import ModelRegistry , UNVERSIONED , atomic_write , version_file
+from src.data_processing import DataProcessor
+from src.profiling import profile_stage
+from src.mlflow_logger import AsyncMlflowLogger
 from scipy.stats import randint
 import mlflow
 import mlflow.sklearn
@@ -21,23 +30,43 @@ class ModelTraining:
         self.train_path = train_path
         self.test_path = test_path
         self.model_output_path = model_output_path
+        self.compiled_model_output_path = os.path.splitext(model_output_path)[0] + ".npz"
+        self.booster_output_path = os.path.splitext(model_output_path)[0] + ".txt"
+        # Fitted by DataProcessor, published with every version so it is served with the model it was trained for
+        self.transformer_path = FEATURE_TRANSFORMER_PATH
+        self.registry = ModelRegistry(MODEL_REGISTRY_DIR)
+        self.run_id = None
 
         self.params_dist = LIGHTGM_PARAMS
         self.random_search_params = RANDOM_SEARCH_PARAMS
+        self.search_strategy = SEARCH_STRATEGY
+        self.halving_search_params = HALVING_SEARCH_PARAMS
+        self.incremental_params = INCREMENTAL_TRAINING_PARAMS
+
+        # With imbalance_strategy "class_weight" the rows are not resampled, the classes are weighted instead
+        config = read_yaml(CONFIG_PATH)
+        processing_config = config['data_processing']
+        imbalance_strategy = processing_config.get('imbalance_strategy' , 'smote')
+        self.class_weight = "balanced" if imbalance_strategy == "class_weight" else None
+        # CSV splits are parsed straight into the narrow dtypes DataProcessor wrote them with
+        self.feature_dtypes = processing_config.get('feature_dtypes')
+        self.selected_features = processing_config['selected_features']
+        self.mlflow_config = config.get('mlflow' , {})
+
+    def load_split(self , path):
+        if path.endswith(".npy"):
+            # Memory mapped feature matrices, no parsing and no copy
+            logger.info(f"Mapping feature matrix from {path}")
+            return read_feature_matrix(path , "Survived")
+
+        logger.info(f"Loading data from {path}")
+        df = read_data(path , self.feature_dtypes)
+        return df.drop(columns=["Survived"]) , df["Survived"]
 
     def load_and_split_data(self):
         try:
-            logger.info(f"Loading data from {self.train_path}")
-            train_df = read_data(self.train_path)
-
-            logger.info(f"Loading data from {self.test_path}")
-            test_df = read_data(self.test_path)
-
-            X_train = train_df.drop(columns=["Survived"])
-            y_train = train_df["Survived"]
-
-            X_test = test_df.drop(columns=["Survived"])            
-            y_test = test_df["Survived"]
+            X_train , y_train = self.load_split(self.train_path)
+            X_test , y_test = self.load_split(self.test_path)
 
             logger.info("Data splitted successfuly for Model Training")
             return X_train , y_train , X_test , y_test
@@ -45,12 +74,70 @@ class ModelTraining:
         except Exception as e :
             logger.error(f"Error while loading data {e}")
             raise CustomException("Failed to load data " , e)
+
+    def load_delta(self , delta_path , transformer):
+        # New raw passengers, engineered with the transformer fitted for the model they are added to
+        try:
+            logger.info(f"Loading new passengers from {delta_path}")
+            df = read_data(delta_path)
+            if self.feature_dtypes:
+                df = transformer.transform_features(df , {name : self.feature_dtypes[name] for name in self.selected_features})
+            else:
+                df = transformer.transform(df)[self.selected_features]
+            return df.drop(columns=["Survived"]) , df["Survived"]
+
+        except Exception as e :
+            logger.error(f"Error while loading new passengers {e}")
+            raise CustomException("Failed to load new passengers " , e)
+
+    def balance_delta(self , X_delta , y_delta):
+        # New rows are resampled by imbalance_strategy like the training split DataProcessor wrote
+        processor = DataProcessor(self.train_path , self.test_path , os.path.dirname(self.train_path) , CONFIG_PATH)
+        balanced = processor.balance(X_delta.assign(Survived=y_delta))
+        return balanced.drop(columns=["Survived"]) , balanced["Survived"]
+
+    def resolve_deployed(self):
+        # The registry's active version, else the plain model files; returns its version and directory
+        active = self.registry.manifest()["active"]
+        if active is not None:
+            return active , self.registry.version_dir(active)
+        return UNVERSIONED , os.path.dirname(self.model_output_path)
         
 
+    def train_lgbm_halving(self , X_train , y_train):
+        try:
+            logger.info("Start successive halving hyperparameter search")
+            search = SuccessiveHalvingSearch(
+                param_distributions=self.params_dist ,
+                cv=self.random_search_params["cv"] ,
+                scoring=self.random_search_params["scoring"] ,
+                random_state=self.random_search_params["random_state"] ,
+                **self.halving_search_params
+            )
+            sample_weight = compute_sample_weight(self.class_weight , y_train) if self.class_weight else None
+            search.fit(X_train , y_train , sample_weight=sample_weight)
+            logger.info(f"Best paramters are : {search.best_params_}")
+
+            logger.info("Refitting the best configuration on the full training set")
+            best_lgbm_model = lgb.LGBMClassifier(random_state=self.random_search_params['random_state'] ,
+                                                 class_weight=self.class_weight , verbosity=-1 ,
+                                                 **search.best_params_)
+            best_lgbm_model.fit(X_train , y_train)
+            return best_lgbm_model
+
+        except Exception as e :
+                logger.error(f"Error while training model {e}")
+                raise CustomException("Failed to train model " , e)
+
+
     def train_lgbm(self , X_train , y_train):
         try:
+            if self.search_strategy == "halving":
+                return self.train_lgbm_halving(X_train , y_train)
+
             logger.info(f"Initializing our model")
-            lgbm_model = lgb.LGBMClassifier(random_state=self.random_search_params['random_state'])
+            lgbm_model = lgb.LGBMClassifier(random_state=self.random_search_params['random_state'] ,
+                                            class_weight=self.class_weight)
             
             logger.info("Start hyperparameter tunning")
             random_search = RandomizedSearchCV(
@@ -79,6 +166,23 @@ class ModelTraining:
                 raise CustomException("Failed to train model " , e)
         
 
+    def continue_training(self , model , X_delta , y_delta):
+        # Boosts boost_rounds more trees on the new rows only, with the hyperparameters of the deployed model
+        try:
+            params = model.get_params()
+            params["n_estimators"] = self.incremental_params["boost_rounds"]
+            params["class_weight"] = self.class_weight
+            logger.info(f"Continuing training of the deployed model ({model.booster_.num_trees()} trees) on {len(X_delta)} new rows")
+
+            updated_model = lgb.LGBMClassifier(**params)
+            updated_model.fit(X_delta , y_delta , init_model=model.booster_)
+            return updated_model
+
+        except Exception as e :
+                logger.error(f"Error while continuing model training {e}")
+                raise CustomException("Failed to continue model training " , e)
+
+
     def evaluate_model(self, model , X_test , y_test):
         try:
             logger.info(f"Evaluating our model")
@@ -106,48 +210,79 @@ class ModelTraining:
                 logger.error(f"Error while evaluating model {e}")
                 raise CustomException("Failed to evaluate model " , e)
         
-    def save_model(self, model ):
+    def save_model(self, model , metrics=None , transformer_path=None):
+        # transformer_path is the feature transformer the model was trained with, published in the version
+        transformer_path = transformer_path or self.transformer_path
 
         try:
-            os.makedirs(os.path.dirname(self.model_output_path) , exist_ok=True)
+            # Both files are renamed into place once complete, a running server never reads half a model
             logger.info(f"Saving the model")
-            joblib.dump(model,self.model_output_path)
+            atomic_write(self.model_output_path , lambda f: joblib.dump(model , f))
             logger.info(f"Model saved to {self.model_output_path}")
 
+            CompiledTreeModel.from_model(model).save(self.compiled_model_output_path)
+            atomic_write(self.booster_output_path , lambda f: f.write(model.booster_.model_to_string()) , mode="w")
+
+            version = self.registry.publish({
+                os.path.basename(self.model_output_path): self.model_output_path ,
+                os.path.basename(self.compiled_model_output_path): self.compiled_model_output_path ,
+                os.path.basename(self.booster_output_path): self.booster_output_path ,
+                os.path.basename(self.transformer_path): transformer_path
+            } , metrics=metrics)
+            logger.info(f"Model published as version {version}")
+            return version
+
 
         except Exception as e :
                 logger.error(f"Error while saving model {e}")
                 raise CustomException("Failed to save model " , e)
         
 
+    def start_tracker(self , run):
+        # Uploads go through a background thread, the training thread only enqueues them
+        return AsyncMlflowLogger(run.info.run_id , run.info.experiment_id ,
+                                 max_queue_size=self.mlflow_config.get('queue_size' , 64) ,
+                                 asynchronous=self.mlflow_config.get('async_logging' , True) ,
+                                 dedup_datasets=self.mlflow_config.get('dedup_datasets' , True))
+
+    def finish_tracker(self , tracker):
+        with profile_stage("training.mlflow_flush"):
+            if not tracker.close(self.mlflow_config.get('flush_timeout_seconds' , 600)):
+                logger.warning("Ending the MLflow run with uploads still pending , they will be missing from the run")
+
     def run(self):
         try:
             mlflow.set_experiment("Survived prediction")
-            with mlflow.start_run():
+            with mlflow.start_run() as run:
+                self.run_id = run.info.run_id
                 logger.info("Start Model training pipeline")
                 logger.info("starting out Mlflow expermentation")
-
-                
-
-                mlflow.log_artifact(self.train_path , artifact_path="datasets")
-                mlflow.log_artifact(self.test_path , artifact_path="datasets")
-
-                
-
-                X_train , y_train , X_test , y_test = self.load_and_split_data()
-                best_lgbm_model = self.train_lgbm(X_train , y_train)
-                metrics = self.evaluate_model(best_lgbm_model , X_test , y_test)
-                self.save_model(best_lgbm_model)
-
-                logger.info("Logging model into MLflow")
-                mlflow.log_artifact(self.model_output_path)
-
-                logger.info("Logging params and metrics into MLflow")
-                mlflow.log_params(best_lgbm_model.get_params())
-                mlflow.log_metrics(metrics)
-
-
-
+                tracker = self.start_tracker(run)
+                try:
+                    with profile_stage("training.mlflow_datasets"):
+                        tracker.log_dataset(self.train_path)
+                        tracker.log_dataset(self.test_path)
+
+                    with profile_stage("training.load"):
+                        X_train , y_train , X_test , y_test = self.load_and_split_data()
+                    with profile_stage("training.search"):
+                        best_lgbm_model = self.train_lgbm(X_train , y_train)
+                    with profile_stage("training.evaluate"):
+                        metrics = self.evaluate_model(best_lgbm_model , X_test , y_test)
+                    with profile_stage("training.save"):
+                        version = self.save_model(best_lgbm_model , metrics)
+                    tracker.set_tags({"model_version": version})
+
+                    with profile_stage("training.mlflow_logging"):
+                        logger.info("Logging model into MLflow")
+                        tracker.log_artifact(self.model_output_path)
+                        tracker.log_artifact(self.compiled_model_output_path)
+
+                        logger.info("Logging params and metrics into MLflow")
+                        tracker.log_params(best_lgbm_model.get_params())
+                        tracker.log_metrics(metrics)
+                finally:
+                    self.finish_tracker(tracker)
                 logger.info("Model traing successfully completed")
 
         except Exception as e :
@@ -155,6 +290,84 @@ class ModelTraining:
                 raise CustomException("Failed to train pipeline " , e)
         
 
+    def run_incremental(self , delta_path):
+        # Warm starts from the registry's active version with the transformer published with it; a full
+        # search on history + delta only if the held-out metric degrades
+        base_version , base_dir = self.resolve_deployed()
+        base_model_path = os.path.join(base_dir , os.path.basename(self.model_output_path))
+        if not os.path.exists(base_model_path):
+            logger.info(f"No deployed model at {base_model_path} , running a full training")
+            return self.run()
+
+        try:
+            mlflow.set_experiment("Survived prediction")
+            with mlflow.start_run(run_name="incremental") as run:
+                self.run_id = run.info.run_id
+                logger.info(f"Start incremental Model training pipeline from version {base_version}")
+                tracker = self.start_tracker(run)
+                try:
+                    metric = self.incremental_params["metric"]
+                    base_transformer_path = version_file(base_dir , self.transformer_path)
+
+                    with profile_stage("training.load"):
+                        X_delta , y_delta = self.load_delta(delta_path , FeatureTransformer.load(base_transformer_path))
+                        X_delta , y_delta = self.balance_delta(X_delta , y_delta)
+                        X_test , y_test = self.load_split(self.test_path)
+                        deployed_model = joblib.load(base_model_path)
+                    tracker.log_dataset(delta_path)
+
+                    deployed_metrics = self.evaluate_model(deployed_model , X_test , y_test)
+
+                    start = time.perf_counter()
+                    with profile_stage("training.continue"):
+                        model = self.continue_training(deployed_model , X_delta , y_delta)
+                    with profile_stage("training.evaluate"):
+                        metrics = self.evaluate_model(model , X_test , y_test)
+                    incremental_seconds = time.perf_counter() - start
+
+                    degradation = deployed_metrics[metric] - metrics[metric]
+                    mode = "incremental"
+                    transformer_path = base_transformer_path
+                    if degradation > self.incremental_params["max_degradation"]:
+                        logger.warning(f"{metric} dropped by {degradation:.4f} after continued training , "
+                                       f"falling back to a full search on history and new rows")
+                        mode = "full_search"
+                        # The training split was engineered with the current transformer, the new rows are too
+                        transformer_path = self.transformer_path
+                        with profile_stage("training.load"):
+                            X_delta , y_delta = self.load_delta(delta_path , FeatureTransformer.load(transformer_path))
+                            X_delta , y_delta = self.balance_delta(X_delta , y_delta)
+                            X_train , y_train = self.load_split(self.train_path)
+                            X_train = pd.concat([X_train , X_delta.astype(X_train.dtypes.to_dict())] , ignore_index=True)
+                            y_train = pd.concat([y_train , y_delta.astype(y_train.dtype)] , ignore_index=True)
+                        with profile_stage("training.search"):
+                            model = self.train_lgbm(X_train , y_train)
+                        with profile_stage("training.evaluate"):
+                            metrics = self.evaluate_model(model , X_test , y_test)
+
+                    with profile_stage("training.save"):
+                        version = self.save_model(model , metrics , transformer_path=transformer_path)
+
+                    with profile_stage("training.mlflow_logging"):
+                        tracker.set_tags({"model_version": version , "training_mode": mode , "base_version": base_version})
+                        tracker.log_artifact(self.model_output_path)
+                        tracker.log_artifact(self.compiled_model_output_path)
+                        tracker.log_params(model.get_params())
+                        tracker.log_metrics(metrics)
+                        tracker.log_metrics({f"deployed_{name}" : value for name , value in deployed_metrics.items()})
+                        tracker.log_metrics({"delta_rows": len(X_delta) , "incremental_seconds": incremental_seconds})
+                finally:
+                    self.finish_tracker(tracker)
+
+                logger.info(f"Incremental training completed in {mode} mode , published version {version}")
+                return {"mode": mode , "version": version , "base_version": base_version , "metrics": metrics ,
+                        "deployed_metrics": deployed_metrics}
+
+        except Exception as e :
+                logger.error(f"Error while incremental training {e}")
+                raise CustomException("Failed to train incrementally " , e)
+        
+
 if __name__ == "__main__" :
     model_training = ModelTraining(PROCESSED_TRAIN_DATA_PATH ,PROCESSED_TEST_DATA_PATH ,MODEL_OUTPUT_PATH)
     model_training.run()
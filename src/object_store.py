@@ -0,0 +1,264 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor , as_completed
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+
+class S3ObjectStore:
+    def __init__(self , bucket_name , client=None):
+        import boto3
+        self.bucket_name = bucket_name
+        self.client = client if client is not None else boto3.client('s3')
+
+    def head(self , key):
+        head = self.client.head_object(Bucket=self.bucket_name , Key=key)
+        return {"size": head["ContentLength"] , "etag": head["ETag"].strip('"')}
+
+    def list(self , prefix):
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name , Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents" , []) if not item["Key"].endswith("/"))
+        return sorted(keys)
+
+    def get_range(self , key , start , end):
+        # end is inclusive, like the HTTP Range header
+        response = self.client.get_object(Bucket=self.bucket_name , Key=key , Range=f"bytes={start}-{end}")
+        return response["Body"].read()
+
+
+class LocalObjectStore:
+    """
+    Filesystem stand-in for S3, objects live at <root>/<bucket>/<key>.
+
+    ETags are the MD5 of the content, like single part S3 uploads, so checksum verification is
+    exercised offline too.
+    """
+
+    def __init__(self , root , bucket_name):
+        self.base = os.path.join(root , bucket_name)
+
+    def _path(self , key):
+        return os.path.join(self.base , key)
+
+    def head(self , key):
+        path = self._path(key)
+        digest = hashlib.md5()
+        with open(path , "rb") as f:
+            for block in iter(lambda: f.read(1 << 20) , b""):
+                digest.update(block)
+        return {"size": os.path.getsize(path) , "etag": digest.hexdigest()}
+
+    def list(self , prefix):
+        keys = []
+        for directory , _ , files in os.walk(self.base):
+            for name in files:
+                key = os.path.relpath(os.path.join(directory , name) , self.base).replace(os.sep , "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+    def get_range(self , key , start , end):
+        with open(self._path(key) , "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+
+def create_object_store(config):
+    if config.get("storage" , "s3") == "local":
+        return LocalObjectStore(config["local_root"] , config["bucket_name"])
+    return S3ObjectStore(config["bucket_name"])
+
+
+class ParallelDownloader:
+    """
+    Downloads objects with concurrent ranged GETs.
+
+    Parts are written in place into a preallocated <dest>.partial file and recorded in a
+    <dest>.parts.json state file, so an interrupted download resumes with the missing parts only.
+    The finished file is checked against the object size and, for single part ETags, its MD5.
+    """
+
+    def __init__(self , store , part_size=8 * 1024 * 1024 , max_workers=8 , verify_checksum=True):
+        self.store = store
+        self.part_size = part_size
+        self.max_workers = max_workers
+        self.verify_checksum = verify_checksum
+
+    def _parts(self , size):
+        return [(start , min(start + self.part_size , size) - 1) for start in range(0 , size , self.part_size)]
+
+    def _load_state(self , state_path , head):
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            if state["etag"] == head["etag"] and state["size"] == head["size"] and state["part_size"] == self.part_size:
+                return state
+        return {"etag": head["etag"] , "size": head["size"] , "part_size": self.part_size , "done": []}
+
+    @staticmethod
+    def _save_state(state_path , state):
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path , "w") as f:
+            json.dump(state , f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path , state_path)
+
+    def _check_digest(self , digest , size , head , name):
+        if size != head["size"]:
+            raise ValueError(f"Size mismatch for {name}: expected {head['size']} bytes , got {size}")
+        # Multipart ETags ("<hash>-<parts>") are not a content MD5, only the size can be checked
+        if self.verify_checksum and "-" not in head["etag"] and digest.hexdigest() != head["etag"]:
+            raise ValueError(f"Checksum mismatch for {name}")
+
+    def verify(self , path , head):
+        digest = hashlib.md5()
+        with open(path , "rb") as f:
+            for block in iter(lambda: f.read(1 << 20) , b""):
+                digest.update(block)
+        self._check_digest(digest , os.path.getsize(path) , head , path)
+
+    def download(self , key , dest_path):
+        try:
+            head = self.store.head(key)
+            partial_path = dest_path + ".partial"
+            state_path = dest_path + ".parts.json"
+            os.makedirs(os.path.dirname(dest_path) or "." , exist_ok=True)
+
+            state = self._load_state(state_path , head)
+            if not state["done"] or not os.path.exists(partial_path):
+                state["done"] = []
+                with open(partial_path , "wb") as f:
+                    f.truncate(head["size"])
+
+            parts = self._parts(head["size"])
+            done = set(state["done"])
+            pending = [index for index in range(len(parts)) if index not in done]
+            logger.info(f"Downloading {key}: {len(pending)} of {len(parts)} parts of {self.part_size} bytes")
+
+            lock = threading.Lock()
+            fd = os.open(partial_path , os.O_WRONLY)
+            try:
+                def fetch(index):
+                    start , end = parts[index]
+                    data = self.store.get_range(key , start , end)
+                    if len(data) != end - start + 1:
+                        raise ValueError(f"Short read for {key} bytes {start}-{end}")
+                    os.pwrite(fd , data , start)
+                    # On disk before the state file says so, a crash never resumes past unwritten bytes
+                    os.fsync(fd)
+                    with lock:
+                        state["done"].append(index)
+                        self._save_state(state_path , state)
+
+                pool = ThreadPoolExecutor(max_workers=self.max_workers)
+                try:
+                    for future in as_completed([pool.submit(fetch , index) for index in pending]):
+                        future.result()
+                finally:
+                    # On failure queued parts are dropped, the finished ones are kept for the next attempt
+                    pool.shutdown(wait=True , cancel_futures=True)
+            finally:
+                os.close(fd)
+
+            self.verify(partial_path , head)
+            os.replace(partial_path , dest_path)
+            os.remove(state_path)
+            logger.info(f"{key} downloaded and verified to {dest_path}")
+            return dest_path
+
+        except Exception as e :
+            logger.error(f"Error while downloading {key} {e}")
+            raise CustomException(f"Failed to download {key}" , e)
+
+    def download_prefix(self , prefix , dest_dir):
+        keys = self.store.list(prefix)
+        if not keys:
+            raise ValueError(f"No objects found under prefix {prefix}")
+        paths = [os.path.join(dest_dir , key.replace("/" , "_")) for key in keys]
+        # Objects are fetched concurrently, each one also splits into concurrent ranged GETs
+        with ThreadPoolExecutor(max_workers=max(1 , min(len(keys) , self.max_workers))) as pool:
+            return list(pool.map(self.download , keys , paths))
+
+    def iter_bytes(self , key):
+        # Streams the object in order while up to max_workers parts are fetched ahead; size and
+        # checksum are checked once the last part was read, a corrupt download raises at the end
+        head = self.store.head(key)
+        size = head["size"]
+        digest = hashlib.md5()
+        received = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = []
+            parts = iter(self._parts(size))
+            for start , end in parts:
+                futures.append(pool.submit(self.store.get_range , key , start , end))
+                if len(futures) >= self.max_workers:
+                    break
+            while futures:
+                data = futures.pop(0).result()
+                next_part = next(parts , None)
+                if next_part is not None:
+                    futures.append(pool.submit(self.store.get_range , key , *next_part))
+                digest.update(data)
+                received += len(data)
+                yield data
+        self._check_digest(digest , received , head , key)
+
+
+class ChunkStream(io.RawIOBase):
+    """File-like reader over an iterator of byte chunks, so pandas/csv can consume a download directly."""
+
+    def __init__(self , chunks):
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self , buffer):
+        while not len(self._buffer):
+            chunk = next(self._chunks , None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+        n = min(len(buffer) , len(self._buffer))
+        buffer[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
+def iter_file(path , block_size=1 << 20):
+    with open(path , "rb") as f:
+        yield from iter(lambda: f.read(block_size) , b"")
+
+
+def concat_csv(streams):
+    # Joins CSV objects into one: the header of every object but the first is dropped and a newline
+    # is added after an object whose last line is not terminated, so rows never run together
+    last = b"\n"
+    for index , chunks in enumerate(streams):
+        if last != b"\n":
+            yield b"\n"
+            last = b"\n"
+        for chunk in (chunks if index == 0 else skip_header(chunks)):
+            if chunk:
+                last = chunk[-1:]
+                yield chunk
+
+
+def skip_header(chunks):
+    # Drops everything up to and including the first newline, used for every CSV object but the first
+    chunks = iter(chunks)
+    for chunk in chunks:
+        newline = chunk.find(b"\n")
+        if newline >= 0:
+            yield chunk[newline + 1:]
+            break
+    yield from chunks
@@ -0,0 +1,167 @@
+import csv
+import io
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+TARGET_COLUMN = "Survived"
+
+
+def get_feature_columns(config):
+    return [feature for feature in config["data_processing"]["selected_features"] if feature != TARGET_COLUMN]
+
+
+def get_feature_dtype(config):
+    # Dtype of the matrices the model was trained on, serving casts to it so it sees the same values
+    dtypes = config["data_processing"].get("feature_dtypes")
+    if not dtypes:
+        return np.dtype(np.float64)
+    return np.result_type(*[np.dtype(dtypes[name]) for name in get_feature_columns(config)] , np.float32)
+
+
+def _column_to_array(name , values , n_rows):
+    if len(values) != n_rows:
+        raise ValueError(f"Column '{name}' has {len(values)} values, expected {n_rows}")
+    try:
+        column = np.asarray(values , dtype=np.float64)
+    except (TypeError , ValueError):
+        raise ValueError(f"Column '{name}' contains non numeric values")
+
+    if column.ndim != 1:
+        raise ValueError(f"Column '{name}' must be a flat list of numbers")
+    if not np.isfinite(column).all():
+        raise ValueError(f"Column '{name}' contains missing or infinite values")
+    return column
+
+
+def columns_to_matrix(columns , feature_columns):
+    missing = [name for name in feature_columns if name not in columns]
+    if missing:
+        raise ValueError(f"Missing feature columns : {missing}")
+    for name in feature_columns:
+        if not isinstance(columns[name] , (list , tuple)):
+            raise ValueError(f"Column '{name}' must be a list of values")
+
+    n_rows = len(columns[feature_columns[0]])
+    if n_rows == 0:
+        raise ValueError("No rows to score")
+
+    # One contiguous block filled column by column in the training feature order
+    features = np.empty((n_rows , len(feature_columns)) , dtype=np.float64)
+    for index , name in enumerate(feature_columns):
+        features[:, index] = _column_to_array(name , columns[name] , n_rows)
+    return features
+
+
+def records_to_matrix(records , feature_columns):
+    if not isinstance(records , list) or not records:
+        raise ValueError("Expected a non empty list of records")
+    try:
+        columns = {name : [record[name] for record in records] for name in feature_columns}
+    except KeyError as e:
+        raise ValueError(f"Missing feature column : {e.args[0]}")
+    except TypeError:
+        raise ValueError("Every record must be an object of feature values")
+    return columns_to_matrix(columns , feature_columns)
+
+
+def csv_to_matrix(stream , feature_columns):
+    reader = csv.reader(io.TextIOWrapper(stream , encoding="utf-8"))
+    try:
+        header = next(reader)
+    except StopIteration:
+        raise ValueError("CSV file is empty")
+
+    positions = {name.strip() : index for index , name in enumerate(header)}
+    missing = [name for name in feature_columns if name not in positions]
+    if missing:
+        raise ValueError(f"Missing feature columns : {missing}")
+
+    rows = [row for row in reader if row]
+    try:
+        columns = {name : [row[positions[name]] for row in rows] for name in feature_columns}
+    except IndexError:
+        raise ValueError("CSV rows must have as many fields as the header")
+    return columns_to_matrix(columns , feature_columns)
+
+
+def json_to_matrix(payload , feature_columns):
+    if isinstance(payload , list):
+        return records_to_matrix(payload , feature_columns)
+    if isinstance(payload , dict) and "records" in payload:
+        return records_to_matrix(payload["records"] , feature_columns)
+    if isinstance(payload , dict) and "columns" in payload:
+        if not isinstance(payload["columns"] , dict):
+            raise ValueError("'columns' must map feature names to lists of values")
+        return columns_to_matrix(payload["columns"] , feature_columns)
+    raise ValueError("Expected a list of records or an object with 'records' or 'columns'")
+
+
+def _check_raw_value(name , value):
+    # Raw fields hold one value each; nested lists or objects are rejected instead of being coerced
+    if value is not None and not isinstance(value , (str , int , float)):
+        raise ValueError(f"Field '{name}' must be a single value")
+
+
+def raw_json_to_columns(payload , raw_columns , required_columns=()):
+    # Raw passenger records may leave out optional fields such as Cabin, they are scored as missing;
+    # a record without one of required_columns is rejected
+    if isinstance(payload , dict) and "records" in payload:
+        payload = payload["records"]
+    if isinstance(payload , dict) and "columns" in payload:
+        columns = payload["columns"]
+        if not isinstance(columns , dict) or not columns:
+            raise ValueError("'columns' must map raw column names to lists of values")
+        for name , values in columns.items():
+            if not isinstance(values , list):
+                raise ValueError(f"Column '{name}' must be a list of values")
+        missing = [name for name in required_columns if name not in columns]
+        if missing:
+            raise ValueError(f"Missing required raw columns : {missing}")
+        # Row count from a required column, every other column must match it before rows are counted
+        n_rows = len(columns[required_columns[0]] if required_columns else next(iter(columns.values())))
+        for name in raw_columns:
+            if name in columns and len(columns[name]) != n_rows:
+                raise ValueError(f"Column '{name}' has {len(columns[name])} values, expected {n_rows}")
+        if n_rows == 0:
+            raise ValueError("No rows to score")
+        for name in raw_columns:
+            for value in columns.get(name , []):
+                _check_raw_value(name , value)
+        return {name : columns.get(name , [None] * n_rows) for name in raw_columns}
+    if not isinstance(payload , list) or not payload:
+        raise ValueError("Expected a list of records or an object with 'records' or 'columns'")
+    if not all(isinstance(record , dict) for record in payload):
+        raise ValueError("Every record must be an object of raw passenger values")
+    for index , record in enumerate(payload):
+        missing = [name for name in required_columns if name not in record]
+        if missing:
+            raise ValueError(f"Record {index} is missing required fields : {missing}")
+        for name in raw_columns:
+            _check_raw_value(name , record.get(name))
+    return {name : [record.get(name) for record in payload] for name in raw_columns}
+
+
+def raw_csv_to_columns(stream , raw_columns , required_columns=()):
+    reader = csv.DictReader(io.TextIOWrapper(stream , encoding="utf-8"))
+    if reader.fieldnames is None:
+        raise ValueError("CSV file is empty")
+    missing = [name for name in required_columns if name not in reader.fieldnames]
+    if missing:
+        raise ValueError(f"Missing required raw columns : {missing}")
+    rows = list(reader)
+    if not rows:
+        raise ValueError("No rows to score")
+    for index , row in enumerate(rows):
+        # DictReader files extra fields under None and fills missing ones with None
+        if None in row or None in row.values():
+            raise ValueError(f"CSV row {index + 1} does not have as many fields as the header")
+    return {name : [row.get(name) for row in rows] for name in raw_columns}
+
+
+def predict_batch(model , features):
+    # A single predict_proba call; the label is derived from it instead of calling predict again
+    probabilities = model.predict_proba(features)
+    predictions = np.asarray(model.classes_)[probabilities.argmax(axis=1)]
+    return predictions , probabilities[:, 1]
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PredictionCache:
+    """
+    Thread safe LRU cache with optional TTL for per-row predictions.
+
+    Keys are the exact feature tuples, per model version (namespace): a prediction is only ever served
+    for the version that computed it. retain(versions) drops the entries of versions no longer served.
+    """
+
+    def __init__(self , max_size=10000 , ttl_seconds=None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get_many(self , keys):
+        now = time.monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+
+                if entry is None:
+                    self.misses += 1
+                    values.append(None)
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    values.append(entry[0])
+        return values
+
+    def put_many(self , keys , values):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            for key , value in zip(keys , values):
+                self._entries[key] = (value , expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def retain(self , namespaces):
+        # Called when the served model versions change, entries of every other version are dropped
+        namespaces = set(namespaces)
+        with self._lock:
+            stale = [key for key in self._entries if key[0] not in namespaces]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self.invalidations += 1
+                logger.info(f"Dropped {len(stale)} cached rows of model versions no longer served")
+
+    def predict(self , features , score_fn , namespace=None):
+        # Only rows missing from the cache are sent to score_fn, in one call. namespace (the model
+        # version) keeps predictions of different models apart.
+        keys = [(namespace , tuple(row)) for row in features.tolist()]
+        cached = self.get_many(keys)
+        missing = [i for i , value in enumerate(cached) if value is None]
+
+        if missing:
+            predictions , probabilities = score_fn(features[missing])
+            fresh = list(zip(predictions.tolist() , probabilities.tolist()))
+            self.put_many([keys[i] for i in missing] , fresh)
+            for i , value in zip(missing , fresh):
+                cached[i] = value
+
+        predictions , probabilities = zip(*cached)
+        return np.array(predictions) , np.array(probabilities , dtype=np.float64)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
@@ -0,0 +1,180 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+_active_profiler = None
+
+
+def _current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError , ValueError):
+        return None
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+
+class StageProfiler:
+    """
+    Opt-in wall/CPU time, memory and cProfile measurements of named pipeline stages.
+
+    Stages nest ("processing" > "processing.balance"). For each one the report holds wall and CPU
+    seconds, the tracemalloc peak of Python allocations (numpy included) during the stage, the
+    resident set size at its end and the process' RSS high-water mark so far. With cprofile on, the
+    outermost profiled stage also gets a .prof file and its top functions by cumulative time.
+    """
+
+    def __init__(self , output_dir , cprofile=False , top_functions=15):
+        self.output_dir = output_dir
+        self.cprofile = cprofile
+        self.top_functions = top_functions
+        self.run_id = datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.stages = []
+        self._stack = []
+        self._profiling = False
+
+    def activate(self):
+        # Makes profile_stage() calls anywhere in the pipeline record into this profiler
+        global _active_profiler
+        _active_profiler = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return self
+
+    def deactivate(self):
+        global _active_profiler
+        if _active_profiler is self:
+            _active_profiler = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self , name):
+        entry = {"stage": name , "parent": self._stack[-1]["stage"] if self._stack else None}
+        if self._stack:
+            # The parent's peak so far would be lost by the reset below, fold it in first
+            parent = self._stack[-1]
+            parent["_children_peak"] = max(parent["_children_peak"] , tracemalloc.get_traced_memory()[1])
+        entry["_children_peak"] = 0
+        tracemalloc.reset_peak()
+        self._stack.append(entry)
+
+        profile = None
+        if self.cprofile and not self._profiling:
+            profile = cProfile.Profile()
+            self._profiling = True
+            profile.enable()
+
+        wall_start , cpu_start = time.perf_counter() , time.process_time()
+        try:
+            yield entry
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            if profile is not None:
+                profile.disable()
+                self._profiling = False
+            self._stack.pop()
+
+            peak = max(entry.pop("_children_peak") , tracemalloc.get_traced_memory()[1])
+            if self._stack:
+                self._stack[-1]["_children_peak"] = max(self._stack[-1]["_children_peak"] , peak)
+            entry.update({
+                "wall_s": round(wall , 4),
+                "cpu_s": round(cpu , 4),
+                "cpu_utilization": round(cpu / wall , 3) if wall > 0 else None,
+                "tracemalloc_peak_mb": round(peak / 2 ** 20 , 2),
+                "rss_mb": round(_current_rss_mb() or 0.0 , 1),
+                "max_rss_mb": round(_max_rss_mb() , 1)
+            })
+            if profile is not None:
+                entry.update(self._save_profile(name , profile))
+            self.stages.append(entry)
+            logger.info(f"Stage {name} : {entry['wall_s']}s wall , {entry['cpu_s']}s CPU , "
+                        f"{entry['tracemalloc_peak_mb']} MB traced peak")
+
+    def _save_profile(self , name , profile):
+        os.makedirs(self.run_dir , exist_ok=True)
+        path = os.path.join(self.run_dir , f"{name}.prof")
+        profile.dump_stats(path)
+        stream = io.StringIO()
+        stats = pstats.Stats(profile , stream=stream).sort_stats("cumulative")
+        top = []
+        for (filename , line , function) , (_ , calls , total , cumulative , _) in list(stats.stats.items()):
+            top.append({"function": f"{os.path.basename(filename)}:{line}({function})" , "calls": calls ,
+                        "tottime_s": round(total , 4) , "cumtime_s": round(cumulative , 4)})
+        top.sort(key=lambda item: item["cumtime_s"] , reverse=True)
+        return {"profile_path": path , "top_functions": top[:self.top_functions]}
+
+    @property
+    def run_dir(self):
+        return os.path.join(self.output_dir , self.run_id)
+
+    def report(self):
+        return {
+            "run_id": self.run_id,
+            "python": sys.version.split()[0],
+            "cpu_count": os.cpu_count(),
+            "stages": self.stages
+        }
+
+    def write_report(self):
+        try:
+            os.makedirs(self.run_dir , exist_ok=True)
+            path = os.path.join(self.run_dir , "report.json")
+            with open(path , "w") as f:
+                json.dump(self.report() , f , indent=2)
+            logger.info(f"Profile report written to {path}")
+            return path
+
+        except Exception as e:
+            logger.error(f"Error while writing profile report {e}")
+            raise CustomException("Failed to write profile report" , e)
+
+    def log_to_mlflow(self , run_id=None):
+        # Into the given (training) run, or a run of its own when training was skipped
+        import mlflow
+        try:
+            path = self.write_report()
+            metrics = {}
+            for entry in self.stages:
+                for key in ("wall_s" , "cpu_s" , "tracemalloc_peak_mb" , "max_rss_mb"):
+                    metrics[f"profile.{entry['stage']}.{key}"] = entry[key]
+            with mlflow.start_run(run_id=run_id , run_name=None if run_id else "pipeline-profile"):
+                mlflow.log_metrics(metrics)
+                mlflow.log_artifact(path , artifact_path="profile")
+                for entry in self.stages:
+                    if "profile_path" in entry:
+                        mlflow.log_artifact(entry["profile_path"] , artifact_path="profile")
+            logger.info("Profile summary logged to MLflow")
+
+        except Exception as e:
+            logger.error(f"Error while logging profile to MLflow {e}")
+            raise CustomException("Failed to log profile to MLflow" , e)
+
+
+@contextmanager
+def profile_stage(name):
+    # Records into the active StageProfiler, does nothing when profiling is off
+    if _active_profiler is None:
+        yield None
+        return
+    with _active_profiler.stage(name) as entry:
+        yield entry
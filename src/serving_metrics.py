@@ -0,0 +1,184 @@
+import bisect
+import math
+import threading
+import time
+
+# Upper bounds in seconds, from 50µs (cache hits, compiled single rows) to 10s
+LATENCY_BUCKETS = (0.00005 , 0.0001 , 0.00025 , 0.0005 , 0.001 , 0.0025 , 0.005 , 0.01 , 0.025 , 0.05 , 0.1 ,
+                   0.25 , 0.5 , 1.0 , 2.5 , 5.0 , 10.0)
+ROW_BUCKETS = (1 , 2 , 4 , 8 , 16 , 32 , 64 , 128 , 256 , 512 , 1024 , 4096 , 16384 , 65536)
+
+
+def _escape(value):
+    return str(value).replace("\\" , "\\\\").replace("\n" , "\\n").replace('"' , '\\"')
+
+
+def _format_labels(names , values , extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name , value in list(zip(names , values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value , float) else str(value)
+
+
+class _Timer:
+    __slots__ = ("_child" , "_start")
+
+    def __init__(self , child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self , exc_type , exc_value , traceback):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _CounterChild:
+    __slots__ = ("value" , "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self , amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets" , "counts" , "sum" , "count" , "_lock")
+
+    def __init__(self , buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self , value):
+        index = bisect.bisect_left(self.buckets , value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self , name , help_text , labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self , *values):
+        # Children are created once per label combination, later lookups are a plain dict get
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values , self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}" , f"# TYPE {self.name} {self.kind}"]
+        for values , child in sorted(self._children.items()):
+            lines.extend(self._render_child(values , child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self , amount=1):
+        self.labels().inc(amount)
+
+    def _render_child(self , values , child):
+        return [f"{self.name}{_format_labels(self.labelnames , values)} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self , name , help_text , labelnames=() , buckets=LATENCY_BUCKETS):
+        super().__init__(name , help_text , labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self , value):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _render_child(self , values , child):
+        with child._lock:
+            counts , total , count = list(child.counts) , child.sum , child.count
+        lines = []
+        cumulative = 0
+        for bound , bucket_count in zip(self.buckets + (math.inf ,) , counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.labelnames , values , [("le" , _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames , values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics rendered in the Prometheus text format.
+
+    Counters and histograms are updated under a per series lock (a few hundred nanoseconds), so
+    instrumentation can stay on in production. Gauges are collected at scrape time from callbacks
+    returning {label values tuple: value}, for state that already lives elsewhere (model version,
+    cache counters). With several gunicorn workers every process keeps and serves its own series.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._gauges = []
+
+    def counter(self , name , help_text , labelnames=()):
+        metric = Counter(name , help_text , labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self , name , help_text , labelnames=() , buckets=LATENCY_BUCKETS):
+        metric = Histogram(name , help_text , labelnames , buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge_callback(self , name , help_text , labelnames , callback):
+        self._gauges.append((name , help_text , tuple(labelnames) , callback))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for name , help_text , labelnames , callback in self._gauges:
+            lines.extend([f"# HELP {name} {help_text}" , f"# TYPE {name} gauge"])
+            for values , value in sorted(callback().items()):
+                lines.append(f"{name}{_format_labels(labelnames , values)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
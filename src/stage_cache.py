@@ -0,0 +1,141 @@
+import ast
+import hashlib
+import json
+import os
+from datetime import datetime
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path , "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE) , b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _describe(value):
+    # Frozen scipy distributions (model_params.py) have no stable repr, describe them by name and arguments
+    if hasattr(value , "dist") and hasattr(value , "args"):
+        return {"distribution": value.dist.name , "args": list(value.args) , "kwds": value.kwds}
+    if hasattr(value , "item"):
+        return value.item()
+    return repr(value)
+
+
+def hash_value(value):
+    return hashlib.sha256(json.dumps(value , sort_keys=True , default=_describe).encode()).hexdigest()
+
+
+def hash_sources(paths):
+    return {path : hash_file(path) for path in paths}
+
+
+def imported_sources(paths , packages=("src" , "utils" , "config") , ignored=()):
+    # paths plus the files of every module of packages they import, followed transitively, including
+    # imports inside functions; ignored files are left out and not followed
+    sources = set()
+    pending = [path for path in paths if path not in ignored]
+    while pending:
+        path = pending.pop()
+        if path in sources:
+            continue
+        sources.add(path)
+        with open(path) as f:
+            tree = ast.parse(f.read() , filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node , ast.ImportFrom) and node.module and node.level == 0:
+                # "from src import x" names the module x, "from src.x import y" the module src.x
+                names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+            elif isinstance(node , ast.Import):
+                names = [alias.name for alias in node.names]
+            else:
+                continue
+            for name in names:
+                candidate = name.replace("." , "/") + ".py"
+                if name.split(".")[0] in packages and candidate not in ignored and os.path.exists(candidate):
+                    pending.append(candidate)
+    return sorted(sources)
+
+
+class StageCache:
+    """
+    Skips pipeline stages whose inputs did not change since their outputs were written.
+
+    Each stage records a manifest with the fingerprint of its inputs and the size, mtime and hash of
+    its outputs. A stage is reused when the fingerprint matches and every output is still intact.
+    """
+
+    def __init__(self , manifest_dir):
+        self.manifest_dir = manifest_dir
+        os.makedirs(self.manifest_dir , exist_ok=True)
+
+    def _manifest_path(self , stage):
+        return os.path.join(self.manifest_dir , f"{stage}.json")
+
+    def _load_manifest(self , stage):
+        path = self._manifest_path(stage)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    @staticmethod
+    def _describe_output(path):
+        stat = os.stat(path)
+        return {"size": stat.st_size , "mtime_ns": stat.st_mtime_ns , "sha256": hash_file(path)}
+
+    @staticmethod
+    def _output_is_intact(path , recorded):
+        if not os.path.exists(path):
+            return False
+        stat = os.stat(path)
+        if stat.st_size != recorded["size"]:
+            return False
+        # Same size and mtime is trusted, otherwise fall back to the content hash
+        return stat.st_mtime_ns == recorded["mtime_ns"] or hash_file(path) == recorded["sha256"]
+
+    def is_fresh(self , stage , fingerprint , outputs):
+        manifest = self._load_manifest(stage)
+        if manifest is None or manifest["fingerprint"] != fingerprint:
+            return False
+        if sorted(manifest["outputs"]) != sorted(outputs):
+            return False
+        return all(self._output_is_intact(path , manifest["outputs"][path]) for path in outputs)
+
+    def record(self , stage , fingerprint , inputs , outputs):
+        manifest = {
+            "stage": stage,
+            "fingerprint": fingerprint,
+            "inputs": inputs,
+            "outputs": {path : self._describe_output(path) for path in outputs},
+            "completed_at": datetime.now().isoformat()
+        }
+        tmp_path = self._manifest_path(stage) + ".tmp"
+        with open(tmp_path , "w") as f:
+            json.dump(manifest , f , indent=2 , sort_keys=True , default=_describe)
+        os.replace(tmp_path , self._manifest_path(stage))
+
+    def run(self , stage , inputs , outputs , fn , force=False):
+        # inputs is any JSON-able description of what the stage depends on; returns "reused" or "ran"
+        try:
+            fingerprint = hash_value(inputs)
+            if not force and self.is_fresh(stage , fingerprint , outputs):
+                logger.info(f"Stage {stage} is up to date, reusing {outputs}")
+                return "reused"
+
+            logger.info(f"Running stage {stage}" + (" (forced)" if force else ""))
+            fn()
+            self.record(stage , fingerprint , inputs , outputs)
+            return "ran"
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logger.error(f"Error while running stage {stage} {e}")
+            raise CustomException(f"Failed to run stage {stage}" , e)
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch with bounded memory (KLL style compactors).
+
+    Values are kept exactly until `capacity` of them have been seen, so small inputs get exact
+    quantiles (matching pandas' median). Beyond that every full level is sorted and half of it,
+    at a random offset, is promoted to the next level with twice the weight. Memory stays around
+    capacity * log2(n / capacity) values.
+    """
+
+    def __init__(self , capacity=100000 , seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0 , dtype=np.float64)]
+        self.count = 0
+        self.compacted = False
+        self._rng = np.random.default_rng(seed)
+
+    def update(self , values):
+        values = np.asarray(values , dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+        self.count += values.size
+        self.levels[0] = np.concatenate([self.levels[0] , values])
+        self._compress()
+        return self
+
+    def merge(self , other):
+        for level , items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0 , dtype=np.float64))
+            self.levels[level] = np.concatenate([self.levels[level] , items])
+        self.count += other.count
+        self.compacted = self.compacted or other.compacted
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self.capacity:
+                self.compacted = True
+                items = np.sort(items)
+                # An odd item out stays at this level so total weight is preserved exactly
+                keep = items[-1:] if items.size % 2 else items[:0]
+                pairs = items[:items.size - keep.size]
+                promoted = pairs[self._rng.integers(2)::2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0 , dtype=np.float64))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1] , promoted])
+                self.levels[level] = keep
+            level += 1
+
+    def quantile(self , q):
+        if self.count == 0:
+            return float("nan")
+        if not self.compacted:
+            return float(np.quantile(self.levels[0] , q))
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items.size , 2 ** level , dtype=np.float64) for level , items in enumerate(self.levels)])
+        order = np.argsort(values , kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative , q * cumulative[-1])
+        return float(values[order][min(index , values.size - 1)])
+
+    def median(self):
+        return self.quantile(0.5)
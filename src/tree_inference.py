@@ -0,0 +1,201 @@
+import os
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# LightGBM treats |x| <= kZeroThreshold as zero when routing "Zero" missing values
+K_ZERO_THRESHOLD = 1e-35
+MISSING_TYPES = {"None": 0 , "Zero": 1 , "NaN": 2}
+
+# Upper bound on rows x trees evaluated at once, keeps the traversal state small for large batches
+MAX_BLOCK_ELEMENTS = 1 << 21
+
+
+class CompiledTreeModel:
+    """
+    LightGBM binary classifier flattened into NumPy node arrays.
+
+    Every tree is stored in the same set of arrays; leaves point to themselves so all trees can be
+    walked together for a fixed number of steps (the depth of the deepest tree).
+    Only needs numpy at prediction time.
+    """
+
+    def __init__(self , feature , threshold , left , right , value , default_left , missing_type ,
+                 roots , classes , sigmoid , average_output , feature_names):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.roots = roots
+        self.classes_ = classes
+        self.sigmoid = float(sigmoid)
+        self.average_output = bool(average_output)
+        self.feature_names = list(feature_names)
+
+        self.n_features_in_ = len(self.feature_names)
+        self.depth = self._max_depth()
+        self._routes_nan = bool((missing_type == MISSING_TYPES["NaN"]).any())
+        self._routes_missing = self._routes_nan or bool((missing_type == MISSING_TYPES["Zero"]).any())
+
+        # intp copies used for fancy indexing on the hot path
+        self._children = np.stack([left , right] , axis=1).ravel().astype(np.intp)
+        self._feature = feature.astype(np.intp)
+        self._roots = roots.astype(np.intp)
+
+    @classmethod
+    def from_booster(cls , booster , classes=(0 , 1)):
+        dump = booster.dump_model()
+
+        if dump["num_class"] != 1 or not dump["objective"].startswith("binary"):
+            raise ValueError(f"Only binary objectives can be compiled, got '{dump['objective']}'")
+
+        sigmoid = 1.0
+        for token in dump["objective"].split()[1:]:
+            if token.startswith("sigmoid:"):
+                sigmoid = float(token.split(":")[1])
+
+        nodes = []
+        roots = []
+        for tree in dump["tree_info"]:
+            roots.append(cls._flatten(tree["tree_structure"] , nodes))
+
+        feature = np.array([node[0] for node in nodes] , dtype=np.int32)
+        threshold = np.array([node[1] for node in nodes] , dtype=np.float64)
+        left = np.array([node[2] for node in nodes] , dtype=np.int32)
+        right = np.array([node[3] for node in nodes] , dtype=np.int32)
+        value = np.array([node[4] for node in nodes] , dtype=np.float64)
+        default_left = np.array([node[5] for node in nodes] , dtype=bool)
+        missing_type = np.array([node[6] for node in nodes] , dtype=np.int8)
+
+        logger.info(f"Compiled {len(roots)} trees into {len(nodes)} nodes")
+        return cls(feature , threshold , left , right , value , default_left , missing_type ,
+                   np.array(roots , dtype=np.int32) , np.asarray(classes) , sigmoid ,
+                   dump.get("average_output" , False) , dump["feature_names"])
+
+    @classmethod
+    def from_model(cls , model):
+        return cls.from_booster(model.booster_ , classes=model.classes_)
+
+    @staticmethod
+    def _flatten(node , nodes):
+        # Iterative pre-order walk, children are patched once their index is known
+        root = len(nodes)
+        stack = [(node , None , None)]
+        while stack:
+            current , parent , side = stack.pop()
+            index = len(nodes)
+            if "split_index" in current:
+                if current["decision_type"] != "<=":
+                    raise ValueError(f"Unsupported split type '{current['decision_type']}'")
+                nodes.append([current["split_feature"] , current["threshold"] , -1 , -1 , 0.0 ,
+                              current["default_left"] , MISSING_TYPES[current["missing_type"]]])
+                stack.append((current["right_child"] , index , 3))
+                stack.append((current["left_child"] , index , 2))
+            else:
+                nodes.append([0 , np.inf , index , index , current["leaf_value"] , True , 0])
+            if parent is not None:
+                nodes[parent][side] = index
+        return root
+
+    def _max_depth(self):
+        depth = 0
+        frontier = self.roots
+        while True:
+            splits = frontier[self.left[frontier] != frontier]
+            if splits.size == 0:
+                return depth
+            frontier = np.concatenate([self.left[splits] , self.right[splits]])
+            depth += 1
+
+    def _route(self , fval , positions):
+        # Children are stored as (left, right) pairs so the next node is children[2 * node + go_right]
+        if self._routes_missing:
+            fval = np.where(np.isnan(fval) & (self.missing_type[positions] != MISSING_TYPES["NaN"]) , 0.0 , fval)
+            missing_type = self.missing_type[positions]
+            is_missing = ((missing_type == MISSING_TYPES["Zero"]) & (np.abs(fval) <= K_ZERO_THRESHOLD)) | \
+                         ((missing_type == MISSING_TYPES["NaN"]) & np.isnan(fval))
+            go_right = np.where(is_missing , ~self.default_left[positions] , ~(fval <= self.threshold[positions]))
+        else:
+            go_right = fval > self.threshold[positions]
+        return self._children[2 * positions + go_right]
+
+    def _prepare(self , X):
+        X = np.ascontiguousarray(X , dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1 , -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        if not self._routes_nan and np.isnan(X).any():
+            # Without NaN routing LightGBM scores missing values as zero
+            X = np.where(np.isnan(X) , 0.0 , X)
+        return X
+
+    def _raw_row(self , row):
+        positions = self._roots
+        for _ in range(self.depth):
+            positions = self._route(row[self._feature[positions]] , positions)
+        return self.value[positions].sum()
+
+    def _raw_block(self , X):
+        # Rows are walked through a flat view, each row's features start at row * n_features
+        offsets = (np.arange(X.shape[0] , dtype=np.intp) * X.shape[1])[:, None]
+        flat = X.ravel()
+        positions = np.broadcast_to(self._roots , (X.shape[0] , self._roots.shape[0]))
+        for _ in range(self.depth):
+            positions = self._route(flat[offsets + self._feature[positions]] , positions)
+        return self.value[positions].sum(axis=1)
+
+    def predict_raw(self , X):
+        X = self._prepare(X)
+        if X.shape[0] == 1:
+            raw = np.array([self._raw_row(X[0])])
+        else:
+            block = max(1 , MAX_BLOCK_ELEMENTS // max(1 , self.roots.shape[0]))
+            raw = np.concatenate([self._raw_block(X[start:start + block]) for start in range(0 , X.shape[0] , block)])
+        if self.average_output:
+            raw = raw / self.roots.shape[0]
+        return raw
+
+    def predict_proba(self , X):
+        positive = 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+        return np.column_stack([1.0 - positive , positive])
+
+    def predict(self , X):
+        positive = 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+        return self.classes_[(positive > 0.5).astype(np.intp)]
+
+    def save(self , path):
+        try:
+            os.makedirs(os.path.dirname(path) , exist_ok=True)
+            # Written next to the target and renamed over it, readers never see a partial file
+            tmp_path = path + ".tmp"
+            with open(tmp_path , "wb") as f:
+                np.savez(f , feature=self.feature , threshold=self.threshold , left=self.left , right=self.right ,
+                         value=self.value , default_left=self.default_left , missing_type=self.missing_type ,
+                         roots=self.roots , classes=self.classes_ , sigmoid=np.float64(self.sigmoid) ,
+                         average_output=np.bool_(self.average_output) , feature_names=np.array(self.feature_names))
+            os.replace(tmp_path , path)
+            logger.info(f"Compiled model saved to {path}")
+
+        except Exception as e:
+            logger.error(f"Error while saving compiled model {e}")
+            raise CustomException("Failed to save compiled model" , e)
+
+    @classmethod
+    def load(cls , path):
+        try:
+            with np.load(path , allow_pickle=False) as data:
+                model = cls(data["feature"] , data["threshold"] , data["left"] , data["right"] , data["value"] ,
+                            data["default_left"] , data["missing_type"] , data["roots"] , data["classes"] ,
+                            data["sigmoid"] , data["average_output"] , data["feature_names"].tolist())
+            logger.info(f"Compiled model loaded from {path}")
+            return model
+
+        except Exception as e:
+            logger.error(f"Error while loading compiled model {e}")
+            raise CustomException("Failed to load compiled model" , e)
@@ -0,0 +1,132 @@
+import json
+import struct
+import numpy as np
+
+# Binary payloads accepted by /predict/batch, answered in the same format
+ARROW_STREAM_MIMETYPE = "application/vnd.apache.arrow.stream"
+MATRIX_MIMETYPE = "application/x-titanic-matrix"
+
+# Matrix layout: MATRIX_MAGIC, uint32 little-endian header length, a JSON header
+# {"columns": [...], "dtype": "<f4"} padded with spaces to a multiple of 8 bytes, then the row-major
+# little-endian matrix. The number of rows follows from the body length.
+MATRIX_MAGIC = b"TMX1"
+MATRIX_DTYPES = {"<f4" , "<f8"}
+_PREFIX = struct.Struct("<4sI")
+
+
+def encode_matrix(matrix , columns , **metadata):
+    matrix = np.asarray(matrix)
+    dtype = matrix.dtype.newbyteorder("<").str
+    if dtype not in MATRIX_DTYPES:
+        matrix , dtype = matrix.astype("<f4") , "<f4"
+    header = json.dumps(dict(metadata , columns=list(columns) , dtype=dtype)).encode()
+    header += b" " * (-(_PREFIX.size + len(header)) % 8)
+    body = np.ascontiguousarray(matrix , dtype=dtype).tobytes()
+    return _PREFIX.pack(MATRIX_MAGIC , len(header)) + header + body
+
+
+def decode_matrix(body , feature_columns=None):
+    # Returns (matrix, header); the matrix is a read-only view on body, nothing is parsed or copied
+    # unless the columns have to be reordered into feature_columns
+    if len(body) < _PREFIX.size:
+        raise ValueError("Matrix payload is too short")
+    magic , header_length = _PREFIX.unpack_from(body)
+    if magic != MATRIX_MAGIC:
+        raise ValueError("Matrix payload does not start with the TMX1 magic")
+    try:
+        header = json.loads(bytes(body[_PREFIX.size:_PREFIX.size + header_length]))
+        columns , dtype = header["columns"] , header["dtype"]
+    except (ValueError , KeyError , TypeError):
+        raise ValueError("Matrix header must be JSON with 'columns' and 'dtype'")
+    if not isinstance(columns , list) or not all(isinstance(name , str) for name in columns):
+        raise ValueError("Matrix header 'columns' must be a list of column names")
+    if not isinstance(dtype , str) or dtype not in MATRIX_DTYPES:
+        raise ValueError(f"Matrix dtype must be one of {sorted(MATRIX_DTYPES)}")
+
+    offset = _PREFIX.size + header_length
+    row_bytes = np.dtype(dtype).itemsize * len(columns)
+    if not columns or (len(body) - offset) % row_bytes:
+        raise ValueError(f"Matrix body is not a whole number of rows of {len(columns)} columns")
+    matrix = np.frombuffer(body , dtype=dtype , offset=offset).reshape(-1 , len(columns))
+    if feature_columns is None:
+        return matrix , header
+    return _select(matrix , columns , feature_columns) , header
+
+
+def _select(matrix , columns , feature_columns):
+    if columns == list(feature_columns):
+        return matrix
+    missing = [name for name in feature_columns if name not in columns]
+    if missing:
+        raise ValueError(f"Missing feature columns : {missing}")
+    return matrix[:, [columns.index(name) for name in feature_columns]]
+
+
+def arrow_to_matrix(body , feature_columns):
+    # Either one column per feature (copied once into a row-major matrix) or a single fixed size list
+    # column "features" with the names in the schema metadata, which is mapped without any copy
+    import pyarrow as pa
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream : {e}")
+    if table.num_rows == 0:
+        raise ValueError("No rows to score")
+
+    numeric = lambda arrow_type: pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+    if table.column_names == ["features"] and pa.types.is_fixed_size_list(table.schema.field("features").type):
+        if not numeric(table.schema.field("features").type.value_type):
+            raise ValueError("Column 'features' must hold numbers")
+        metadata = table.schema.metadata or {}
+        columns = json.loads(metadata.get(b"columns" , b"[]"))
+        column = table.column("features").combine_chunks()
+        if column.null_count:
+            raise ValueError("Column 'features' contains missing rows")
+        values = column.flatten().to_numpy(zero_copy_only=False)
+        if not isinstance(columns , list) or len(columns) != column.type.list_size:
+            raise ValueError("Schema metadata 'columns' must name every value of a 'features' row")
+        return _select(values.reshape(-1 , column.type.list_size) , columns , feature_columns)
+
+    missing = [name for name in feature_columns if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Missing feature columns : {missing}")
+    invalid = [name for name in feature_columns if not numeric(table.schema.field(name).type)]
+    if invalid:
+        raise ValueError(f"Feature columns must hold numbers : {invalid}")
+    dtype = np.result_type(*[table.schema.field(name).type.to_pandas_dtype() for name in feature_columns] , np.float32)
+    matrix = np.empty((table.num_rows , len(feature_columns)) , dtype=dtype)
+    for index , name in enumerate(feature_columns):
+        column = table.column(name)
+        if column.null_count:
+            raise ValueError(f"Column '{name}' contains missing values")
+        matrix[:, index] = column.to_numpy()
+    return matrix
+
+
+def predictions_to_arrow(predictions , probabilities , **metadata):
+    import pyarrow as pa
+    table = pa.table({"prediction": np.asarray(predictions) , "probability": np.asarray(probabilities)})
+    table = table.replace_schema_metadata({key : str(value) for key , value in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink , table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_payload(mimetype , body , feature_columns):
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        features = arrow_to_matrix(body , feature_columns)
+    else:
+        features , _ = decode_matrix(body , feature_columns)
+    if features.shape[0] == 0:
+        raise ValueError("No rows to score")
+    if not np.isfinite(features).all():
+        raise ValueError("Features contain missing or infinite values")
+    return features
+
+
+def encode_predictions(mimetype , predictions , probabilities , model_version):
+    if mimetype == ARROW_STREAM_MIMETYPE:
+        return predictions_to_arrow(predictions , probabilities , model_version=model_version)
+    matrix = np.column_stack([np.asarray(predictions , dtype=np.float32) , np.asarray(probabilities , dtype=np.float32)])
+    return encode_matrix(matrix , ["prediction" , "probability"] , model_version=model_version)
@@ -1,3 +1,4 @@
+import os
 import pytest
 import pandas as pd
 import numpy as np
@@ -36,3 +37,985 @@ class TestDataIngestion:
         assert hasattr(data_ingestion , "download_csv_from_aws")
         assert hasattr(data_ingestion , "split_data")
         assert hasattr(data_ingestion , "run")
+
+
+class TestBatchPrediction:
+    """Test the batch prediction endpoint"""
+    def setup_method(self):
+        self.client = app.test_client()
+        self.test_df = pd.read_csv("artifacts/processed/processed_test.csv").drop(columns=["Survived"])
+
+    def test_batch_json_matches_model(self):
+        from application import model_manager
+        loaded_model = model_manager.active().model
+        response = self.client.post("/predict/batch" , json=self.test_df.to_dict(orient="records"))
+        assert response.status_code == 200
+        body = response.get_json()
+        expected = loaded_model.predict(self.test_df.to_numpy())
+        assert body["predictions"] == expected.tolist()
+        assert len(body["probabilities"]) == len(self.test_df)
+
+    def test_batch_csv_upload(self):
+        import io
+        csv_bytes = self.test_df.to_csv(index=False).encode()
+        response = self.client.post("/predict/batch" , data={"file": (io.BytesIO(csv_bytes) , "rows.csv")})
+        assert response.status_code == 200
+        assert len(response.get_json()["predictions"]) == len(self.test_df)
+
+    def test_batch_rejects_missing_columns(self):
+        response = self.client.post("/predict/batch" , json={"columns": {"Pclass": [1 , 2]}})
+        assert response.status_code == 400
+
+    def test_batch_rejects_scalar_columns(self):
+        columns = {name : 5 for name in self.test_df.columns}
+        for route in ("/predict/batch" , "/explain"):
+            response = self.client.post(route , json={"columns": columns})
+            assert response.status_code == 400
+            assert "must be a list" in response.get_json()["error"]
+
+
+class TestCompiledTreeModel:
+    """Test the numpy tree inference engine against LightGBM"""
+    def test_compiled_model_matches_lightgbm(self):
+        import joblib
+        from src.tree_inference import CompiledTreeModel
+
+        model = joblib.load("artifacts/models/lgbm_model.pkl")
+        compiled = CompiledTreeModel.from_model(model)
+        X = pd.read_csv("artifacts/processed/processed_test.csv").drop(columns=["Survived"])
+
+        np.testing.assert_allclose(compiled.predict_proba(X.to_numpy()) , model.predict_proba(X) , atol=1e-12)
+        np.testing.assert_array_equal(compiled.predict(X.to_numpy()) , model.predict(X))
+        np.testing.assert_allclose(compiled.predict_proba(X.iloc[0].to_numpy()) , model.predict_proba(X.iloc[:1]) , atol=1e-12)
+
+    def test_compiled_model_round_trip(self , tmp_path):
+        from src.tree_inference import CompiledTreeModel
+
+        compiled = CompiledTreeModel.load("artifacts/models/lgbm_model.npz")
+        compiled.save(str(tmp_path / "model.npz"))
+        reloaded = CompiledTreeModel.load(str(tmp_path / "model.npz"))
+        X = pd.read_csv("artifacts/processed/processed_test.csv").drop(columns=["Survived"]).to_numpy()
+        np.testing.assert_array_equal(reloaded.predict_proba(X) , compiled.predict_proba(X))
+
+
+class TestMicroBatching:
+    """Test that concurrent requests are coalesced"""
+    def test_micro_batcher_fans_results_back(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from src.micro_batching import MicroBatcher
+
+        calls = []
+        def predict_fn(features):
+            calls.append(features.shape[0])
+            return features[:, 0] * 2 , features[:, 0] + 1
+
+        batcher = MicroBatcher(predict_fn , max_batch_size=16 , max_wait_ms=50)
+        rows = [np.array([[float(i) , 0.0]]) for i in range(16)]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda row: batcher.predict(row , timeout=5) , rows))
+
+        for i , (doubled , plus_one) in enumerate(results):
+            assert doubled.tolist() == [2.0 * i]
+            assert plus_one.tolist() == [i + 1.0]
+        assert sum(calls) == 16
+        assert len(calls) < 16
+        assert batcher.stats()["rows"] == 16
+
+
+class TestPredictionCache:
+    """Test the prediction cache"""
+    def score(self , features):
+        self.scored_rows += features.shape[0]
+        return (features[:, 0] > 0).astype(int) , features[:, 0] / 10
+
+    def test_cache_hits_and_evictions(self):
+        from src.prediction_cache import PredictionCache
+
+        self.scored_rows = 0
+        cache = PredictionCache(max_size=2)
+        features = np.array([[1.0 , 2.0] , [3.0 , 4.0] , [1.0 , 2.0]])
+
+        predictions , probabilities = cache.predict(features , self.score)
+        assert predictions.tolist() == [1 , 1 , 1]
+        assert probabilities.tolist() == [0.1 , 0.3 , 0.1]
+        cache.predict(features[:1] , self.score)
+        cache.predict(np.array([[5.0 , 6.0]]) , self.score)
+
+        stats = cache.stats()
+        assert self.scored_rows == 4
+        assert stats["hits"] == 1
+        assert stats["evictions"] == 1
+
+    def test_cache_keyed_on_served_versions(self):
+        from src.model_registry import ModelManager , ServedModel
+        from src.prediction_cache import PredictionCache
+
+        self.scored_rows = 0
+        cache = PredictionCache()
+        features = np.array([[1.0 , 2.0]])
+        manager = ModelManager(None , load_fn=lambda directory: None , fallback_dir="." ,
+                               make_served=lambda version , model: ServedModel(version , model , self.score) ,
+                               on_swap=cache.retain)
+
+        served = manager.choose()
+        cache.predict(features , served.score , namespace=served.version)
+        cache.predict(features , served.score , namespace=served.version)
+        cache.predict(features , served.score , namespace="v2")
+        assert self.scored_rows == 2
+
+        manager.on_swap(["v2"])
+        cache.predict(features , served.score , namespace=served.version)
+        assert self.scored_rows == 3
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestFeatureTransformer:
+    """Test the fitted feature transformer and raw record scoring"""
+    def test_transformer_matches_pandas_feature_engineering(self):
+        from src.feature_transformer import FeatureTransformer , ENGINEERED_COLUMNS
+
+        df = pd.read_csv("artifacts/raw/train.csv")
+        expected = df.copy()
+        expected["Age"] = expected["Age"].fillna(expected["Age"].median())
+        expected["Fare"] = expected["Fare"].fillna(expected["Fare"].median())
+        expected["Embarked"] = expected["Embarked"].fillna(expected["Embarked"].mode()[0]).astype("category").cat.codes
+        expected["Sex"] = expected["Sex"].map({"male": 0 , "female": 1})
+        expected["Familysize"] = expected["SibSp"] + expected["Parch"] + 1
+        expected["Isalone"] = (expected["Familysize"] == 1).astype(int)
+        expected["HasCabin"] = expected["Cabin"].notnull().astype(int)
+        expected["Title"] = expected["Name"].str.extract(r" ([A-Za-z]+)\.", expand=False).map(
+            {"Mr": 0 , "Miss": 1 , "Mrs": 2 , "Master": 3 , "Rare": 4}).fillna(4)
+        expected["Pclass_Fare"] = expected["Pclass"] * expected["Fare"]
+        expected["Age_Fare"] = expected["Age"] * expected["Fare"]
+
+        transformed = FeatureTransformer().fit(df).transform(df)
+        pd.testing.assert_frame_equal(transformed[ENGINEERED_COLUMNS] , expected[ENGINEERED_COLUMNS] , check_dtype=False)
+
+    def test_raw_endpoint_matches_engineered_batch(self):
+        from application import model_manager
+        from src.feature_transformer import ENGINEERED_COLUMNS
+        client = app.test_client()
+        raw = pd.read_csv("artifacts/raw/test.csv").drop(columns=["Unnamed: 0"] , errors="ignore")
+        engineered = model_manager.active().transformer.transform(raw)[ENGINEERED_COLUMNS]
+
+        raw_response = client.post("/predict/raw" , json=raw.astype(object).where(raw.notnull() , None).to_dict(orient="records"))
+        batch_response = client.post("/predict/batch" , json=engineered.to_dict(orient="records"))
+        assert raw_response.status_code == 200
+        assert raw_response.get_json() == batch_response.get_json()
+
+    def test_raw_endpoint_rejects_invalid_passengers(self):
+        import io
+        client = app.test_client()
+        passenger = {"Pclass": 3 , "Name": "Doe, Mr. John" , "Sex": "male" , "Age": 22 , "SibSp": 1 , "Parch": 0 ,
+                     "Fare": 7.25 , "Cabin": None , "Embarked": "S"}
+        invalid = [
+            ("Pclass" , [{}]) ,
+            ("Pclass" , [{"Name": 5}]) ,
+            ("Sex" , [{"Pclass": 1}]) ,
+            ("Name" , [dict(passenger , Name=5)]) ,
+            ("Fare" , [dict(passenger , Fare=[1])]) ,
+            ("Sex" , [dict(passenger , Sex="unknown")]) ,
+            ("Embarked" , [dict(passenger , Embarked="X")]) ,
+            ("Age" , [dict(passenger , Age="old")]) ,
+            ("Age" , [dict(passenger , Age="inf")]) ,
+            ("Fare" , [dict(passenger , Fare="nan")]) ,
+            ("SibSp" , [dict(passenger , SibSp=True)]) ,
+            ("Cabin" , {"columns": dict({name : [value] for name , value in passenger.items()} , Cabin=[])}) ,
+            ("Name" , {"columns": {"Name": 5}}) ,
+            ("Sex" , {"columns": dict({name : [value] * 2 for name , value in passenger.items()} , Sex=["male"])})
+        ]
+        for field , payload in invalid:
+            response = client.post("/predict/raw" , json=payload)
+            assert response.status_code == 400 , payload
+            assert field in response.get_json()["error"] , response.get_json()
+
+        for body in (b"Pclass\n3\n" , b"Pclass,Name,Sex,SibSp,Parch\n3,\"Doe, Mr. John\",male,0\n"):
+            response = client.post("/predict/raw" , data={"file": (io.BytesIO(body) , "passengers.csv")})
+            assert response.status_code == 400
+        assert client.post("/predict/raw" , json=[passenger]).status_code == 200
+
+
+class TestDataFormats:
+    """Test the columnar artifact formats"""
+    def test_formats_round_trip(self , tmp_path):
+        from utils.common_functions import read_data , save_data
+
+        df = pd.read_csv("artifacts/processed/processed_test.csv")
+        for extension in ["csv" , "parquet" , "feather" , "npy"]:
+            path = str(tmp_path / f"processed.{extension}")
+            save_data(df , path)
+            pd.testing.assert_frame_equal(read_data(path) , df , check_dtype=False)
+
+    def test_feature_matrix_is_memory_mapped(self , tmp_path):
+        from src.model_training import ModelTraining
+        from utils.common_functions import save_data
+
+        df = pd.read_csv("artifacts/processed/processed_test.csv")
+        path = str(tmp_path / "processed.npy")
+        save_data(df , path)
+
+        X_train , y_train , _ , _ = ModelTraining(path , path , str(tmp_path / "model.pkl")).load_and_split_data()
+        base = X_train.to_numpy()
+        while base is not None and not isinstance(base , np.memmap):
+            base = base.base
+        assert isinstance(base , np.memmap)
+        assert list(X_train.columns) == list(df.columns[:-1])
+        assert y_train.tolist() == df["Survived"].tolist()
+
+
+class TestStageCache:
+    """Test stage reuse in the training pipeline"""
+    def test_stage_reused_until_inputs_or_outputs_change(self , tmp_path):
+        from scipy.stats import randint
+        from src.stage_cache import StageCache
+
+        output = tmp_path / "out.txt"
+        runs = []
+        def stage():
+            runs.append(1)
+            output.write_text("result")
+
+        cache = StageCache(str(tmp_path / "manifests"))
+        inputs = {"params": {"n_estimators": randint(100 , 500)}}
+        assert cache.run("train" , inputs , [str(output)] , stage) == "ran"
+        assert cache.run("train" , {"params": {"n_estimators": randint(100 , 500)}} , [str(output)] , stage) == "reused"
+        assert cache.run("train" , {"params": {"n_estimators": randint(100 , 600)}} , [str(output)] , stage) == "ran"
+
+        output.write_text("tampered")
+        assert cache.run("train" , {"params": {"n_estimators": randint(100 , 600)}} , [str(output)] , stage) == "ran"
+        assert cache.run("train" , {"params": {"n_estimators": randint(100 , 600)}} , [str(output)] , stage , force=True) == "ran"
+        assert len(runs) == 4
+
+    def test_stage_sources_cover_imported_modules(self):
+        import importlib.util
+        import json
+        import subprocess
+        import sys
+        spec = importlib.util.spec_from_file_location("training_pipeline" , "pipeline/training_pipeline.py")
+        pipeline = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(pipeline)
+
+        # Every repo module a fresh interpreter loads with the stage, however indirectly
+        probe = ("import importlib , json , os , sys; importlib.import_module(sys.argv[1]); "
+                 "print(json.dumps([os.path.relpath(m.__file__) for m in list(sys.modules.values()) "
+                 "if getattr(m , '__file__' , None) and os.path.relpath(m.__file__).split(os.sep)[0] in ('src' , 'utils' , 'config')]))")
+        for stage , module in (("ingestion" , "src.data_ingestion") , ("processing" , "src.data_processing") ,
+                               ("training" , "src.model_training")):
+            output = subprocess.run([sys.executable , "-c" , probe , module] , capture_output=True , text=True ,
+                                    check=True , env=dict(os.environ , PYTHONPATH=".")).stdout
+            loaded = {path for path in json.loads(output.strip().splitlines()[-1]) if not path.endswith("__init__.py")}
+            assert loaded - set(pipeline.UNTRACKED_SOURCES) <= set(pipeline.STAGE_SOURCES[stage]) , stage
+        assert "src/streaming_stats.py" in pipeline.STAGE_SOURCES["processing"]
+        assert "src/stage_cache.py" in pipeline.STAGE_SOURCES["training"]
+
+
+class TestSuccessiveHalvingSearch:
+    """Test the budget aware hyperparameter search"""
+    def test_halving_search_returns_refittable_params(self):
+        from config.model_params import LIGHTGM_PARAMS
+        from src.hyperparameter_search import SuccessiveHalvingSearch
+
+        df = pd.read_csv("artifacts/processed/processed_train.csv")
+        search = SuccessiveHalvingSearch(LIGHTGM_PARAMS , n_candidates=6 , min_rounds=5 , max_rounds=20 , eta=3)
+        search.fit(df.drop(columns=["Survived"]) , df["Survived"])
+
+        rungs = [entry["rung"] for entry in search.history_]
+        assert rungs.count(0) == 6
+        assert rungs.count(1) == 2
+        assert 1 <= search.best_params_["n_estimators"] <= 20
+        assert 0.5 < search.best_score_ <= 1.0
+
+    def test_halving_search_respects_budget(self):
+        from config.model_params import LIGHTGM_PARAMS
+        from src.hyperparameter_search import SuccessiveHalvingSearch
+
+        df = pd.read_csv("artifacts/processed/processed_train.csv")
+        search = SuccessiveHalvingSearch(LIGHTGM_PARAMS , n_candidates=50 , min_rounds=5 , time_budget_seconds=0.0)
+        with pytest.raises(Exception):
+            search.fit(df.drop(columns=["Survived"]) , df["Survived"])
+
+
+class TestChunkedProcessing:
+    """Test the out-of-core data processing mode"""
+    def make_processor(self , tmp_path , name , mode , chunk_size):
+        from config.paths_config import TRAIN_FILE_PATH , TEST_FILE_PATH , CONFIG_PATH
+        processor = DataProcessor(TRAIN_FILE_PATH , TEST_FILE_PATH , str(tmp_path / name) , CONFIG_PATH)
+        processor.transformer_path = str(tmp_path / name / "feature_transformer.json")
+        processor.config["data_processing"].update({"mode": mode , "chunk_size": chunk_size})
+        return processor
+
+    def test_chunked_matches_in_memory(self , tmp_path):
+        in_memory = self.make_processor(tmp_path , "memory" , "in_memory" , 100000)
+        in_memory.process()
+        single_chunk = self.make_processor(tmp_path , "single" , "chunked" , 100000)
+        single_chunk.process()
+        small_chunks = self.make_processor(tmp_path , "small" , "chunked" , 50)
+        small_chunks.process()
+
+        for attribute in ["processed_train_path" , "processed_test_path"]:
+            pd.testing.assert_frame_equal(pd.read_csv(getattr(single_chunk , attribute)) ,
+                                          pd.read_csv(getattr(in_memory , attribute)))
+        pd.testing.assert_frame_equal(pd.read_csv(small_chunks.processed_test_path) ,
+                                      pd.read_csv(in_memory.processed_test_path))
+        assert small_chunks.transformer.to_dict() == in_memory.transformer.to_dict()
+
+    def test_quantile_sketch_is_close_after_compaction(self):
+        from src.streaming_stats import QuantileSketch
+
+        values = np.random.default_rng(0).lognormal(size=200000)
+        sketch = QuantileSketch(capacity=2000)
+        for chunk in np.array_split(values , 37):
+            sketch.update(chunk)
+        assert sketch.compacted
+        assert abs(np.mean(values <= sketch.median()) - 0.5) < 0.01
+
+
+class TestParallelIngestion:
+    """Test ranged, resumable ingestion against the local object store"""
+    def make_store(self , tmp_path):
+        import shutil
+        bucket = tmp_path / "store" / "bucket"
+        (bucket / "daily").mkdir(parents=True)
+        shutil.copy("artifacts/raw/raw.csv" , bucket / "titanic.csv")
+        raw = pd.read_csv("artifacts/raw/raw.csv")
+        raw.iloc[:400].to_csv(bucket / "daily" / "part-1.csv" , index=False)
+        raw.iloc[400:].to_csv(bucket / "daily" / "part-2.csv" , index=False)
+        return {"data_ingestion": {"bucket_name": "bucket" , "file_name": "titanic.csv" , "train_ratio": 0.85 ,
+                                   "storage": "local" , "local_root": str(tmp_path / "store") ,
+                                   "part_size_mb": 4096 / (1024 * 1024) , "max_workers": 4}}
+
+    def test_download_resumes_missing_parts(self , tmp_path):
+        from src.object_store import LocalObjectStore , ParallelDownloader
+
+        config = self.make_store(tmp_path)
+        store = LocalObjectStore(str(tmp_path / "store") , "bucket")
+        calls = []
+        failures = [IOError("connection reset")]
+        get_range = store.get_range
+        def failing_get_range(key , start , end):
+            calls.append(start)
+            if len(calls) == 5 and failures:
+                raise failures.pop()
+            return get_range(key , start , end)
+        store.get_range = failing_get_range
+
+        dest = str(tmp_path / "raw.csv")
+        downloader = ParallelDownloader(store , part_size=4096 , max_workers=1)
+        with pytest.raises(Exception):
+            downloader.download("titanic.csv" , dest)
+        n_parts = len(downloader._parts(store.head("titanic.csv")["size"]))
+
+        calls.clear()
+        downloader.download("titanic.csv" , dest)
+        assert len(calls) <= n_parts - 4
+        with open(dest , "rb") as downloaded , open("artifacts/raw/raw.csv" , "rb") as original:
+            assert downloaded.read() == original.read()
+
+    def test_prefix_streamed_into_split(self , tmp_path):
+        config = self.make_store(tmp_path)
+        config["data_ingestion"].update({"prefix": "daily/" , "stream_split": True})
+
+        data_ingestion = DataIngestion(config)
+        data_ingestion.raw_file_path = str(tmp_path / "raw.csv")
+        data_ingestion.train_file_path = str(tmp_path / "train.csv")
+        data_ingestion.test_file_path = str(tmp_path / "test.csv")
+        data_ingestion.run()
+
+        train = pd.read_csv(data_ingestion.train_file_path)
+        test = pd.read_csv(data_ingestion.test_file_path)
+        raw = pd.read_csv("artifacts/raw/raw.csv")
+        assert not (tmp_path / "raw.csv").exists()
+        assert sorted(pd.concat([train , test])["PassengerId"]) == sorted(raw["PassengerId"])
+        assert set(data_ingestion.get_source_fingerprint()) == {"daily/part-1.csv" , "daily/part-2.csv"}
+
+    @pytest.mark.parametrize("stream_split" , [False , True])
+    def test_prefix_parts_without_trailing_newline(self , tmp_path , stream_split):
+        config = self.make_store(tmp_path)
+        config["data_ingestion"].update({"prefix": "daily/" , "stream_split": stream_split , "split_mode": "hash"})
+        part = tmp_path / "store" / "bucket" / "daily" / "part-1.csv"
+        part.write_bytes(part.read_bytes().rstrip(b"\n"))
+
+        data_ingestion = DataIngestion(config)
+        data_ingestion.raw_file_path = str(tmp_path / "raw.csv")
+        data_ingestion.train_file_path = str(tmp_path / "train.csv")
+        data_ingestion.test_file_path = str(tmp_path / "test.csv")
+        data_ingestion.run()
+        rows = pd.concat([pd.read_csv(data_ingestion.train_file_path) , pd.read_csv(data_ingestion.test_file_path)])
+        assert sorted(rows["PassengerId"]) == sorted(pd.read_csv("artifacts/raw/raw.csv")["PassengerId"])
+
+    def test_streamed_download_is_verified(self , tmp_path):
+        from src.object_store import LocalObjectStore , ParallelDownloader
+
+        self.make_store(tmp_path)
+        store = LocalObjectStore(str(tmp_path / "store") , "bucket")
+        head = store.head
+        store.head = lambda key: dict(head(key) , etag="0" * 32)
+        with pytest.raises(ValueError , match="Checksum mismatch"):
+            b"".join(ParallelDownloader(store , part_size=4096).iter_bytes("titanic.csv"))
+
+
+class TestHashSplit:
+    """Test the deterministic streaming hash split"""
+    def make_ingestion(self , tmp_path , **options):
+        config = {"data_ingestion": {"bucket_name": "bucket" , "file_name": "titanic.csv" , "train_ratio": 0.85 ,
+                                     "split_mode": "hash" , **options}}
+        data_ingestion = DataIngestion(config)
+        data_ingestion.raw_file_path = "artifacts/raw/raw.csv"
+        data_ingestion.train_file_path = str(tmp_path / "train.csv")
+        data_ingestion.test_file_path = str(tmp_path / "test.csv")
+        return data_ingestion
+
+    def test_split_is_stable_across_row_order(self , tmp_path):
+        data_ingestion = self.make_ingestion(tmp_path)
+        data_ingestion.split_data()
+        first = set(pd.read_csv(data_ingestion.test_file_path)["PassengerId"])
+
+        shuffled = tmp_path / "shuffled.csv"
+        pd.read_csv("artifacts/raw/raw.csv").sample(frac=1 , random_state=0).to_csv(shuffled , index=False)
+        data_ingestion.raw_file_path = str(shuffled)
+        data_ingestion.split_data()
+        assert set(pd.read_csv(data_ingestion.test_file_path)["PassengerId"]) == first
+
+        # Appended rows never move existing keys to the other split
+        raw = pd.read_csv("artifacts/raw/raw.csv")
+        appended = tmp_path / "appended.csv"
+        pd.concat([raw , raw.assign(PassengerId=raw["PassengerId"] + 10000)]).to_csv(appended , index=False)
+        data_ingestion.raw_file_path = str(appended)
+        data_ingestion.split_data()
+        test_ids = set(pd.read_csv(data_ingestion.test_file_path)["PassengerId"])
+        assert test_ids & set(raw["PassengerId"]) == first
+
+    def test_split_keeps_label_shares(self , tmp_path):
+        data_ingestion = self.make_ingestion(tmp_path)
+        data_ingestion.split_data()
+        train = pd.read_csv(data_ingestion.train_file_path)
+        test = pd.read_csv(data_ingestion.test_file_path)
+        raw = pd.read_csv("artifacts/raw/raw.csv")
+        assert list(train.columns) == list(raw.columns)
+        assert len(train) + len(test) == len(raw)
+        for label , count in raw["Survived"].value_counts().items():
+            assert abs((train["Survived"] == label).sum() / count - 0.85) < 0.05
+
+
+class TestImbalanceStrategies:
+    """Test the configurable imbalance strategies"""
+    def make_processor(self , tmp_path , strategy):
+        from config.paths_config import TRAIN_FILE_PATH , TEST_FILE_PATH , CONFIG_PATH
+        processor = DataProcessor(TRAIN_FILE_PATH , TEST_FILE_PATH , str(tmp_path / strategy) , CONFIG_PATH)
+        processor.transformer_path = str(tmp_path / strategy / "feature_transformer.json")
+        processor.imbalance_strategy = strategy
+        processor.chunked_smote_params = {"batch_size": 50}
+        processor.process()
+        return pd.read_csv(processor.processed_train_path)
+
+    def test_chunked_smote_balances_with_interpolated_rows(self , tmp_path):
+        unbalanced = self.make_processor(tmp_path , "none")
+        balanced = self.make_processor(tmp_path , "chunked_smote")
+
+        counts = balanced["Survived"].value_counts()
+        assert counts[0] == counts[1] == (unbalanced["Survived"] == 0).sum()
+        pd.testing.assert_frame_equal(balanced.iloc[:len(unbalanced)] , unbalanced)
+        synthetic = balanced.iloc[len(unbalanced):]
+        minority = unbalanced[unbalanced["Survived"] == 1]
+        assert (synthetic["Survived"] == 1).all()
+        assert (synthetic.min() >= minority.min()).all() and (synthetic.max() <= minority.max()).all()
+        assert synthetic["Sex"].isin([0 , 1]).all()
+
+    def test_approximate_neighbours_are_mostly_exact(self):
+        from sklearn.neighbors import NearestNeighbors
+        from src.imbalance import ChunkedSMOTE
+
+        X = pd.read_csv("artifacts/processed/processed_test.csv").drop(columns=["Survived"]).to_numpy(dtype=float)
+        sampler = ChunkedSMOTE(k_neighbors=5 , leaf_size=16)
+        queries = np.arange(len(X))
+        approximate = sampler._neighbors(X , sampler._build_index(X) , queries)
+        exact_distances = NearestNeighbors(n_neighbors=6).fit(X).kneighbors(X)[0][: , -1]
+        found_distances = np.sqrt(((X[approximate] - X[: , None , :]) ** 2).sum(axis=2)).max(axis=1)
+        assert np.mean(found_distances <= exact_distances + 1e-9) > 0.5
+
+
+class TestFeatureDtypes:
+    """Test the narrow dtype plan of the engineered features"""
+    def setup_method(self):
+        from utils.common_functions import read_yaml
+        from config.paths_config import CONFIG_PATH
+        from src.feature_transformer import FeatureTransformer
+
+        self.dtypes = read_yaml(CONFIG_PATH)["data_processing"]["feature_dtypes"]
+        self.raw = pd.read_csv("artifacts/raw/train.csv")
+        self.transformer = FeatureTransformer().fit(self.raw)
+
+    def test_plan_is_applied_and_values_match(self):
+        typed = self.transformer.transform_features(self.raw , self.dtypes)
+        wide = self.transformer.transform(self.raw)[list(self.dtypes)]
+
+        assert {name : str(dtype) for name , dtype in typed.dtypes.items()} == self.dtypes
+        np.testing.assert_array_equal(typed.to_numpy(dtype=np.float32) , wide.to_numpy(dtype=np.float32))
+        assert typed.memory_usage().sum() * 3 < wide.memory_usage().sum()
+
+    def test_npy_matrix_is_float32_and_chunks_share_the_schema(self , tmp_path):
+        from utils.common_functions import DataChunkWriter , read_data
+
+        typed = self.transformer.transform_features(self.raw , self.dtypes)
+        path = str(tmp_path / "processed.npy")
+        with DataChunkWriter(path) as writer:
+            writer.write(typed.iloc[:100])
+            writer.write(typed.iloc[100:].astype(np.float64))
+        matrix = read_data(path)
+        assert (matrix.dtypes == np.float32).all()
+        np.testing.assert_array_equal(matrix.to_numpy() , typed.to_numpy(dtype=np.float32))
+
+
+class TestGunicornConfig:
+    """Test the multi-process serving settings"""
+    def test_environment_overrides_config(self , monkeypatch):
+        import runpy
+        monkeypatch.setenv("GUNICORN_WORKERS" , "3")
+        monkeypatch.setenv("GUNICORN_THREADS" , "4")
+        monkeypatch.setenv("OMP_NUM_THREADS" , "1")
+        settings = runpy.run_path("gunicorn.conf.py")
+        assert settings["workers"] == 3
+        assert settings["worker_class"] == "gthread"
+        assert settings["preload_app"]
+        assert settings["timeout"] == 30
+
+
+class TestModelRegistry:
+    """Test versioned model files and hot swapping"""
+    def make_manager(self , tmp_path):
+        from src.model_registry import ModelRegistry , ModelManager , ServedModel
+        from src.tree_inference import CompiledTreeModel
+        from src.prediction import predict_batch
+
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        def load(directory):
+            return CompiledTreeModel.load(f"{directory}/lgbm_model.npz")
+        def warm_up(served):
+            served.score(np.zeros((4 , 11)))
+        manager = ModelManager(registry , load , lambda version , model: ServedModel(version , model , lambda f: predict_batch(model , f)) ,
+                               warmup_fn=warm_up , fallback_dir="artifacts/models" , poll_interval_seconds=None)
+        return registry , manager
+
+    def test_new_version_is_swapped_in(self , tmp_path):
+        registry , manager = self.make_manager(tmp_path)
+        assert manager.choose().version == "unversioned"
+
+        model_file = {"lgbm_model.npz": "artifacts/models/lgbm_model.npz"}
+        assert registry.publish(model_file , metrics={"accuracy": 0.8}) == "v1"
+        assert manager.refresh()
+        assert manager.choose().version == "v1"
+        assert not manager.refresh()
+
+        broken = tmp_path / "broken.npz"
+        broken.write_bytes(b"not a model")
+        registry.publish({"lgbm_model.npz": str(broken)})
+        assert not manager.refresh()
+        assert manager.status()["active"] == "v1" and manager.status()["failed_loads"] == 1
+
+        registry.publish(model_file)
+        registry.set_traffic({"v1": 1 , "v3": 3})
+        manager.refresh()
+        served = [manager.choose().version for _ in range(2000)]
+        assert 0.7 < served.count("v3") / len(served) < 0.8
+        assert sorted(registry.versions()) == ["v1" , "v2" , "v3"]
+
+    def test_version_serves_its_own_transformer(self , tmp_path):
+        from application import load_model , make_served , config
+        from src.batch_scoring import BatchScorer , ChunkScorer
+        from src.feature_transformer import FeatureTransformer
+        from src.model_registry import ModelRegistry
+
+        transformer = FeatureTransformer.load("artifacts/models/feature_transformer.json")
+        transformer.age_median = 99.0
+        transformer.save(str(tmp_path / "feature_transformer.json"))
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        version = registry.publish({"lgbm_model.npz": "artifacts/models/lgbm_model.npz" ,
+                                    "lgbm_model.pkl": "artifacts/models/lgbm_model.pkl" ,
+                                    "feature_transformer.json": str(tmp_path / "feature_transformer.json")})
+
+        served = make_served(version , load_model(registry.version_dir(version)))
+        scorer = ChunkScorer(**BatchScorer(config , model_dir=registry.version_dir(version) , workers=1).settings)
+        assert served.transformer.age_median == 99.0 and scorer.transformer.age_median == 99.0
+
+    def test_model_version_endpoint(self):
+        client = app.test_client()
+        body = client.get("/model/version").get_json()
+        assert body["active"] in body["loaded"]
+        response = client.post("/predict/batch" , json={"columns": {name : [1.0] for name in
+                               ["Pclass" , "Sex" , "Age" , "Fare" , "Embarked" , "Familysize" , "Isalone" ,
+                                "HasCabin" , "Title" , "Pclass_Fare" , "Age_Fare"]}})
+        assert response.get_json()["model_version"] == body["active"]
+
+
+class TestServingMetrics:
+    """Test the metrics and health endpoints"""
+    def test_histogram_renders_cumulative_buckets(self):
+        from src.serving_metrics import MetricsRegistry
+
+        metrics = MetricsRegistry()
+        latency = metrics.histogram("latency_seconds" , "Latency" , ["route"] , buckets=(0.1 , 1.0))
+        for value in [0.05 , 0.5 , 0.5 , 5.0]:
+            latency.labels("/x").observe(value)
+        text = metrics.render()
+        assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{route="/x"} 4' in text
+
+    def test_requests_show_up_in_metrics(self):
+        client = app.test_client()
+        record = {name : 1.0 for name in ["Pclass" , "Sex" , "Age" , "Fare" , "Embarked" , "Familysize" , "Isalone" ,
+                                          "HasCabin" , "Title" , "Pclass_Fare" , "Age_Fare"]}
+        assert client.post("/predict/batch" , json=[record , record]).status_code == 200
+        assert client.post("/predict/batch" , json=[{"Pclass": 1}]).status_code == 400
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert 'titanic_requests_total{route="/predict/batch",method="POST",status="400"}' in text
+        assert 'titanic_stage_duration_seconds_count{route="/predict/batch",stage="predict"}' in text
+        assert 'titanic_batch_rows_bucket{route="/predict/batch",le="2.0"}' in text
+        assert "titanic_model_info{" in text
+        assert client.get("/healthz").status_code == 200
+        assert client.get("/readyz").get_json()["ready"]
+
+
+class TestLogging:
+    """Test the structured, rate limited logging setup"""
+    def test_rate_limit_drops_and_reports_suppressed(self):
+        import logging
+        from src.logger import RateLimitFilter
+
+        limiter = RateLimitFilter(rate=0.001 , burst=3)
+        records = [logging.LogRecord("hot" , logging.INFO , "app.py" , 10 , "tick" , None , None) for _ in range(10)]
+        passed = [record for record in records if limiter.filter(record)]
+        assert len(passed) == 3
+        assert limiter.filter(logging.LogRecord("hot" , logging.ERROR , "app.py" , 10 , "boom" , None , None))
+
+        limiter._buckets = {key : (1.0 , last , dropped) for key , (_ , last , dropped) in limiter._buckets.items()}
+        record = logging.LogRecord("hot" , logging.INFO , "app.py" , 10 , "tick" , None , None)
+        assert limiter.filter(record) and record.suppressed == 7
+
+    def test_records_are_written_as_json(self):
+        import json
+        from src.logger import get_logger , flush_logs , LOG_FILE
+
+        get_logger("tests.logging").info("structured %s" , "record" , extra={"rows": 12})
+        flush_logs()
+        with open(LOG_FILE) as f:
+            entries = [json.loads(line) for line in f if "structured record" in line]
+        assert entries[-1]["logger"] == "tests.logging"
+        assert entries[-1]["rows"] == 12
+        assert entries[-1]["level"] == "INFO"
+
+    def test_forked_children_do_not_rotate(self , tmp_path):
+        import subprocess
+        import sys
+        script = (
+            "import logging.handlers , os\n"
+            "from src import logger\n"
+            "assert isinstance(logger._writer , logging.handlers.RotatingFileHandler) and logger.LOG_RATE_LIMIT == 0\n"
+            "pid = os.fork()\n"
+            "if pid == 0:\n"
+            "    os._exit(0 if not isinstance(logger._writer , logging.handlers.BaseRotatingHandler) else 1)\n"
+            "assert os.waitpid(pid , 0)[1] == 0\n"
+        )
+        env = {key : value for key , value in os.environ.items() if key != "LOG_RATE_LIMIT"}
+        env.update(LOG_ROTATION="size" , LOG_DIR=str(tmp_path) , PYTHONPATH=".")
+        subprocess.run([sys.executable , "-c" , script] , env=env , check=True)
+
+
+class TestStageProfiler:
+    """Test the opt-in pipeline stage profiler"""
+    def test_nested_stages_and_report(self , tmp_path):
+        import json
+        import numpy as np
+        from src.profiling import StageProfiler , profile_stage
+
+        with profile_stage("inactive") as entry:
+            assert entry is None
+
+        profiler = StageProfiler(str(tmp_path) , cprofile=True).activate()
+        try:
+            with profile_stage("processing"):
+                with profile_stage("processing.balance"):
+                    block = np.ones(2 ** 20)
+                    del block
+                sum(range(10000))
+        finally:
+            profiler.deactivate()
+
+        stages = {entry["stage"] : entry for entry in profiler.stages}
+        assert stages["processing.balance"]["parent"] == "processing"
+        assert stages["processing.balance"]["tracemalloc_peak_mb"] >= 8
+        assert stages["processing"]["tracemalloc_peak_mb"] >= stages["processing.balance"]["tracemalloc_peak_mb"]
+        assert stages["processing"]["wall_s"] >= stages["processing.balance"]["wall_s"]
+        assert stages["processing"]["top_functions"] and "profile_path" not in stages["processing.balance"]
+
+        with open(profiler.write_report()) as f:
+            report = json.load(f)
+        assert [entry["stage"] for entry in report["stages"]] == ["processing.balance" , "processing"]
+
+
+class TestBenchmarkSuite:
+    """Test the synthetic data generator and the regression check"""
+    def test_synthetic_passengers_match_raw_schema(self):
+        from benchmarks.synthetic_data import generate_passengers , RAW_COLUMNS
+        from src.feature_transformer import FeatureTransformer
+
+        df = generate_passengers(20000 , seed=1)
+        assert list(df.columns) == RAW_COLUMNS and df["PassengerId"].is_unique
+        assert 0.15 < df["Age"].isna().mean() < 0.25
+        assert 0.70 < df["Cabin"].isna().mean() < 0.85
+        assert df.groupby("Pclass")["Fare"].median().is_monotonic_decreasing
+        assert 0.3 < df["Survived"].mean() < 0.5
+
+        features = FeatureTransformer().fit(df).transform(df)
+        assert features[["Age" , "Fare" , "Embarked" , "Title"]].notna().all().all()
+
+    def test_regressions_respect_tolerances(self):
+        from benchmarks.benchmark_suite import find_regressions
+
+        baseline = {"results": [{"benchmark": "preprocess_data" , "rows": 1000 , "rows_per_s": 1000.0} ,
+                                {"benchmark": "train_lgbm" , "rows": 1000 , "rows_per_s": 100.0}]}
+        report = {"results": [{"benchmark": "preprocess_data" , "rows": 1000 , "rows_per_s": 700.0} ,
+                              {"benchmark": "train_lgbm" , "rows": 1000 , "rows_per_s": 70.0} ,
+                              {"benchmark": "read_data[csv]" , "rows": 1000 , "rows_per_s": 1.0}]}
+        regressions = find_regressions(report , baseline , 0.25 , {"train_lgbm": 0.5})
+        assert [entry["benchmark"] for entry in regressions] == ["preprocess_data"]
+
+
+class TestBatchScoring:
+    """Test the chunked offline scoring"""
+    def test_parallel_chunks_are_written_in_order(self , tmp_path):
+        from benchmarks.synthetic_data import generate_passengers
+        from src.batch_scoring import BatchScorer , ChunkScorer
+        from utils.common_functions import read_yaml
+        from config.paths_config import CONFIG_PATH
+
+        raw = generate_passengers(1000 , seed=3).drop(columns=["Survived"])
+        raw.to_csv(tmp_path / "passengers.csv" , index=False)
+        config = read_yaml(CONFIG_PATH)
+
+        inline = BatchScorer(config , workers=1 , chunk_size=170)
+        stats = inline.run(str(tmp_path / "passengers.csv") , str(tmp_path / "inline.csv"))
+        parallel = BatchScorer(config , workers=2 , chunk_size=170)
+        parallel.run(str(tmp_path / "passengers.csv") , str(tmp_path / "parallel.parquet"))
+
+        assert stats["rows"] == 1000 and stats["chunks"] == 6
+        inline_scores = pd.read_csv(tmp_path / "inline.csv")
+        parallel_scores = pd.read_parquet(tmp_path / "parallel.parquet")
+        assert inline_scores["PassengerId"].tolist() == raw["PassengerId"].tolist()
+        assert np.allclose(inline_scores["probability"] , parallel_scores["probability"])
+
+        expected = ChunkScorer(**inline.settings).score(0 , raw)
+        assert np.allclose(inline_scores["probability"] , expected["probability"])
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["inline.csv" , "parallel.parquet" , "passengers.csv"]
+
+
+class TestIncrementalTraining:
+    """Test warm starting the deployed model on new passengers"""
+    def test_continued_training_adds_trees_on_the_delta(self , tmp_path):
+        import joblib
+        from benchmarks.synthetic_data import generate_passengers
+        from config.paths_config import PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , MODEL_OUTPUT_PATH
+        from src.feature_transformer import FeatureTransformer
+
+        generate_passengers(300 , seed=5).to_csv(tmp_path / "delta.csv" , index=False)
+        training = ModelTraining(PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , MODEL_OUTPUT_PATH)
+        X_delta , y_delta = training.load_delta(str(tmp_path / "delta.csv") , FeatureTransformer.load(training.transformer_path))
+        assert len(X_delta) == 300 and "Survived" not in X_delta.columns
+
+        deployed = joblib.load(MODEL_OUTPUT_PATH)
+        updated = training.continue_training(deployed , X_delta , y_delta)
+        added = updated.booster_.current_iteration() - deployed.booster_.current_iteration()
+        assert added == training.incremental_params["boost_rounds"]
+        assert updated.predict_proba(X_delta).shape == (300 , 2)
+
+    @pytest.mark.parametrize("max_degradation , mode" , [(1.0 , "incremental") , (-1.0 , "full_search")])
+    def test_run_starts_from_the_active_version(self , tmp_path , monkeypatch , max_degradation , mode):
+        import lightgbm as lgb
+        from benchmarks.synthetic_data import generate_passengers
+        from config.paths_config import PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH
+        from src.model_registry import ModelRegistry
+
+        monkeypatch.setenv("MLFLOW_TRACKING_URI" , (tmp_path / "mlruns").as_uri())
+        generate_passengers(300 , seed=5).to_csv(tmp_path / "delta.csv" , index=False)
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        registry.publish({name : f"artifacts/models/{name}" for name in
+                          ["lgbm_model.pkl" , "lgbm_model.npz" , "lgbm_model.txt" , "feature_transformer.json"]})
+
+        training = ModelTraining(str(tmp_path / "train.csv") , str(tmp_path / "test.csv") , str(tmp_path / "models" / "lgbm_model.pkl"))
+        # Splits in the dtypes DataProcessor writes them with
+        for source , target in ((PROCESSED_TRAIN_DATA_PATH , training.train_path) , (PROCESSED_TEST_DATA_PATH , training.test_path)):
+            pd.read_csv(source).astype(training.feature_dtypes).to_csv(target , index=False)
+        training.registry = registry
+        # A negative max_degradation treats any result of the continued model as degraded
+        training.incremental_params = dict(training.incremental_params , max_degradation=max_degradation)
+        labels = []
+        continue_training = training.continue_training
+        def record_continue(model , X , y):
+            labels.append(y)
+            return continue_training(model , X , y)
+        def record_search(X , y):
+            labels.append(y)
+            return lgb.LGBMClassifier(n_estimators=10 , verbosity=-1).fit(X , y)
+        monkeypatch.setattr(training , "continue_training" , record_continue)
+        monkeypatch.setattr(training , "train_lgbm" , record_search)
+
+        result = training.run_incremental(str(tmp_path / "delta.csv"))
+        assert (result["mode"] , result["base_version"] , result["version"]) == (mode , "v1" , "v2")
+        assert len(labels) == (1 if mode == "incremental" else 2)
+        # Continued and searched models are both fitted on class balanced rows
+        for y in labels:
+            assert y.value_counts().min() == y.value_counts().max()
+        assert "feature_transformer.json" in os.listdir(registry.version_dir("v2"))
+
+
+class TestExplanations:
+    """Test the /explain route and the TreeSHAP explainer"""
+    def test_contributions_add_up_to_the_raw_score(self):
+        import joblib
+        from config.paths_config import MODEL_OUTPUT_PATH , PROCESSED_TEST_DATA_PATH
+        from src.explanations import TreeExplainer
+        from src.prediction_cache import PredictionCache
+
+        model = joblib.load(MODEL_OUTPUT_PATH)
+        features = pd.read_csv(PROCESSED_TEST_DATA_PATH).drop(columns=["Survived"]).to_numpy(dtype=np.float64)[:50]
+        features = np.vstack([features , features[:10]])
+        explainer = TreeExplainer(model.booster_ , [f"f{i}" for i in range(features.shape[1])] , version="v1" ,
+                                  cache=PredictionCache(max_size=1000))
+
+        contributions = explainer.contributions(features)
+        assert np.allclose(contributions.sum(axis=1) , model.booster_.predict(features , raw_score=True))
+        assert np.allclose(explainer.contributions(features[:20]) , contributions[:20])
+        assert explainer.cache.stats()["hits"] >= 20
+
+    def test_explain_route_single_and_batch(self):
+        from config.paths_config import PROCESSED_TEST_DATA_PATH
+
+        records = pd.read_csv(PROCESSED_TEST_DATA_PATH).drop(columns=["Survived"]).head(5).to_dict(orient="records")
+        client = app.test_client()
+
+        single = client.post("/explain" , json=records[0]).get_json()
+        assert set(single["contributions"]) == set(records[0]) and len(single["raw_scores"]) == 1
+
+        batch = client.post("/explain" , json=records).get_json()
+        predicted = client.post("/predict/batch" , json=records).get_json()
+        assert np.allclose(batch["probabilities"] , predicted["probabilities"])
+        assert batch["model_version"] == predicted["model_version"]
+
+
+class TestBinaryWireFormat:
+    """Test Arrow IPC and TMX1 matrix payloads on /predict/batch"""
+    def _features(self):
+        from config.paths_config import PROCESSED_TEST_DATA_PATH
+        from application import feature_columns
+        df = pd.read_csv(PROCESSED_TEST_DATA_PATH)[feature_columns].head(20)
+        return df , feature_columns
+
+    def test_matrix_round_trip_matches_json(self):
+        from src.wire_format import encode_matrix , decode_matrix , MATRIX_MIMETYPE
+
+        df , feature_columns = self._features()
+        client = app.test_client()
+        expected = client.post("/predict/batch" , json=df.to_dict(orient="records")).get_json()
+
+        # Columns in another order are mapped back to the training order
+        reordered = list(reversed(feature_columns))
+        body = encode_matrix(df[reordered].to_numpy(dtype=np.float64) , reordered)
+        response = client.post("/predict/batch" , data=body , content_type=MATRIX_MIMETYPE)
+        matrix , header = decode_matrix(response.data)
+        assert response.mimetype == MATRIX_MIMETYPE and header["columns"] == ["prediction" , "probability"]
+        assert np.allclose(matrix[:, 1] , expected["probabilities"] , atol=1e-6)
+        assert matrix[:, 0].tolist() == expected["predictions"]
+
+        bad = client.post("/predict/batch" , data=body[:-3] , content_type=MATRIX_MIMETYPE)
+        assert bad.status_code == 400
+        import json , struct
+        for header in ({"columns": reordered , "dtype": []} , {"columns": 5 , "dtype": "<f8"} ,
+                       {"columns": [1] , "dtype": "<f8"} , ["columns" , "dtype"]):
+            encoded = json.dumps(header).encode()
+            bad = client.post("/predict/batch" , data=b"TMX1" + struct.pack("<I" , len(encoded)) + encoded ,
+                              content_type=MATRIX_MIMETYPE)
+            assert bad.status_code == 400 , header
+
+    def test_arrow_stream_round_trip(self):
+        import pyarrow as pa
+        from src.wire_format import ARROW_STREAM_MIMETYPE
+
+        df , _ = self._features()
+        sink = pa.BufferOutputStream()
+        table = pa.Table.from_pandas(df , preserve_index=False)
+        with pa.ipc.new_stream(sink , table.schema) as writer:
+            writer.write_table(table)
+
+        client = app.test_client()
+        response = client.post("/predict/batch" , data=sink.getvalue().to_pybytes() , content_type=ARROW_STREAM_MIMETYPE)
+        result = pa.ipc.open_stream(response.data).read_all()
+        expected = client.post("/predict/batch" , json=df.to_dict(orient="records")).get_json()
+        assert np.allclose(result.column("probability").to_numpy() , expected["probabilities"])
+        assert result.schema.metadata[b"model_version"].decode() == expected["model_version"]
+
+
+class TestAsyncMlflowLogger:
+    """Test background MLflow logging against a local file tracking store"""
+    def test_identical_dataset_is_uploaded_once(self , tmp_path , monkeypatch):
+        from mlflow.tracking import MlflowClient
+        from src.mlflow_logger import AsyncMlflowLogger
+
+        monkeypatch.setenv("MLFLOW_TRACKING_URI" , (tmp_path / "mlruns").as_uri())
+        client = MlflowClient()
+        experiment_id = client.create_experiment("dedup")
+        dataset = tmp_path / "train.csv"
+        dataset.write_text("a,b\n1,2\n")
+
+        runs = []
+        for _ in range(2):
+            run = client.create_run(experiment_id)
+            tracker = AsyncMlflowLogger(run.info.run_id , experiment_id , client=client , max_queue_size=2)
+            tracker.log_dataset(str(dataset))
+            tracker.log_metrics({"accuracy": 0.9})
+            tracker.log_params({"n_estimators": 100})
+            assert tracker.close(timeout=60) and tracker.errors == 0
+            runs.append((run.info.run_id , tracker))
+
+        (first , first_tracker) , (second , second_tracker) = runs
+        assert first_tracker.uploaded == 1 and second_tracker.deduplicated == 1
+        assert [a.path for a in client.list_artifacts(first , "datasets")] == ["datasets/train.csv"]
+        assert client.list_artifacts(second , "datasets") == []
+        tags = client.get_run(second).data.tags
+        assert tags["dataset.train.csv.uri"] == f"runs:/{first}/datasets/train.csv"
+        assert client.get_run(second).data.metrics["accuracy"] == 0.9
+
+    def test_failed_training_closes_the_tracker(self , tmp_path , monkeypatch):
+        from mlflow.tracking import MlflowClient
+        from config.paths_config import PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , MODEL_OUTPUT_PATH
+        from src.custom_exception import CustomException
+
+        def fail():
+            raise RuntimeError("Training failed")
+
+        monkeypatch.setenv("MLFLOW_TRACKING_URI" , (tmp_path / "mlruns").as_uri())
+        training = ModelTraining(PROCESSED_TRAIN_DATA_PATH , PROCESSED_TEST_DATA_PATH , MODEL_OUTPUT_PATH)
+        trackers = []
+        start_tracker = training.start_tracker
+        monkeypatch.setattr(training , "start_tracker" , lambda run: trackers.append(start_tracker(run)) or trackers[-1])
+        monkeypatch.setattr(training , "load_and_split_data" , fail)
+
+        with pytest.raises(CustomException):
+            training.run()
+        tracker , = trackers
+        assert not tracker._thread.is_alive() and tracker.uploaded == 2
+        artifacts = MlflowClient().list_artifacts(training.run_id , "datasets")
+        assert sorted(a.path for a in artifacts) == ["datasets/processed_test.csv" , "datasets/processed_train.csv"]
+
+
+class TestServingStartup:
+    """Test the lean import of the serving app and its startup benchmark"""
+    def test_app_starts_without_training_libraries(self):
+        from benchmarks.startup_benchmark import run_probe , find_regressions
+
+        result = run_probe()
+        assert result["heavy_modules"] == []
+        assert set(result["phases"]) == {"imports" , "model_load" , "warmup"}
+        report = {"median": {"import_seconds": 1.0} , "heavy_modules": ["pandas"]}
+        assert len(find_regressions(report , {"median": {"import_seconds": 0.5} , "heavy_modules": []} , 0.25)) == 2
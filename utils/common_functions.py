@@ -1,9 +1,11 @@
 import os
-import pandas as pd
+import json
+import numpy as np
 from src.logger import get_logger
 from src.custom_exception import CustomException
 import yaml
 
+# pandas is imported inside the readers, the serving app only needs read_yaml and starts without it
 logger = get_logger(__name__)
 
 
@@ -24,11 +26,184 @@ def read_yaml(file_path):
 
 
 
-def read_data(path):
+def _columns_path(path):
+    # Column names of a .npy feature matrix are kept in a small sidecar file
+    return os.path.splitext(path)[0] + ".columns.json"
+
+
+def read_feature_matrix(path , target_column):
+    # Memory maps the .npy matrix, X is a view on the mapped file so nothing is parsed or copied
+    import pandas as pd
+    try:
+        logger.info("Loading feature matrix")
+        with open(_columns_path(path)) as f:
+            columns = json.load(f)
+        matrix = np.load(path , mmap_mode="r")
+
+        target_index = columns.index(target_column)
+        feature_columns = [name for name in columns if name != target_column]
+        if target_index == len(columns) - 1:
+            features = matrix[:, :target_index]
+        else:
+            features = matrix[:, [i for i in range(len(columns)) if i != target_index]]
+
+        X = pd.DataFrame(features , columns=feature_columns , copy=False)
+        # Labels are stored as floats in the matrix, the (small) label vector is cast back to int
+        y = pd.Series(matrix[:, target_index].astype(np.int64) , name=target_column)
+        return X , y
+    except Exception as e :
+        logger.error("Error while reading feature matrix")
+        raise CustomException("Failed to read feature matrix" , e)
+
+
+def _matrix_dtype(df):
+    # .npy matrices hold every column in one dtype, the narrowest one all columns fit in (float32 for int8/float32)
+    return np.result_type(*df.dtypes , np.float32)
+
+
+def read_data(path , dtypes=None):
+    # dtypes (column -> dtype) parses CSV straight into narrow columns, binary formats keep their own types
+    import pandas as pd
     try:
         logger.info("Loading data")
-        return pd.read_csv(path)
+        extension = os.path.splitext(path)[1]
+        if extension == ".parquet":
+            return pd.read_parquet(path)
+        if extension in (".feather" , ".arrow"):
+            from pyarrow import feather
+            return feather.read_table(path , memory_map=True).to_pandas()
+        if extension == ".npy":
+            with open(_columns_path(path)) as f:
+                columns = json.load(f)
+            return pd.DataFrame(np.load(path , mmap_mode="r") , columns=columns , copy=False)
+        return pd.read_csv(path , dtype=dtypes)
     except Exception as e :
         logger.error("Error while reading data")
         raise CustomException("Failed to read data" , e)
-    
+
+
+def save_data(df , path):
+    try:
+        logger.info("Saving data")
+        os.makedirs(os.path.dirname(path) or "." , exist_ok=True)
+        extension = os.path.splitext(path)[1]
+        if extension == ".parquet":
+            df.to_parquet(path , index=False)
+        elif extension in (".feather" , ".arrow"):
+            df.reset_index(drop=True).to_feather(path)
+        elif extension == ".npy":
+            np.save(path , np.ascontiguousarray(df.to_numpy(dtype=_matrix_dtype(df))))
+            with open(_columns_path(path) , "w") as f:
+                json.dump(list(df.columns) , f)
+        else:
+            df.to_csv(path , index=False)
+    except Exception as e :
+        logger.error("Error while saving data")
+        raise CustomException("Failed to save data" , e)
+
+
+def read_data_chunks(path , chunk_size):
+    # Yields DataFrames of at most chunk_size rows without loading the whole file
+    import pandas as pd
+    try:
+        logger.info(f"Loading data in chunks of {chunk_size} rows")
+        extension = os.path.splitext(path)[1]
+        if extension == ".parquet":
+            from pyarrow import parquet
+            for batch in parquet.ParquetFile(path).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        elif extension in (".feather" , ".arrow"):
+            from pyarrow import feather
+            table = feather.read_table(path , memory_map=True)
+            for start in range(0 , table.num_rows , chunk_size):
+                yield table.slice(start , chunk_size).to_pandas()
+        elif extension == ".npy":
+            data = read_data(path)
+            for start in range(0 , len(data) , chunk_size):
+                yield data.iloc[start:start + chunk_size]
+        else:
+            yield from pd.read_csv(path , chunksize=chunk_size)
+    except Exception as e :
+        logger.error("Error while reading data chunks")
+        raise CustomException("Failed to read data chunks" , e)
+
+
+class DataChunkWriter:
+    """
+    Appends DataFrame chunks to a csv, parquet, feather or npy file.
+
+    Use as a context manager; the file is complete once the block exits. The column dtypes of the first
+    chunk are the schema of the file, later chunks are cast to them so every chunk is stored alike.
+    """
+
+    def __init__(self , path):
+        self.path = path
+        self.extension = os.path.splitext(path)[1]
+        self.columns = None
+        self.rows = 0
+        self._writer = None
+        self._sink = None
+        self._schema = None
+        self._dtypes = None
+        self._matrix_dtype = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or "." , exist_ok=True)
+        return self
+
+    def write(self , df):
+        try:
+            if self.columns is None:
+                self.columns = list(df.columns)
+                self._dtypes = df.dtypes.to_dict()
+                self._open(df)
+            elif df.dtypes.to_dict() != self._dtypes:
+                df = df[self.columns].astype(self._dtypes)
+
+            if self.extension == ".parquet" or self.extension in (".feather" , ".arrow"):
+                import pyarrow as pa
+                self._writer.write_table(pa.Table.from_pandas(df , schema=self._schema , preserve_index=False))
+            elif self.extension == ".npy":
+                self._sink.write(np.ascontiguousarray(df.to_numpy(dtype=self._matrix_dtype)).tobytes())
+            else:
+                df.to_csv(self._sink , header=self.rows == 0 , index=False)
+            self.rows += len(df)
+        except Exception as e :
+            logger.error("Error while writing data chunk")
+            raise CustomException("Failed to write data chunk" , e)
+
+    def _open(self , df):
+        if self.extension == ".parquet":
+            import pyarrow as pa
+            from pyarrow import parquet
+            self._schema = pa.Schema.from_pandas(df , preserve_index=False)
+            self._writer = parquet.ParquetWriter(self.path , self._schema)
+        elif self.extension in (".feather" , ".arrow"):
+            import pyarrow as pa
+            self._sink = pa.OSFile(self.path , "wb")
+            self._schema = pa.Schema.from_pandas(df , preserve_index=False)
+            self._writer = pa.ipc.new_file(self._sink , self._schema)
+        elif self.extension == ".npy":
+            # Rows are appended to a temporary file, the .npy header needs the final row count
+            self._matrix_dtype = _matrix_dtype(df)
+            self._sink = open(self.path + ".tmp" , "wb")
+        else:
+            self._sink = open(self.path , "w" , newline="")
+
+    def __exit__(self , exc_type , exc_value , traceback):
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+
+        if self.extension == ".npy" and self.columns is not None and exc_type is None:
+            with open(self.path , "wb") as f , open(self.path + ".tmp" , "rb") as tmp:
+                np.lib.format.write_array_header_1_0(f , {"descr": np.lib.format.dtype_to_descr(self._matrix_dtype) ,
+                                                          "fortran_order": False ,
+                                                          "shape": (self.rows , len(self.columns))})
+                for block in iter(lambda: tmp.read(1 << 24) , b""):
+                    f.write(block)
+            os.remove(self.path + ".tmp")
+            with open(_columns_path(self.path) , "w") as f:
+                json.dump(self.columns , f)
+        return False